@@ -0,0 +1,66 @@
+"""Bar and beat line positions for the timeline grid and ruler.
+
+This module provides:
+- BeatGrid: sorted bar/beat positions (in beats) and measure labels for a
+            list of time-signature segments
+- visible_span: index range of a sorted position array inside a beat window
+
+MidiDoc builds one BeatGrid whenever its ts_segments change, so the renderer
+bisects into the visible window and draws lines from a slice instead of
+walking every segment each frame. Bars follow the ruler numbering: a segment
+holds bars at start + k * bar_len for k = 0..floor(length / bar_len), and the
+bar that closes one segment and opens the next appears only once. Eighth and
+sixteenth subdivisions are a plain quarter-note lattice and need no table.
+
+Usage:
+    from app.beat_grid import visible_span
+    grid = doc.beat_grid
+    lo, hi = visible_span(grid.bars, left_beat, right_beat)
+    for pos, label in zip(grid.bars[lo:hi], grid.bar_labels[lo:hi]):
+        ...
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+# Positions closer than this (in beats) are the same line
+_SAME_POS = 1e-9
+
+
+class BeatGrid:
+    __slots__ = ("bars", "bar_labels", "beats")
+
+    def __init__(self, ts_segments: List[Dict]) -> None:
+        self.bars = array("d")        # bar starts, ascending
+        self.bar_labels: List[str] = []  # 1-based measure number of each bar
+        self.beats = array("d")       # beats inside bars (bar starts excluded), ascending
+        for seg in ts_segments:
+            start, end = seg["start_beats"], seg["end_beats"]
+            if end <= start:
+                continue
+            bar_len, beat_len, num = seg["bar_len"], seg["beat_len"], seg["num"]
+            first = int(seg["measure_start_index"]) + 1
+            for k in range(int(math.floor((end - start) / max(1e-9, bar_len))) + 1):
+                mpos = start + k * bar_len
+                if not self.bars or mpos - self.bars[-1] > _SAME_POS:
+                    self.bars.append(mpos)
+                    self.bar_labels.append(str(first + k))
+                for j in range(1, num):
+                    bpos = mpos + j * beat_len
+                    if bpos > end:
+                        break
+                    self.beats.append(bpos)
+
+
+def visible_span(positions: Sequence[float], left: float, right: float) -> Tuple[int, int]:
+    """[lo, hi) indices of positions within [left, right]."""
+    return bisect_left(positions, left), bisect_right(positions, right)
+
+
+__all__ = [
+    "BeatGrid",
+    "visible_span",
+]
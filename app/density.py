@@ -0,0 +1,144 @@
+"""Multi-resolution note occupancy for zoomed-out rendering.
+
+This module provides:
+- DensityPyramid: per-pitch occupancy runs at power-of-two time bucket sizes
+- pyramid_for:    get (and cache on the NoteStore) the pyramid of one track
+
+Level 0 buckets are `base_ticks` wide (a power of two near a 32nd note);
+level n buckets are base_ticks << n. At every level each pitch row is stored
+as sorted runs of consecutive occupied buckets with the peak number of notes
+touching one bucket of the run, so the timeline can draw one rectangle per
+run instead of one per note. Levels are built on first use.
+
+`selected(mask, key)` gives the pyramid of just the selected notes (same
+bucket sizes), so the timeline can overlay the selection on a zoomed-out row.
+
+Usage:
+    from app.density import pyramid_for
+    pyr = pyramid_for(td.notes, doc.ticks_per_beat)
+    level = pyr.level_for(px_per_tick, min_bucket_px=2.0)
+    for pitch, b0, b1, peak in pyr.runs(level, t0, t1):
+        ...
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, compress
+from typing import Dict, Iterator, Optional, Tuple
+
+_OCCUPIED = re.compile(b"[^\x00]+")
+
+# (run start bucket, run end bucket (exclusive), peak notes per bucket) columns
+_Runs = Tuple[array, array, array]
+
+
+def _runs_from_counts(counts: array) -> _Runs:
+    starts, ends, peaks = array("i"), array("i"), array("H")
+    occ = bytes(map(bool, counts))
+    for m in _OCCUPIED.finditer(occ):
+        s, e = m.span()
+        starts.append(s)
+        ends.append(e)
+        peaks.append(min(0xFFFF, max(counts[s:e])))
+    return starts, ends, peaks
+
+
+class DensityPyramid:
+    __slots__ = ("base_ticks", "num_levels", "mean_note_ticks", "_tpq", "_notes", "_mask", "_levels",
+                 "_selected")
+
+    def __init__(self, notes, ticks_per_beat: int, mask=None) -> None:
+        """mask: optional byte mask parallel to the notes (as Selection.mask);
+        only notes with a non-zero entry are counted. Bucket sizes and level
+        count always follow the whole track."""
+        tpq = max(1, int(ticks_per_beat or 480))
+        base = 1
+        while base * 16 < tpq:  # ~ a 64th..32nd note
+            base <<= 1
+        self.base_ticks = base
+        self._tpq = tpq
+        self._notes = notes
+        self._mask = mask
+        self._selected: Optional[Tuple[object, "DensityPyramid"]] = None
+        # levels[n]: pitch -> runs at bucket size base_ticks << n, built on first use
+        self._levels: Dict[int, Dict[int, _Runs]] = {}
+        n = len(notes)
+        self.mean_note_ticks = (sum(notes.end_tick) - sum(notes.start_tick)) / float(n) if n else 0.0
+        self.num_levels = 1
+        if n:
+            span = max(notes.end_tick)
+            while (base << (self.num_levels - 1)) < span:
+                self.num_levels += 1
+
+    def _build_level(self, level: int) -> Dict[int, _Runs]:
+        size = self.base_ticks << level
+        notes = self._notes
+        if not len(notes):
+            return {}
+        nbuckets = (max(notes.end_tick) + size - 1) // size + 1
+        # Notes touching each bucket, per pitch, via a difference array
+        diffs: Dict[int, array] = {}
+        rows = zip(notes.start_tick, notes.end_tick, notes.pitch)
+        if self._mask is not None:
+            rows = compress(rows, self._mask)
+        for s, e, p in rows:
+            d = diffs.get(p)
+            if d is None:
+                d = diffs[p] = array("i", bytes(4 * (nbuckets + 1)))
+            d[s // size] += 1
+            d[(e - 1 if e > s else s) // size + 1] -= 1
+        return {p: _runs_from_counts(array("i", accumulate(d[:nbuckets]))) for p, d in diffs.items()}
+
+    def level(self, level: int) -> Dict[int, _Runs]:
+        runs = self._levels.get(level)
+        if runs is None:
+            runs = self._levels[level] = self._build_level(level)
+        return runs
+
+    def selected(self, mask, key) -> "DensityPyramid":
+        """Pyramid of the notes set in `mask`, cached until `key` (e.g.
+        Selection.version) changes."""
+        sel = self._selected
+        if sel is None or sel[0] != key:
+            sel = self._selected = (key, DensityPyramid(self._notes, self._tpq, mask))
+        return sel[1]
+
+    def bucket_ticks(self, level: int) -> int:
+        return self.base_ticks << level
+
+    def level_for(self, px_per_tick: float, min_bucket_px: float) -> int:
+        """Finest level whose buckets are at least min_bucket_px wide."""
+        level = 0
+        while level < self.num_levels - 1 and (self.base_ticks << level) * px_per_tick < min_bucket_px:
+            level += 1
+        return level
+
+    def runs(self, level: int, t0: int, t1: int, pitch_lo: int = 0,
+             pitch_hi: int = 127) -> Iterator[Tuple[int, int, int, int]]:
+        """(pitch, start_tick, end_tick, peak) of runs overlapping ticks [t0, t1]
+        on pitches pitch_lo..pitch_hi."""
+        size = self.base_ticks << level
+        b0, b1 = t0 // size, t1 // size
+        for pitch, (starts, ends, peaks) in self.level(level).items():
+            if pitch < pitch_lo or pitch > pitch_hi:
+                continue
+            i = bisect_right(ends, b0)
+            while i < len(starts) and starts[i] <= b1:
+                yield pitch, starts[i] * size, ends[i] * size, peaks[i]
+                i += 1
+
+
+def pyramid_for(notes, ticks_per_beat: int) -> DensityPyramid:
+    """Pyramid of a NoteStore, built on first use and cached on the store."""
+    pyr = notes._density
+    if pyr is None:
+        pyr = notes._density = DensityPyramid(notes, ticks_per_beat)
+    return pyr
+
+
+__all__ = [
+    "DensityPyramid",
+    "pyramid_for",
+]
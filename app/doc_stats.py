@@ -0,0 +1,253 @@
+"""Per-document note statistics, computed once per document version.
+
+This module provides:
+- TrackStats: note count, pitch/velocity histograms, channels, density per bar
+              and peak polyphony of one track
+- DocStats:   TrackStats for every track plus document-wide aggregates
+
+MidiDoc builds a DocStats once per load/reload (on first access to `doc.stats`;
+LoadJob does that and calls prepare() on its worker thread); UI code reads the
+precomputed values instead of walking the notes each frame. Pitch bounds come
+from TrackData and never decode a lazily loaded track. A lazy document's
+tracks are summarized as they are decoded and folded into running totals, so
+the totals only need the final polyphony pass once the last track arrives.
+
+Usage:
+    from app.doc_stats import DocStats
+    st = doc.stats
+    if st.has_notes:
+        print(st.pitch_min, st.pitch_max, st.track(0).peak_polyphony)
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from collections import Counter
+from itertools import chain
+from bisect import bisect_left, bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+
+def _histogram(values: Iterable[int]) -> array:
+    hist = array("I", bytes(4 * 128))
+    for v, n in Counter(values).items():
+        hist[v] = n
+    return hist
+
+
+def _peak_overlap(starts: Iterable[int], ends: Sequence[int]) -> int:
+    """Peak number of open [start, end) intervals; both inputs sorted ascending."""
+    peak = 0
+    j = 0
+    for i, s in enumerate(starts):
+        # Notes ending exactly at s are closed: touching notes do not overlap
+        j = bisect_right(ends, s, j)
+        if i + 1 - j > peak:
+            peak = i + 1 - j
+    return peak
+
+
+def _bar_edges(ts_segments: List[Dict], num_bars: int) -> List[float]:
+    """First beat of each bar 0..num_bars (the last entry closes the final bar).
+
+    Matches the ruler numbering: inside a segment, bar = measure_start_index +
+    floor((beat - start_beats) / bar_len), so a partial bar at the end of a
+    segment shares its number with the first bar of the next one.
+    """
+    edges: List[float] = []
+    si = 0
+    last = len(ts_segments) - 1
+    for k in range(num_bars + 1):
+        while True:
+            seg = ts_segments[si]
+            msi = seg["measure_start_index"]
+            if msi >= k:
+                edge = seg["start_beats"]
+                break
+            bar_len = seg["bar_len"] or 4.0
+            edge = seg["start_beats"] + (k - msi - 1e-9) * bar_len
+            if si == last or edge < seg["end_beats"]:
+                break
+            si += 1
+        edges.append(edge)
+    return edges
+
+
+def _bar_counts(start_beats: Sequence[float], ts_segments: List[Dict], num_bars: int) -> array:
+    """Note starts per bar; start_beats must be sorted ascending."""
+    counts = array("I", bytes(4 * num_bars))
+    if not ts_segments or not num_bars:
+        return counts
+    edges = _bar_edges(ts_segments, num_bars)
+    prev = bisect_left(start_beats, edges[0])
+    for k in range(num_bars):
+        nxt = bisect_left(start_beats, edges[k + 1])
+        counts[k] = nxt - prev
+        prev = nxt
+    return counts
+
+
+def count_bars(ts_segments: List[Dict], total_beats: float) -> int:
+    """Number of (possibly partial) bars needed to cover total_beats."""
+    if not ts_segments:
+        return 0
+    seg = ts_segments[-1]
+    bar_len = seg["bar_len"] or 4.0
+    span = max(0.0, total_beats - seg["start_beats"])
+    return int(seg["measure_start_index"]) + int(math.ceil(span / bar_len - 1e-9))
+
+
+class TrackStats:
+    __slots__ = ("note_count", "pitch_min", "pitch_max", "pitch_hist", "velocity_hist",
+                 "channels", "bar_density", "peak_polyphony")
+
+    def __init__(self) -> None:
+        self.note_count: int = 0
+        self.pitch_min: int = 127
+        self.pitch_max: int = 0
+        self.pitch_hist: array = array("I", bytes(4 * 128))
+        self.velocity_hist: array = array("I", bytes(4 * 128))
+        self.channels: FrozenSet[int] = frozenset()
+        self.bar_density: array = array("I")
+        self.peak_polyphony: int = 0
+
+    @classmethod
+    def compute(cls, notes, ts_segments: List[Dict], num_bars: int) -> "TrackStats":
+        """Compute from a NoteStore (sorted by start, as built by MidiDoc)."""
+        ts = cls()
+        ts.note_count = len(notes)
+        if not ts.note_count:
+            ts.bar_density = array("I", bytes(4 * num_bars))
+            return ts
+        ts.pitch_min = min(notes.pitch)
+        ts.pitch_max = max(notes.pitch)
+        ts.pitch_hist = _histogram(notes.pitch)
+        ts.velocity_hist = _histogram(notes.velocity)
+        ts.channels = frozenset(notes.channel)
+        ts.bar_density = _bar_counts(notes.start_beats, ts_segments, num_bars)
+        ts.peak_polyphony = _peak_overlap(notes.start_tick, sorted(notes.end_tick))
+        return ts
+
+
+class DocStats:
+    """Statistics of one MidiDoc version. Rebuilt by the document when its
+    content changes; only filled in further as lazy tracks are decoded."""
+
+    def __init__(self, doc, previous: Optional["DocStats"] = None) -> None:
+        """previous: stats of an older version of the document; tracks whose
+        NoteStore is unchanged (hot reload) keep their summaries when the bar
+        layout is the same, and so do the totals if every track does."""
+        self._doc = doc
+        self.version: int = doc.version
+        self.num_bars: int = count_bars(doc.ts_segments, doc.total_beats)
+        self._ts_segments = doc.ts_segments
+        self._tracks: List[Optional[TrackStats]] = [None] * len(doc.tracks)
+        self._sources: List[object] = [None] * len(doc.tracks)   # NoteStore each summary was built from
+        self._totals: Optional[TrackStats] = None
+        # Running aggregate of the summarized tracks, plus each one's start and
+        # end tick columns (sorted together once, for the totals' peak polyphony)
+        self._acc = TrackStats()
+        self._acc.bar_density = array("I", bytes(4 * self.num_bars))
+        self._acc_channels: set = set()
+        self._starts: List[Sequence[int]] = []
+        self._ends: List[Sequence[int]] = []
+
+        # Cheap bounds straight from TrackData (never decode lazy tracks)
+        self.has_notes = False
+        self.pitch_min, self.pitch_max = 127, 0
+        self.largest_track_range = 0
+        for td in doc.tracks:
+            if not td.has_notes:
+                continue
+            self.has_notes = True
+            self.pitch_min = min(self.pitch_min, td.pitch_min)
+            self.pitch_max = max(self.pitch_max, td.pitch_max)
+            self.largest_track_range = max(self.largest_track_range, td.pitch_max - td.pitch_min + 1)
+
+        reuse: Dict[int, TrackStats] = {}
+        if previous is not None and (previous.num_bars, previous._ts_segments) == (self.num_bars, doc.ts_segments):
+            reuse = {id(src): ts for src, ts in zip(previous._sources, previous._tracks) if ts is not None}
+
+        # Eagerly loaded tracks are summarized now; lazy ones on first use
+        for ti, td in enumerate(doc.tracks):
+            if td.loaded:
+                notes = td.notes
+                self._summarize(ti, notes, reuse.get(id(notes)))
+        if (reuse and previous._totals is not None and len(previous._sources) == len(self._sources)
+                and all(a is b for a, b in zip(previous._sources, self._sources))):
+            self._totals = previous._totals
+
+    def track(self, ti: int) -> TrackStats:
+        notes = self._doc.track_notes(ti)  # decoding a lazy track summarizes it (track_decoded)
+        ts = self._tracks[ti]
+        if ts is None:
+            ts = self._summarize(ti, notes)
+        return ts
+
+    def track_decoded(self, ti: int, notes) -> None:
+        """Called by MidiDoc when lazy track `ti` has just been decoded into `notes`."""
+        if self._tracks[ti] is None:
+            self._summarize(ti, notes)
+
+    def _summarize(self, ti: int, notes, ts: Optional[TrackStats] = None) -> TrackStats:
+        if ts is None:
+            ts = TrackStats.compute(notes, self._doc.ts_segments, self.num_bars)
+        self._tracks[ti] = ts
+        self._sources[ti] = notes
+        acc = self._acc
+        acc.note_count += ts.note_count
+        for v in range(128):
+            acc.pitch_hist[v] += ts.pitch_hist[v]
+            acc.velocity_hist[v] += ts.velocity_hist[v]
+        for i, n in enumerate(ts.bar_density):
+            acc.bar_density[i] += n
+        self._acc_channels |= ts.channels
+        if ts.note_count:
+            self._starts.append(notes.start_tick)
+            self._ends.append(notes.end_tick)
+        return ts
+
+    @property
+    def complete(self) -> bool:
+        """True once every track has been summarized (always, unless the doc is lazy)."""
+        return all(ts is not None for ts in self._tracks)
+
+    def prepare(self) -> None:
+        """Build everything that does not need a lazy track decoded, totals
+        included once every track is summarized. LoadJob calls this on its
+        worker thread so the first frame after a load finds it ready."""
+        if self.complete:
+            self.totals
+
+    @property
+    def totals(self) -> TrackStats:
+        """Document-wide aggregate (decodes any lazy tracks on first access)."""
+        if self._totals is None:
+            for ti in range(len(self._tracks)):
+                self.track(ti)
+            acc = self._acc
+            tot = TrackStats()
+            tot.note_count = acc.note_count
+            tot.pitch_min, tot.pitch_max = self.pitch_min, self.pitch_max
+            tot.pitch_hist = array("I", acc.pitch_hist)
+            tot.velocity_hist = array("I", acc.velocity_hist)
+            tot.bar_density = array("I", acc.bar_density)
+            tot.channels = frozenset(self._acc_channels)
+            # One sort over the concatenated columns; the start columns are
+            # already sorted runs, which the sort merges in linear time
+            tot.peak_polyphony = _peak_overlap(sorted(chain(*self._starts)), sorted(chain(*self._ends)))
+            self._totals = tot
+            self._starts = self._ends = []
+        return self._totals
+
+    @property
+    def max_track_polyphony(self) -> int:
+        """Largest per-track peak polyphony (spillover channels needed)."""
+        return max((self.track(ti).peak_polyphony for ti in range(len(self._tracks))), default=0)
+
+
+__all__ = [
+    "TrackStats",
+    "DocStats",
+    "count_bars",
+]
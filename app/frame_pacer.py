@@ -0,0 +1,94 @@
+"""Decide when the main loop has to draw a frame.
+
+This module provides:
+- FramePacer: dirty tracking for the UI loop plus frame-rate/CPU statistics
+
+The loop asks `should_render(busy)` once per iteration. Frames are drawn while
+the app is busy (playback, a background load, a drag, a held key or mouse
+button) and for `settle_s` after the last input event or document change, so
+imgui hover/popup state settles. Otherwise the loop blocks on the event queue
+for `idle_timeout_ms`, waking at `idle_fps` only to poll the load job and the
+file watcher. With `enabled` off every iteration renders, as before.
+
+CPU usage is process time over wall time in windows of `stats_window_s`;
+`idle_cpu_percent` is the value of the most recent window in which no frame
+was drawn.
+
+Usage:
+    from app.frame_pacer import FramePacer
+    pacer = FramePacer()
+    while running:
+        events = ...              # wait up to pacer.idle_timeout_ms when idle
+        if events:
+            pacer.note_activity()
+        pacer.update_stats()
+        if not pacer.should_render(busy):
+            continue
+        ...                       # draw
+        pacer.frame_rendered()
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+
+class FramePacer:
+    def __init__(self, active_fps: int = 120, idle_fps: float = 4.0, settle_s: float = 0.25,
+                 stats_window_s: float = 1.0) -> None:
+        self.enabled: bool = True
+        self.active_fps = int(active_fps)
+        self.idle_fps = float(idle_fps)
+        self.settle_s = float(settle_s)
+        self.stats_window_s = float(stats_window_s)
+        self._active_until = time.perf_counter() + self.settle_s  # draw the first frames
+        self._skipped = True  # no frame drawn yet
+
+        # Statistics of the last completed window
+        self.fps: float = 0.0
+        self.cpu_percent: float = 0.0
+        self.idle_cpu_percent: Optional[float] = None
+        self._win_wall = time.perf_counter()
+        self._win_cpu = time.process_time()
+        self._win_frames = 0
+
+    @property
+    def idle_timeout_ms(self) -> int:
+        return max(1, int(1000.0 / max(0.1, self.idle_fps)))
+
+    def note_activity(self) -> None:
+        """Input arrived or something changed: keep drawing for settle_s."""
+        self._active_until = time.perf_counter() + self.settle_s
+
+    def should_render(self, busy: bool) -> bool:
+        render = not self.enabled or busy or time.perf_counter() < self._active_until
+        if not render:
+            self._skipped = True
+        return render
+
+    def frame_dt(self, dt: float) -> float:
+        """Frame delta for time-based input; the gap after an idle stretch counts as one frame."""
+        if self._skipped:
+            return 1.0 / self.active_fps
+        return dt
+
+    def frame_rendered(self) -> None:
+        self._skipped = False
+        self._win_frames += 1
+
+    def update_stats(self) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._win_wall
+        if elapsed < self.stats_window_s:
+            return
+        cpu = time.process_time()
+        self.fps = self._win_frames / elapsed
+        self.cpu_percent = 100.0 * (cpu - self._win_cpu) / elapsed
+        if self._win_frames == 0:
+            self.idle_cpu_percent = self.cpu_percent
+        self._win_wall, self._win_cpu, self._win_frames = now, cpu, 0
+
+
+__all__ = [
+    "FramePacer",
+]
@@ -0,0 +1,104 @@
+"""Background MIDI loading.
+
+This module provides:
+- LoadCancelled: raised inside the worker when a load is cancelled
+- LoadJob:       loads a fresh MidiDoc on a worker thread, with progress and cancel
+
+The job never touches the document that is currently displayed: it builds a
+new MidiDoc, plus its stats and overview, and the UI swaps it into AppState
+once `done` is set.
+
+Usage:
+    from app.loader import LoadJob
+    job = LoadJob(path, parallel=True)
+    job.start()
+    ...                       # each frame: draw job.fraction, maybe job.cancel()
+    if job.done and job.doc:  # success
+        state.midi = job.doc
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Optional
+
+from app.midi_doc import MidiDoc
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LoadJob:
+    def __init__(self, path: str, **load_kwargs) -> None:
+        self.path = path
+        self.load_kwargs = load_kwargs
+        self.done_units = 0
+        self.total_units = 0
+        self.done = False
+        self.doc: Optional[MidiDoc] = None
+        self.error: Optional[BaseException] = None
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="midi-load", daemon=True)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def fraction(self) -> float:
+        if self.total_units <= 0:
+            return 0.0
+        return min(1.0, self.done_units / float(self.total_units))
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.done else time.perf_counter()
+        return end - self.started_at
+
+    def start(self) -> "LoadJob":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        """Request cancellation; takes effect at the next progress report
+        (every PROGRESS_BYTES of a track, or per track for parallel/mido loads)."""
+        self._cancel.set()
+
+    def _on_progress(self, done: int, total: int) -> None:
+        self.done_units = done
+        self.total_units = total
+        if self._cancel.is_set():
+            raise LoadCancelled()
+
+    def _run(self) -> None:
+        doc = MidiDoc()
+        try:
+            doc.load(self.path, progress=self._on_progress, **self.load_kwargs)
+            if not self._cancel.is_set():
+                # Derived data the first frame would otherwise build on the UI thread
+                doc.stats.prepare()
+                doc.overview
+            if not self._cancel.is_set():
+                self.doc = doc
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.perf_counter()
+            self.done = True
+
+
+__all__ = [
+    "LoadCancelled",
+    "LoadJob",
+]
@@ -1,9 +1,14 @@
 """MIDI data structures and loader.
 
 This module provides:
-- Note:      simple note event container
-- TrackData: per-track note list + pitch bounds + per-track pitch scroll offset
+- Note:      simple note event container (view of one row of a NoteStore)
+- NoteStore: columnar per-track note storage, sorted by start tick
+- TrackData: per-track notes + pitch bounds + per-track pitch scroll offset
 - MidiDoc:   full song document with time-signature changes and derived segments
+- notes_in_range: indices of a track's notes overlapping a tick window
+
+Files are decoded by the built-in reader in app.smf by default; the mido
+path is still available via MidiDoc.load(path, parser="mido").
 
 Usage:
     from midi_doc import MidiDoc, Note, TrackData
@@ -12,8 +17,26 @@ Usage:
 """
 from __future__ import annotations
 
-from typing import List, Tuple, Optional, Dict
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional, Dict
+import hashlib
 import math
+import os
+
+from app.beat_grid import BeatGrid
+from app.doc_stats import DocStats
+from app.overview import SongOverview
+from app.smf import SmfError, SmfTrack, decode_track, decode_tracks_parallel, read_header, scan_track
+from app.tempo_map import TempoMap
+
+# progress(done, total) callback accepted by MidiDoc.load
+ProgressFn = Callable[[int, int], None]
+
+# Files smaller than this are always decoded in-process, even when a parallel
+# load is requested: pool start-up costs more than it saves below ~4 MiB.
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
 
 # ---- MIDI parsing (mido) ----
 try:
@@ -22,6 +45,36 @@ except ImportError:  # makes the module importable without mido for tooling/IDE
     mido = None  # type: ignore
 
 
+def _decode_mido_track(track) -> SmfTrack:
+    """Reduce a mido track to the same per-track result as app.smf.decode_track."""
+    out = SmfTrack()
+    abs_tick = 0
+    # key: (pitch, channel) -> (start_tick, velocity)
+    active: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    for msg in track:
+        abs_tick += msg.time
+        if msg.type == "track_name" and out.name is None:
+            out.name = msg.name
+        if msg.type == "time_signature":
+            num = int(getattr(msg, "numerator", 4) or 4)
+            den = int(getattr(msg, "denominator", 4) or 4)
+            out.ts_changes.append((abs_tick, num, den))
+        if msg.type == "set_tempo":
+            out.tempo_events.append((abs_tick, int(msg.tempo)))  # microseconds per beat
+        if msg.type == "note_on" and msg.velocity > 0:
+            key = (int(msg.note), int(getattr(msg, "channel", 0)))
+            active[key] = (abs_tick, int(msg.velocity))
+        elif (msg.type == "note_off") or (msg.type == "note_on" and msg.velocity == 0):
+            key = (int(msg.note), int(getattr(msg, "channel", 0)))
+            if key in active:
+                start_tick, vel = active.pop(key)
+                if abs_tick > start_tick:
+                    out.notes.append((start_tick, abs_tick, key[0], vel, key[1]))
+    out.end_tick = abs_tick
+    out.dangling = [(st, pitch, vel, ch) for (pitch, ch), (st, vel) in active.items()]
+    return out
+
+
 class Note:
     __slots__ = ("start_tick", "end_tick", "pitch", "velocity", "channel")
 
@@ -33,16 +86,216 @@ class Note:
         self.channel = int(channel)
 
 
+# Notes per block of the NoteStore interval index
+_INDEX_BLOCK = 32
+
+
+class NoteStore:
+    """Struct-of-arrays note storage for one track.
+
+    Columns are parallel `array`s sorted by start tick:
+      start_tick, end_tick (int64), pitch, velocity, channel (uint8),
+      start_beats, end_beats (float64, ticks / ticks_per_beat).
+
+    Indexing returns a Note built on the fly, so `td.notes[ni].pitch` keeps
+    working; hot paths should read the columns directly.
+
+    in_range() answers "which notes overlap this tick window" from an interval
+    index (prefix max of end_tick plus per-block maxima) built on first use.
+    """
+    __slots__ = ("start_tick", "end_tick", "pitch", "velocity", "channel", "start_beats", "end_beats",
+                 "_end_prefix_max", "_end_block_max", "_density", "_grid")
+
+    def __init__(self) -> None:
+        self.start_tick = array("q")
+        self.end_tick = array("q")
+        self.pitch = array("B")
+        self.velocity = array("B")
+        self.channel = array("B")
+        self.start_beats = array("d")
+        self.end_beats = array("d")
+        self._end_prefix_max: Optional[array] = None
+        self._end_block_max: Optional[array] = None
+        self._density = None  # app.density.DensityPyramid, built on first zoomed-out draw
+        self._grid = None     # app.note_grid.NoteGrid, built on first marquee query
+
+    @classmethod
+    def from_tuples(cls, notes: Iterable[Tuple[int, int, int, int, int]], ticks_per_beat: int) -> "NoteStore":
+        """Build from (start_tick, end_tick, pitch, velocity, channel) tuples (any order)."""
+        rows = sorted(notes, key=itemgetter(0))
+        store = cls()
+        if not rows:
+            return store
+        starts, ends, pitches, vels, chans = zip(*rows)
+        tpq = float(ticks_per_beat or 1)
+        store.start_tick = array("q", starts)
+        store.end_tick = array("q", ends)
+        store.pitch = array("B", pitches)
+        store.velocity = array("B", vels)
+        store.channel = array("B", chans)
+        store.start_beats = array("d", [t / tpq for t in starts])
+        store.end_beats = array("d", [t / tpq for t in ends])
+        return store
+
+    def __len__(self) -> int:
+        return len(self.start_tick)
+
+    def __getitem__(self, i: int) -> Note:
+        return Note(self.start_tick[i], self.end_tick[i], self.pitch[i], self.velocity[i], self.channel[i])
+
+    def __iter__(self) -> Iterator[Note]:
+        for i in range(len(self.start_tick)):
+            yield self[i]
+
+    def _build_index(self) -> None:
+        ends = self.end_tick
+        prefix = array("q", ends)
+        for i in range(1, len(prefix)):
+            if prefix[i] < prefix[i - 1]:
+                prefix[i] = prefix[i - 1]
+        self._end_block_max = array("q", [max(ends[b:b + _INDEX_BLOCK])
+                                          for b in range(0, len(ends), _INDEX_BLOCK)])
+        self._end_prefix_max = prefix
+
+    def candidate_span(self, t0: int, t1: int) -> Tuple[int, int]:
+        """Contiguous index range [lo, hi) holding every note that overlaps [t0, t1]."""
+        if self._end_prefix_max is None or len(self._end_prefix_max) != len(self.end_tick):
+            self._build_index()
+        hi = bisect_right(self.start_tick, t1)
+        return bisect_left(self._end_prefix_max, t0, 0, hi), hi
+
+    def in_range(self, t0: int, t1: int) -> List[int]:
+        """Indices (ascending) of notes with end_tick >= t0 and start_tick <= t1.
+
+        O(log n + k) for typical material: notes starting after t1 are cut off
+        by bisecting start_tick, notes that ended before t0 by bisecting the
+        prefix max of end_tick, and blocks in between whose longest note ends
+        before t0 (the tail behind one long held note) are skipped whole.
+        """
+        lo, hi = self.candidate_span(t0, t1)
+        ends, block_max = self.end_tick, self._end_block_max
+        out: List[int] = []
+        i = lo
+        while i < hi:
+            b = i // _INDEX_BLOCK
+            block_end = min(hi, (b + 1) * _INDEX_BLOCK)
+            if block_max[b] >= t0:
+                out.extend(j for j in range(i, block_end) if ends[j] >= t0)
+            i = block_end
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size of all columns in bytes."""
+        return sum(col.itemsize * len(col) for col in (
+            self.start_tick, self.end_tick, self.pitch, self.velocity,
+            self.channel, self.start_beats, self.end_beats))
+
+
 class TrackData:
     def __init__(self, name: str):
         self.name: str = name
-        self.notes: List[Note] = []
+        self._notes: NoteStore = NoteStore()
+        # Lazily loaded tracks: callable returning the NoteStore, run on first access
+        self._loader: Optional[Callable[[], NoteStore]] = None
         # Per-track vertical offset inside its row (piano-key scroll), in pixels
         self.pitch_scroll_px: float = 0.0
         # Pitch bounds for the track (inclusive)
         self.pitch_min: int = 127
         self.pitch_max: int = 0
 
+    @property
+    def notes(self) -> NoteStore:
+        if self._loader is not None:
+            # The loader stays in place if it raises, so a reload can re-point it
+            self._notes = self._loader()
+            self._loader = None
+        return self._notes
+
+    @notes.setter
+    def notes(self, store: NoteStore) -> None:
+        self._notes = store
+        self._loader = None
+
+    @property
+    def loaded(self) -> bool:
+        """False until the notes of a lazily loaded track have been decoded."""
+        return self._loader is None
+
+    @property
+    def has_notes(self) -> bool:
+        """Cheap emptiness test that never materializes a lazy track."""
+        return self.pitch_min <= self.pitch_max
+
+
+# Stand-in returned by MidiDoc.track_notes for tracks that cannot be read
+_EMPTY_NOTES = NoteStore()
+
+
+def notes_in_range(track: TrackData, t0: int, t1: int) -> List[int]:
+    """Indices of the track's notes overlapping ticks [t0, t1] (see NoteStore.in_range)."""
+    return track.notes.in_range(t0, t1)
+
+
+class _ChunkRecord:
+    """Per-MTrk bookkeeping kept on MidiDoc so reload() can reuse unchanged chunks.
+
+    digest: content digest of the chunk (lazy loads take it during the skim, so
+            unread chunks are matched by reload() like decoded ones)
+    dangling: whether the chunk leaves notes held at its end (None: not decoded yet)
+    close_tick: tick those notes were closed at (running max end tick up to this chunk)
+    track: the TrackData built from the chunk, or None for note-less chunks
+    """
+    __slots__ = ("digest", "name", "ts_changes", "tempo_events", "end_tick", "dangling", "close_tick", "track")
+
+    def __init__(self, digest: bytes, name: Optional[str], ts_changes, tempo_events, end_tick: int,
+                 dangling: Optional[bool], close_tick: int, track: Optional[TrackData]):
+        self.digest = digest
+        self.name = name
+        self.ts_changes = ts_changes
+        self.tempo_events = tempo_events
+        self.end_tick = end_tick
+        self.dangling = dangling
+        self.close_tick = close_tick
+        self.track = track
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _file_stamp(st: os.stat_result) -> Tuple[int, int]:
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _read_stamped(path: str) -> Tuple[bytes, Tuple[int, int]]:
+    """File contents plus the (size, mtime_ns) stamp they were read under."""
+    with open(path, "rb") as f:
+        stamp = _file_stamp(os.fstat(f.fileno()))
+        return f.read(), stamp
+
+
+def _read_chunk(path: str, start: int, end: int, stamp: Tuple[int, int]) -> bytes:
+    """Bytes [start, end) of a lazily loaded file, read back for a deferred decode.
+
+    Raises SmfError when the file no longer matches the stamp taken when it was
+    scanned, rather than decoding whatever now sits at those offsets.
+    """
+    with open(path, "rb") as f:
+        if _file_stamp(os.fstat(f.fileno())) != stamp:
+            raise SmfError("file changed on disk since it was opened; reload it")
+        f.seek(start)
+        data = f.read(end - start)
+    if len(data) != end - start:
+        raise SmfError("unexpected end of track data")
+    return data
+
+
+def _chunk_digest(buf, start: int, end: int) -> bytes:
+    with memoryview(buf) as mv:
+        return hashlib.blake2b(mv[start:end], digest_size=16).digest()
+
 
 class MidiDoc:
     """Loaded MIDI document with tracks and time-signature map.
@@ -67,6 +320,21 @@ class MidiDoc:
           - beat_len: length of one beat (in quarter-note beats)
           - bar_len: length of one bar (in quarter-note beats)
           - measure_start_index: absolute measure index at the start of the segment
+    beat_grid: BeatGrid
+        Bar/beat line positions and measure labels built from ts_segments.
+    tempo_map: TempoMap
+        Tempo segments as sorted parallel arrays; backs beat_to_us/us_to_beat
+        and their batch variants.
+    version: int
+        Incremented whenever the document content changes (load, reload).
+    stale: bool
+        Set when a lazy track could not be read back because the file changed
+        on disk (see track_notes); cleared by the next load/reload.
+    stats: DocStats
+        Note statistics for the current version, built on first access.
+    overview: SongOverview
+        Whole-song density for the current version and decoded tracks, built
+        on first access from the previous one.
     """
 
     def __init__(self) -> None:
@@ -76,77 +344,324 @@ class MidiDoc:
         self.total_ticks: int = 0
         self.ts_changes: List[Tuple[int, int, int]] = []
         self.ts_segments: List[Dict[str, float | int]] = []
+        self.beat_grid: BeatGrid = BeatGrid(self.ts_segments)
         self.time_sig_num: int = 4
         self.time_sig_den: int = 4
-        self.tempo_segments = []   # list[dict]: {start_tick, end_tick, start_beats, end_beats, us_per_beat, start_us, end_us}
         self.tempo_bpm_default = 120.0  # fallback if no tempo events
+        self.tempo_map: TempoMap = TempoMap(self.tempo_bpm_default)
+        self.tempo_bpm = self.tempo_bpm_default
+        self.lazy: bool = False
+        self.stale: bool = False
+        self.version: int = 0
+        self._stats: Optional[DocStats] = None
+        self._overview: Optional[SongOverview] = None
+        # Per-MTrk records for incremental reload (native and lazy loads only)
+        self._chunks: List[_ChunkRecord] = []
 
     # -------- Derived quantities --------
     @property
     def total_beats(self) -> float:
         return self.total_ticks / float(self.ticks_per_beat or 1)
 
+    @property
+    def stats(self) -> DocStats:
+        if self._stats is None or self._stats.version != self.version:
+            # Summaries of tracks whose notes survived a reload are carried over
+            self._stats = DocStats(self, previous=self._stats)
+        return self._stats
+
+    @property
+    def overview(self) -> SongOverview:
+        ov = self._overview
+        if ov is None or ov.key != (self.version, self.loaded_track_count):
+            # Rows of tracks whose notes are unchanged are carried over
+            ov = self._overview = SongOverview(self, previous=ov)
+        return ov
+
+    def track_notes(self, ti: int) -> NoteStore:
+        """Notes of track ti, for code that must not fail mid-frame.
+
+        A lazy track whose file changed on disk since it was opened reads as
+        empty and marks the document stale until it is reloaded; TrackData.notes
+        raises SmfError instead.
+        """
+        try:
+            return self.tracks[ti].notes
+        except SmfError:
+            self.stale = True
+            return _EMPTY_NOTES
+
+    def _changed(self) -> None:
+        """Mark the content as modified; version-keyed caches such as stats rebuild on next use."""
+        self.version += 1
+
     # -------- Loader --------
-    def load(self, path: str) -> None:
-        if not mido:
-            raise RuntimeError("mido not installed. Run: pip install mido")
+    def load(self, path: str, parser: str = "native", parallel: bool = False, cache=None,
+             lazy: bool = False, progress: Optional[ProgressFn] = None) -> None:
+        """Load a .mid file.
+
+        parser:   "native" (built-in single-pass reader, see app.smf) or "mido".
+        parallel: native parser only; decode tracks in a process pool when the
+                  file has several tracks and is at least PARALLEL_MIN_BYTES.
+        cache:    optional app.parse_cache.ParseCache; an unchanged file is
+                  restored from it instead of being parsed, a miss is stored.
+        lazy:     only skim track metadata now; each track's chunk is read back
+                  from the file and decoded on first access to TrackData.notes
+                  (SmfError if the file has changed since). Lazy loads are not
+                  written to the cache.
+        progress: optional progress(done, total) callback (native: bytes, mido:
+                  tracks), called after each track and, for the serial native
+                  and lazy paths, every app.smf.PROGRESS_BYTES within a track. An
+                  exception raised from it aborts the load.
+        """
+        self._chunks = []
+        self.lazy = lazy
+        if cache is not None and cache.restore(self, path):
+            self.lazy = False
+            self._changed()
+            return
+        if lazy:
+            self._load_lazy(path, progress)
+            return
+
+        digests: Optional[List[bytes]] = None
+        if parser == "native":
+            data = _read_file(path)
+            header = read_header(data)
+            tpq = header.ticks_per_beat
+            total = len(data)
+            digests = [_chunk_digest(data, s, e) for (s, e) in header.chunks]
+            if parallel and len(header.chunks) > 1 and len(data) >= PARALLEL_MIN_BYTES:
+                del data
+                done = 0
+
+                def on_chunk(nbytes: int) -> None:
+                    nonlocal done
+                    done += nbytes
+                    if progress is not None:
+                        progress(done, total)
+
+                decoded = decode_tracks_parallel(path, header.chunks, progress=on_chunk)
+            else:
+                decoded = []
+                within = (lambda pos: progress(pos, total)) if progress is not None else None
+                try:
+                    for (s, e) in header.chunks:
+                        decoded.append(decode_track(data, s, e, within))
+                        if progress is not None:
+                            progress(e, total)
+                except IndexError:
+                    raise SmfError("unexpected end of track data") from None
+        elif parser == "mido":
+            if not mido:
+                raise RuntimeError("mido not installed. Run: pip install mido")
+            mid = mido.MidiFile(path)
+            tpq = mid.ticks_per_beat
+            decoded = []
+            for t in mid.tracks:
+                decoded.append(_decode_mido_track(t))
+                if progress is not None:
+                    progress(len(decoded), len(mid.tracks))
+        else:
+            raise ValueError(f"Unknown MIDI parser: {parser!r}")
 
-        mid = mido.MidiFile(path)
         self.path = path
-        self.ticks_per_beat = int(mid.ticks_per_beat or 480)
-        self.tracks.clear()
-        self.ts_changes = []
+        self.ticks_per_beat = int(tpq or 480)
+        self._assemble(decoded, digests)
+        if cache is not None:
+            cache.store(self)
+
+    def load_tracks(self, decoded: List[SmfTrack], ticks_per_beat: int, path: str = "") -> None:
+        """Build the document from already decoded tracks (synthetic songs, tools).
+
+        Each SmfTrack holds what decode_track would return for one MTrk chunk;
+        nothing is kept for reload().
+        """
+        self._chunks = []
+        self.lazy = False
+        self.path = path
+        self.ticks_per_beat = int(ticks_per_beat or 480)
+        self._assemble(decoded)
+
+    def _assemble(self, decoded: List[SmfTrack], digests: Optional[List[bytes]] = None) -> None:
+        """Build tracks, TS and tempo maps from per-track decode results.
 
+        digests: per-chunk content digests; when given, the per-chunk records
+                 are kept so reload() can skip unchanged chunks.
+        """
+        records: List[_ChunkRecord] = []
         overall_last_tick = 0
-        for t in mid.tracks:
-            name: Optional[str] = None
-            abs_tick = 0
-            # key: (pitch, channel) -> (start_tick, velocity)
-            active: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for i, st in enumerate(decoded):
+            overall_last_tick = max(overall_last_tick, st.end_tick)
+            records.append(self._record_from_decoded(st, overall_last_tick, digests[i] if digests else b""))
+        self._apply_records(records, keep=digests is not None)
+
+    def _record_from_decoded(self, st: SmfTrack, close_tick: int, digest: bytes) -> _ChunkRecord:
+        td = TrackData(name="")
+        rows = st.notes
+        if st.dangling:
+            # Close any dangling notes at end of track
+            rows = rows + [(start_tick, close_tick, pitch, vel, ch)
+                           for (start_tick, pitch, vel, ch) in st.dangling]
+        td.notes = NoteStore.from_tuples(rows, self.ticks_per_beat)
+        if td.notes:
+            td.pitch_min = min(td.notes.pitch)
+            td.pitch_max = max(td.notes.pitch)
+        return _ChunkRecord(digest, st.name, st.ts_changes, st.tempo_events, st.end_tick,
+                            bool(st.dangling), close_tick, td if td.notes else None)
+
+    def _record_from_scan(self, start: int, end: int, info, close_tick: int,
+                          stamp: Tuple[int, int], digest: bytes) -> _ChunkRecord:
+        rec = _ChunkRecord(digest, info.name, info.ts_changes, info.tempo_events, info.end_tick,
+                           None, close_tick, None)
+        if info.has_notes:
             td = TrackData(name="")
+            td.pitch_min, td.pitch_max = info.pitch_min, info.pitch_max
+            td._loader = self._track_loader(start, end, stamp, rec, td)
+            rec.track = td
+        return rec
+
+    def _apply_records(self, records: List[_ChunkRecord], keep: bool) -> None:
+        """Rebuild tracks and the TS/tempo maps from per-chunk records (in file order)."""
+        self.tracks = []
+        self.ts_changes = []
+        tempo_events: List[Tuple[int, int]] = []
+        for rec in records:
+            self.ts_changes.extend(rec.ts_changes)
+            tempo_events.extend(rec.tempo_events)
+            if rec.track is not None:
+                rec.track.name = rec.name or f"Track {len(self.tracks)}"
+                self.tracks.append(rec.track)
+
+        self.total_ticks = max((rec.end_tick for rec in records), default=0)
+        self._chunks = records if keep else []
+        self.stale = False
+        self._build_maps(tempo_events)
+        self._changed()
+
+    def _load_lazy(self, path: str, progress: Optional[ProgressFn] = None) -> None:
+        buf, stamp = _read_stamped(path)
+        header = read_header(buf)
+        self.path = path
+        self.ticks_per_beat = int(header.ticks_per_beat or 480)
 
-            for msg in t:
-                abs_tick += msg.time
-                if msg.type == "track_name" and name is None:
-                    name = msg.name
-                if msg.type == "time_signature":
-                    num = int(getattr(msg, "numerator", 4) or 4)
-                    den = int(getattr(msg, "denominator", 4) or 4)
-                    self.ts_changes.append((abs_tick, num, den))
-                if msg.type == "note_on" and msg.velocity > 0:
-                    key = (int(msg.note), int(getattr(msg, "channel", 0)))
-                    active[key] = (abs_tick, int(msg.velocity))
-                elif (msg.type == "note_off") or (msg.type == "note_on" and msg.velocity == 0):
-                    key = (int(msg.note), int(getattr(msg, "channel", 0)))
-                    if key in active:
-                        start_tick, vel = active.pop(key)
-                        end_tick = abs_tick
-                        if end_tick > start_tick:
-                            td.notes.append(Note(start_tick, end_tick, key[0], vel, key[1]))
-                            td.pitch_min = min(td.pitch_min, key[0])
-                            td.pitch_max = max(td.pitch_max, key[0])
-
-                overall_last_tick = max(overall_last_tick, abs_tick)
-
-            # Close any dangling notes at end of track
-            for (pitch, ch), (start_tick, vel) in active.items():
-                td.notes.append(Note(start_tick, overall_last_tick, pitch, vel, ch))
-                td.pitch_min = min(td.pitch_min, pitch)
-                td.pitch_max = max(td.pitch_max, pitch)
+        records: List[_ChunkRecord] = []
+        overall_last_tick = 0
+        within = (lambda pos: progress(pos, len(buf))) if progress is not None else None
+        try:
+            for (start, end) in header.chunks:
+                info = scan_track(buf, start, end, within)
+                if progress is not None:
+                    progress(end, len(buf))
+                overall_last_tick = max(overall_last_tick, info.end_tick)
+                records.append(self._record_from_scan(start, end, info, overall_last_tick, stamp,
+                                                      _chunk_digest(buf, start, end)))
+        except IndexError:
+            raise SmfError("unexpected end of track data") from None
+        self._apply_records(records, keep=True)
+
+    def _track_loader(self, start: int, end: int, stamp: Tuple[int, int], rec: _ChunkRecord,
+                      td: TrackData) -> Callable[[], NoteStore]:
+        """Deferred decode of one chunk; dangling notes close at rec.close_tick as in _assemble.
+
+        Only the chunk's offsets and the file stamp are kept, no open file or
+        mapping, so the file can be rewritten (or replaced, on Windows) while
+        the document is open.
+        """
+        path = self.path
+        tpq = self.ticks_per_beat
+
+        def load() -> NoteStore:
+            data = _read_chunk(path, start, end, stamp)
+            try:
+                st = decode_track(data, 0, len(data))
+            except IndexError:
+                raise SmfError("unexpected end of track data") from None
+            rows = st.notes
+            rec.dangling = bool(st.dangling)
+            if st.dangling:
+                rows = rows + [(start_tick, rec.close_tick, pitch, vel, ch)
+                               for (start_tick, pitch, vel, ch) in st.dangling]
+            store = NoteStore.from_tuples(rows, tpq)
+            if store:
+                td.pitch_min = min(store.pitch)
+                td.pitch_max = max(store.pitch)
+            stats = self._stats
+            if stats is not None and stats.version == self.version and td in self.tracks:
+                stats.track_decoded(self.tracks.index(td), store)
+            return store
+
+        return load
+
+    # -------- Incremental reload --------
+    def reload(self, progress: Optional[ProgressFn] = None) -> Dict[int, int]:
+        """Re-read self.path, re-decoding only the MTrk chunks whose bytes changed.
+
+        Tracks whose chunk is unchanged keep their TrackData object, and with it
+        pitch_scroll_px and any decoded notes, whether or not a lazy chunk was
+        ever read (its digest is taken during the skim). Returns {old_index: new_index}
+        for those tracks. Documents without chunk bookkeeping (mido parser,
+        parse-cache hits) are fully reloaded and return an empty mapping.
+        """
+        path = self.path
+        if not self._chunks:
+            self.load(path, lazy=self.lazy, progress=progress)
+            return {}
+
+        buf, stamp = _read_stamped(path)
+        header = read_header(buf)
+        if int(header.ticks_per_beat or 480) != self.ticks_per_beat:
+            self.load(path, lazy=self.lazy, progress=progress)
+            return {}
+
+        pool: Dict[bytes, List[_ChunkRecord]] = {}
+        for rec in self._chunks:
+            pool.setdefault(rec.digest, []).append(rec)
+        old_index = {id(td): i for i, td in enumerate(self.tracks)}
+
+        records: List[_ChunkRecord] = []
+        overall_last_tick = 0
+        try:
+            for (start, end) in header.chunks:
+                digest = _chunk_digest(buf, start, end)
+                candidates = pool.get(digest)
+                rec = candidates.pop(0) if candidates else None
+                if rec is not None:
+                    overall_last_tick = max(overall_last_tick, rec.end_tick)
+                    if rec.dangling and rec.close_tick != overall_last_tick:
+                        rec = None  # held notes would now close at a different tick
+                    elif rec.track is not None and not rec.track.loaded:
+                        # Unread lazy track: read it back under the new file's stamp
+                        rec.close_tick = overall_last_tick
+                        rec.track._loader = self._track_loader(start, end, stamp, rec, rec.track)
+                if rec is None:
+                    if self.lazy:
+                        info = scan_track(buf, start, end)
+                        overall_last_tick = max(overall_last_tick, info.end_tick)
+                        rec = self._record_from_scan(start, end, info, overall_last_tick, stamp, digest)
+                    else:
+                        st = decode_track(buf, start, end)
+                        overall_last_tick = max(overall_last_tick, st.end_tick)
+                        rec = self._record_from_decoded(st, overall_last_tick, digest)
+                records.append(rec)
+                if progress is not None:
+                    progress(end, len(buf))
+        except IndexError:
+            raise SmfError("unexpected end of track data") from None
+
+        self._apply_records(records, keep=True)
+        return {old_index[id(td)]: i for i, td in enumerate(self.tracks) if id(td) in old_index}
 
-            td.name = name or f"Track {len(self.tracks)}"
-            if td.notes:
-                self.tracks.append(td)
+    @property
+    def loaded_track_count(self) -> int:
+        return sum(1 for td in self.tracks if td.loaded)
 
-        self.total_ticks = overall_last_tick
+    def _build_maps(self, tempo_events: List[Tuple[int, int]]) -> None:
         self._build_ts_segments()
-        
-        self._build_tempo_segments(mid)
+
+        self._build_tempo_map(tempo_events)
         # Optional: expose a "current" bpm for UI (tempo at beat 0)
-        if self.tempo_segments:
-            self.tempo_bpm = 60_000_000.0 / self.tempo_segments[0]["us_per_beat"]
-        else:
-            self.tempo_bpm = self.tempo_bpm_default
+        self.tempo_bpm = self.tempo_map.initial_bpm
 
     # -------- Time signature segments --------
     def _build_ts_segments(self) -> None:
@@ -185,143 +700,55 @@ class MidiDoc:
                 'measure_start_index': measure_index,
             })
             measure_index += bars
+        self.beat_grid = BeatGrid(self.ts_segments)
 
         # Keep quick-ref to the first TS
         self.time_sig_num = int(self.ts_changes[0][1])
         self.time_sig_den = int(self.ts_changes[0][2])
 
-    def _build_tempo_segments(self, mid: "mido.MidiFile"):
-        """Build tempo map segments in microseconds with beat and tick ranges."""
-        tpq = int(self.ticks_per_beat or mid.ticks_per_beat or 480)
-
-        # Collect absolute-tick tempo events across ALL tracks
-        tempo_events = []  # (abs_tick, us_per_beat)
-        for trk in mid.tracks:
-            t = 0
-            for msg in trk:
-                t += msg.time
-                if msg.type == "set_tempo":
-                    tempo_events.append((t, int(msg.tempo)))  # msg.tempo = microseconds per beat
-
-        tempo_events.sort(key=lambda x: x[0])
-
-        # Default tempo if none present
-        DEFAULT_USPB = int(60_000_000 / self.tempo_bpm_default)  # e.g. 500_000 for 120 BPM
-
-        # Build breakpoints: always have a 0-start tempo
-        breakpoints = []
-        if tempo_events and tempo_events[0][0] == 0:
-            breakpoints.append((0, tempo_events[0][1]))
-            breakpoints.extend(tempo_events[1:])
-        else:
-            breakpoints.append((0, DEFAULT_USPB))
-            breakpoints.extend(tempo_events)
-
-        # Determine total length in beats
+    def _build_tempo_map(self, tempo_events: List[Tuple[int, int]]) -> None:
+        """Build the tempo map from (abs_tick, us_per_beat) events collected across ALL tracks."""
         total_beats = float(self.total_beats or 0.0)
         # If we somehow don't have a total yet, estimate from the longest track end_tick
         if total_beats <= 0:
             max_tick = 0
             for td in self.tracks:
                 if td.notes:
-                    last_tick = max(n.end_tick for n in td.notes)
-                    max_tick = max(max_tick, last_tick)
-            total_beats = max_tick / float(tpq or 1)
-
-        # Build segments with cumulative microseconds
-        segs = []
-        us_cursor = 0.0
-        prev_tick = 0
-        prev_beats = 0.0
-        prev_uspb = breakpoints[0][1]
-
-        for i in range(1, len(breakpoints)):
-            btick, buspb = breakpoints[i]
-            bbeats = btick / float(tpq)
-            # duration of previous tempo span in beats
-            dbeats = max(0.0, bbeats - prev_beats)
-            if dbeats > 0:
-                segs.append(dict(
-                    start_tick=prev_tick,
-                    end_tick=btick,
-                    start_beats=prev_beats,
-                    end_beats=bbeats,
-                    us_per_beat=float(prev_uspb),
-                    start_us=us_cursor,
-                    end_us=us_cursor + dbeats * float(prev_uspb),
-                ))
-                us_cursor += dbeats * float(prev_uspb)
-
-            prev_tick = btick
-            prev_beats = bbeats
-            prev_uspb = buspb
-
-        # Final segment to song end
-        if total_beats > prev_beats:
-            dbeats = total_beats - prev_beats
-            segs.append(dict(
-                start_tick=prev_tick,
-                end_tick=int(total_beats * tpq),
-                start_beats=prev_beats,
-                end_beats=total_beats,
-                us_per_beat=float(prev_uspb),
-                start_us=us_cursor,
-                end_us=us_cursor + dbeats * float(prev_uspb),
-            ))
-            us_cursor += dbeats * float(prev_uspb)
-
-        self.tempo_segments = segs
-        self.total_us = us_cursor  # total song length in microseconds
+                    max_tick = max(max_tick, max(td.notes.end_tick))
+            total_beats = max_tick / float(self.ticks_per_beat or 1)
+        self.tempo_map = TempoMap.build(tempo_events, self.ticks_per_beat, total_beats, self.tempo_bpm_default)
+
+    @property
+    def tempo_segments(self) -> List[Dict[str, float]]:
+        """Tempo segments as dicts (compatibility view of tempo_map)."""
+        return self.tempo_map.segments()
+
+    @property
+    def total_us(self) -> float:
+        """Total song length in microseconds."""
+        return self.tempo_map.total_us
 
     def beat_to_us(self, beat: float) -> float:
         """Map an absolute beat position to absolute microseconds using tempo map."""
-        segs = self.tempo_segments
-        if not segs:
-            # fallback to constant tempo
-            uspb = 60_000_000 / float(getattr(self, "tempo_bpm_default", 120.0))
-            return float(beat) * float(uspb)
-
-        # binary search would be nicer; linear is fine (tempo events are few)
-        for s in segs:
-            if s["start_beats"] <= beat < s["end_beats"]:
-                return s["start_us"] + (beat - s["start_beats"]) * s["us_per_beat"]
-        # after last
-        last = segs[-1]
-        if beat >= last["end_beats"]:
-            extra = max(0.0, beat - last["end_beats"])
-            return last["end_us"] + extra * last["us_per_beat"]
-        # before first
-        first = segs[0]
-        if beat < first["start_beats"]:
-            return max(0.0, first["start_us"] - (first["start_beats"] - beat) * first["us_per_beat"])
-        return 0.0
+        return self.tempo_map.beat_to_us(beat)
 
     def us_to_beat(self, us: float) -> float:
         """Map absolute microseconds to absolute beats using tempo map."""
-        segs = self.tempo_segments
-        if not segs:
-            uspb = 60_000_000 / float(getattr(self, "tempo_bpm_default", 120.0))
-            return float(us) / float(uspb)
-
-        for s in segs:
-            if s["start_us"] <= us < s["end_us"]:
-                return s["start_beats"] + (us - s["start_us"]) / s["us_per_beat"]
-        # after last
-        last = segs[-1]
-        if us >= last["end_us"]:
-            extra = max(0.0, us - last["end_us"])
-            return last["end_beats"] + extra / last["us_per_beat"]
-        # before first
-        first = segs[0]
-        if us < first["start_us"]:
-            deficit = first["start_us"] - us
-            return max(0.0, first["start_beats"] - deficit / first["us_per_beat"])
-        return 0.0
+        return self.tempo_map.us_to_beat(us)
+
+    def beats_to_us_many(self, beats: Iterable[float]) -> array:
+        """Vectorized beat_to_us; cheapest when `beats` is sorted."""
+        return self.tempo_map.beats_to_us_many(beats)
 
+    def us_to_beats_many(self, us_values: Iterable[float]) -> array:
+        """Vectorized us_to_beat; cheapest when `us_values` is sorted."""
+        return self.tempo_map.us_to_beats_many(us_values)
 
 
 __all__ = [
     "Note",
+    "NoteStore",
     "TrackData",
     "MidiDoc",
+    "notes_in_range",
 ]
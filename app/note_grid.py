@@ -0,0 +1,115 @@
+"""Time x pitch bucket index for rectangle queries over a track's notes.
+
+This module provides:
+- NoteGrid: note indices bucketed by (time bucket, pitch)
+- grid_for: get (and cache on the NoteStore) the grid of one track
+
+A note is listed in every time bucket it touches on its own pitch row, so a
+rectangle query only looks at the cells under the rectangle. Buckets are a
+power of two ticks wide, at least the mean note length, which keeps most notes
+in one or two cells. Notes longer than _LONG_BUCKETS buckets are kept in a
+separate list that every query scans, instead of being copied into each
+bucket. When the rectangle covers more cells than half the candidate notes
+in its tick window (tall marquees over sparse rows), the query walks the
+NoteStore interval index instead, which is cheaper per note than per cell.
+
+Usage:
+    from app.note_grid import grid_for
+    grid = grid_for(td.notes, doc.ticks_per_beat)
+    for ni in grid.query(t0, t1, pitch_lo, pitch_hi):
+        ...
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+# Notes spanning more buckets than this go to the always-scanned long list
+_LONG_BUCKETS = 16
+
+
+class NoteGrid:
+    __slots__ = ("bucket_shift", "pitch_min", "pitch_max", "_notes", "_cells", "_long")
+
+    def __init__(self, notes, ticks_per_beat: int) -> None:
+        self._notes = notes
+        n = len(notes)
+        starts, ends, pitches = notes.start_tick, notes.end_tick, notes.pitch
+        mean = (sum(ends) - sum(starts)) / float(n) if n else 0.0
+        shift = 0
+        while (1 << shift) * 16 < max(1, int(ticks_per_beat or 480)) or (1 << shift) < mean:
+            shift += 1
+        self.bucket_shift = shift
+        self.pitch_min = min(pitches) if n else 0
+        self.pitch_max = max(pitches) if n else -1
+
+        # cells[(bucket << 7) | pitch] -> ascending note indices
+        cells: Dict[int, List[int]] = {}
+        long: List[int] = []
+        for ni in range(n):
+            s = starts[ni]
+            b0 = s >> shift
+            b1 = max(ends[ni] - 1, s) >> shift
+            if b1 - b0 >= _LONG_BUCKETS:
+                long.append(ni)
+                continue
+            p = pitches[ni]
+            for b in range(b0, b1 + 1):
+                key = (b << 7) | p
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = [ni]
+                else:
+                    cell.append(ni)
+        self._cells = cells
+        self._long = long
+
+    def query(self, t0: int, t1: int, pitch_lo: int, pitch_hi: int) -> List[int]:
+        """Ascending indices of notes with end_tick >= t0, start_tick <= t1 and
+        pitch in pitch_lo..pitch_hi."""
+        notes = self._notes
+        pitch_lo = max(pitch_lo, self.pitch_min)
+        pitch_hi = min(pitch_hi, self.pitch_max)
+        if pitch_hi < pitch_lo or t1 < t0:
+            return []
+        starts, ends, pitches = notes.start_tick, notes.end_tick, notes.pitch
+        shift = self.bucket_shift
+        b0, b1 = max(0, t0) >> shift, max(0, t1) >> shift
+
+        lo, hi = notes.candidate_span(t0, t1)
+        if (b1 - b0 + 1) * (pitch_hi - pitch_lo + 1) > (hi - lo) // 2:
+            # Few notes per cell under the rectangle: scanning the tick window is cheaper
+            return [ni for ni in notes.in_range(t0, t1) if pitch_lo <= pitches[ni] <= pitch_hi]
+
+        out: List[int] = []
+        cells = self._cells
+        for b in range(b0, b1 + 1):
+            base = b << 7
+            for p in range(pitch_lo, pitch_hi + 1):
+                cell = cells.get(base | p)
+                if cell is None:
+                    continue
+                for ni in cell:
+                    # A note sits in every bucket it touches: report it from the first one queried
+                    if (starts[ni] >> shift) < b and b != b0:
+                        continue
+                    if ends[ni] >= t0 and starts[ni] <= t1:
+                        out.append(ni)
+        for ni in self._long:
+            if ends[ni] >= t0 and starts[ni] <= t1 and pitch_lo <= pitches[ni] <= pitch_hi:
+                out.append(ni)
+        out.sort()
+        return out
+
+
+def grid_for(notes, ticks_per_beat: int) -> NoteGrid:
+    """Grid of a NoteStore, built on first use and cached on the store."""
+    grid = notes._grid
+    if grid is None:
+        grid = notes._grid = NoteGrid(notes, ticks_per_beat)
+    return grid
+
+
+__all__ = [
+    "NoteGrid",
+    "grid_for",
+]
@@ -0,0 +1,80 @@
+"""Whole-song note density for the overview strip.
+
+This module provides:
+- SongOverview: notes sounding per (track, time column) over the whole song,
+                plus an RGBA image of it
+
+The song is split into `columns` equal tick spans; each track row counts the
+notes touching each column (a difference array per track, O(notes)).
+MidiDoc.overview builds one per document version; tracks of a lazy document
+that are not decoded yet stay empty until they are (`key` includes the decoded
+track count), and rebuilding from the previous overview only recounts tracks
+whose notes changed.
+
+Usage:
+    from app.overview import SongOverview
+    ov = SongOverview(doc)
+    pixels = ov.rgba((0.27, 0.58, 0.98))   # columns x len(doc.tracks), row 0 = track 0
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+OVERVIEW_COLUMNS = 1024
+
+
+class SongOverview:
+    __slots__ = ("columns", "total_ticks", "rows", "peak", "key", "_sources")
+
+    def __init__(self, doc, columns: int = OVERVIEW_COLUMNS,
+                 previous: Optional["SongOverview"] = None) -> None:
+        """previous: an older overview of the same song; rows of tracks whose
+        NoteStore is unchanged (reload, lazy decode of other tracks) are reused."""
+        self.columns = int(columns)
+        self.total_ticks = max(1, int(doc.total_ticks))
+        self.key = (doc.version, doc.loaded_track_count)
+        self.rows: List[array] = []
+        self._sources: List[object] = []
+        reuse: Dict[int, array] = {}
+        if previous is not None and (previous.columns, previous.total_ticks) == (self.columns, self.total_ticks):
+            reuse = {id(src): row for src, row in zip(previous._sources, previous.rows) if src is not None}
+        for td in doc.tracks:
+            notes = td.notes if td.loaded and td.has_notes else None
+            row = reuse.get(id(notes)) if notes is not None else None
+            if row is None:
+                row = self._row(notes)
+            self.rows.append(row)
+            self._sources.append(notes)
+        self.peak = max((max(row) for row in self.rows), default=0)
+
+    def _row(self, notes) -> array:
+        columns, total = self.columns, self.total_ticks
+        diff = array("i", bytes(4 * (columns + 1)))
+        if notes is not None:
+            last = columns - 1
+            for s, e in zip(notes.start_tick, notes.end_tick):
+                diff[min(last, s * columns // total)] += 1
+                diff[min(last, max(s, e - 1) * columns // total) + 1] -= 1
+        return array("i", accumulate(diff[:columns]))
+
+    def rgba(self, color: Tuple[float, float, float]) -> bytes:
+        """RGBA8 pixels, one row per track; alpha grows with the square root of
+        the density so sparse passages stay visible next to dense ones."""
+        w = self.columns
+        peak = max(1, self.peak)
+        lut = bytes(int(round(255.0 * math.sqrt(c / peak))) for c in range(peak + 1))
+        rgb = bytes(int(round(255.0 * max(0.0, min(1.0, v)))) for v in color)
+        out = bytearray(rgb + b"\x00") * (w * len(self.rows))
+        for ri, row in enumerate(self.rows):
+            base = ri * w * 4
+            out[base + 3:base + 4 * w:4] = bytes(map(lut.__getitem__, row))
+        return bytes(out)
+
+
+__all__ = [
+    "OVERVIEW_COLUMNS",
+    "SongOverview",
+]
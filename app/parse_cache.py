@@ -0,0 +1,247 @@
+"""Persistent on-disk cache of parsed MIDI documents.
+
+This module provides:
+- ParseCache:        binary cache of MidiDoc parse results with an LRU size cap
+- default_cache_dir: per-user cache location (override with MIDI2FUR_CACHE_DIR)
+
+Entries are keyed by absolute path and validated against file size, mtime
+and a BLAKE2 digest of the content. An entry is a small JSON header followed
+by the raw NoteStore columns of every track; on a hit the file is mmap'ed and
+the columns are exposed as memoryview casts, so nothing is decoded or copied.
+
+Usage:
+    from app.parse_cache import ParseCache
+    cache = ParseCache()
+    doc.load(path, cache=cache)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Optional, Tuple
+
+from app.tempo_map import TempoMap
+
+_MAGIC = b"M2FC"
+_VERSION = 2
+_SUFFIX = ".m2fc"
+_HEADER = struct.Struct("<4sII")  # magic, version, meta length
+# (attribute, array typecode) in on-disk order; 8-byte columns first keeps them aligned
+_COLUMNS = (
+    ("start_tick", "q"), ("end_tick", "q"), ("start_beats", "d"), ("end_beats", "d"),
+    ("pitch", "B"), ("velocity", "B"), ("channel", "B"),
+)
+_TEMPO_COLUMNS = (
+    ("start_tick", "q"), ("end_tick", "q"), ("start_beats", "d"), ("end_beats", "d"),
+    ("us_per_beat", "d"), ("start_us", "d"), ("end_us", "d"),
+)
+
+
+def default_cache_dir() -> str:
+    env = os.environ.get("MIDI2FUR_CACHE_DIR")
+    if env:
+        return env
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "midi2furnace", "parse")
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class ParseCache:
+    """Directory of cached parse results, capped at `max_bytes` (LRU by mtime)."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = int(max_bytes)
+
+    def _entry_path(self, path: str) -> str:
+        key = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    # -------- Lookup --------
+    def restore(self, doc, path: str) -> bool:
+        """Fill `doc` from the cache. Returns False on a miss or a stale entry."""
+        entry = self._entry_path(path)
+        try:
+            st = os.stat(path)
+            with open(entry, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            magic, version, meta_len = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _VERSION:
+                return False
+            meta = json.loads(mm[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+            if meta["size"] != st.st_size or meta["mtime_ns"] != st.st_mtime_ns:
+                return False
+            if meta["digest"] != _file_digest(path):
+                return False
+            self._apply(doc, path, meta, memoryview(mm), _align8(_HEADER.size + meta_len))
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            print(f"[Cache] Ignoring unreadable entry for {path}: {e}")
+            return False
+        try:
+            os.utime(entry)  # LRU touch
+        except OSError:
+            pass
+        return True
+
+    @staticmethod
+    def _apply(doc, path: str, meta: dict, view: memoryview, offset: int) -> None:
+        from app.beat_grid import BeatGrid
+        from app.midi_doc import NoteStore, TrackData
+
+        tracks: List[TrackData] = []
+        for t in meta["tracks"]:
+            td = TrackData(name=t["name"])
+            td.pitch_min = int(t["pitch_min"])
+            td.pitch_max = int(t["pitch_max"])
+            store = NoteStore()
+            count = int(t["count"])
+            for attr, code in _COLUMNS:
+                nbytes = count * struct.calcsize(code)
+                setattr(store, attr, view[offset:offset + nbytes].cast(code))
+                offset = _align8(offset + nbytes)
+            td.notes = store
+            tracks.append(td)
+
+        doc.path = path
+        doc.ticks_per_beat = int(meta["ticks_per_beat"])
+        doc.tracks = tracks
+        doc.total_ticks = int(meta["total_ticks"])
+        doc.ts_changes = [tuple(c) for c in meta["ts_changes"]]
+        doc.ts_segments = meta["ts_segments"]
+        doc.beat_grid = BeatGrid(doc.ts_segments)
+        doc.time_sig_num, doc.time_sig_den = meta["time_sig"]
+        tm = TempoMap(doc.tempo_bpm_default)
+        for attr, code in _TEMPO_COLUMNS:
+            setattr(tm, attr, array(code, meta["tempo_map"][attr]))
+        doc.tempo_map = tm
+        doc.tempo_bpm = float(meta["tempo_bpm"])
+
+    # -------- Store --------
+    def store(self, doc) -> None:
+        """Write `doc` (freshly loaded from doc.path) to the cache, then enforce the size cap."""
+        path = doc.path
+        try:
+            st = os.stat(path)
+            digest = _file_digest(path)
+        except OSError:
+            return
+
+        meta = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "digest": digest,
+            "ticks_per_beat": doc.ticks_per_beat,
+            "total_ticks": doc.total_ticks,
+            "ts_changes": doc.ts_changes,
+            "ts_segments": doc.ts_segments,
+            "time_sig": [doc.time_sig_num, doc.time_sig_den],
+            "tempo_map": {attr: getattr(doc.tempo_map, attr).tolist() for attr, _code in _TEMPO_COLUMNS},
+            "tempo_bpm": doc.tempo_bpm,
+            "tracks": [
+                {"name": td.name, "pitch_min": td.pitch_min, "pitch_max": td.pitch_max, "count": len(td.notes)}
+                for td in doc.tracks
+            ],
+        }
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+        entry = self._entry_path(path)
+        tmp = entry + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, len(meta_bytes)))
+                f.write(meta_bytes)
+                pos = _HEADER.size + len(meta_bytes)
+                for td in doc.tracks:
+                    for attr, _code in _COLUMNS:
+                        f.write(b"\0" * (_align8(pos) - pos))
+                        pos = _align8(pos)
+                        blob = getattr(td.notes, attr).tobytes()
+                        f.write(blob)
+                        pos += len(blob)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"[Cache] Store failed: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.evict(keep=entry)
+
+    # -------- Maintenance --------
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        out: List[Tuple[float, int, str]] = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return out
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            p = os.path.join(self.directory, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass  # still mapped by an open document (Windows)
+
+    def clear(self) -> int:
+        """Remove every entry. Returns the number of files deleted."""
+        removed = 0
+        for _, _, p in self._entries():
+            try:
+                os.remove(p)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+__all__ = [
+    "ParseCache",
+    "default_cache_dir",
+]
@@ -0,0 +1,128 @@
+"""Frame-time profiler for the main loop.
+
+This module provides:
+- FrameProfiler: per-stage frame timings (perf_counter_ns) and per-frame
+                 counters with a rolling history
+
+The loop calls begin_frame(), then mark(stage) after each stage (the time
+since the previous mark is charged to that stage), and end_frame(). Drawing
+code adds counters with count(). While `enabled` is off every call returns
+after one attribute test, so the hidden profiler costs next to nothing.
+
+Usage:
+    from app.profiler import FrameProfiler
+    prof = FrameProfiler()
+    prof.enabled = True
+    prof.begin_frame()
+    update_playback(state); prof.mark("playback")
+    draw_timeline_canvas(state); prof.mark("timeline")
+    prof.end_frame()
+    avg, p95, worst = prof.stage_stats("timeline")   # milliseconds
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+
+def _summary(values) -> Tuple[float, float, float]:
+    """(mean, 95th percentile, max) of a non-empty sequence."""
+    ordered = sorted(values)
+    n = len(ordered)
+    return sum(ordered) / n, ordered[min(n - 1, int(0.95 * n))], ordered[-1]
+
+
+class FrameProfiler:
+    def __init__(self, history: int = 240) -> None:
+        self.enabled: bool = False
+        self.history = int(history)
+        self.stages: List[str] = []          # in order of first appearance
+        self._times: Dict[str, Deque[float]] = {}
+        self._frames: Deque[float] = deque(maxlen=self.history)
+        self._counters: Dict[str, Deque[int]] = {}
+        self.last_counts: Dict[str, int] = {}
+        self._active = False
+        self._t0 = 0
+        self._t = 0
+        self._cur: Dict[str, int] = {}
+        self._cur_counts: Dict[str, int] = {}
+
+    # -------- Recording --------
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._active = True
+        self._t0 = self._t = time.perf_counter_ns()
+        self._cur = {}
+        self._cur_counts = {}
+
+    def mark(self, stage: str) -> None:
+        if not self._active:
+            return
+        now = time.perf_counter_ns()
+        self._cur[stage] = self._cur.get(stage, 0) + (now - self._t)
+        self._t = now
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self._active:
+            return
+        self._cur_counts[name] = self._cur_counts.get(name, 0) + n
+
+    def discard_frame(self) -> None:
+        """Forget a frame that was started but not drawn."""
+        self._active = False
+
+    def end_frame(self) -> None:
+        if not self._active:
+            return
+        self._active = False
+        total = time.perf_counter_ns() - self._t0
+        self._frames.append(total / 1e6)
+        for stage, ns in self._cur.items():
+            ring = self._times.get(stage)
+            if ring is None:
+                ring = self._times[stage] = deque(maxlen=self.history)
+                self.stages.append(stage)
+            ring.append(ns / 1e6)
+        for name in set(self._counters) | set(self._cur_counts):
+            ring = self._counters.get(name)
+            if ring is None:
+                ring = self._counters[name] = deque(maxlen=self.history)
+            ring.append(self._cur_counts.get(name, 0))
+        self.last_counts = self._cur_counts
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self._times.clear()
+        self._frames.clear()
+        self._counters.clear()
+        self.last_counts = {}
+
+    # -------- Reporting --------
+    @property
+    def frame_count(self) -> int:
+        return len(self._frames)
+
+    def frame_stats(self) -> Tuple[float, float, float]:
+        """(avg, p95, worst) frame time in ms over the history (zeros when empty)."""
+        return _summary(self._frames) if self._frames else (0.0, 0.0, 0.0)
+
+    def stage_stats(self, stage: str) -> Tuple[float, float, float]:
+        ring = self._times.get(stage)
+        return _summary(ring) if ring else (0.0, 0.0, 0.0)
+
+    def frame_history(self) -> array:
+        """Frame times in ms, oldest first (for a sparkline)."""
+        return array("f", self._frames)
+
+    def counters(self) -> List[Tuple[str, int, float]]:
+        """(name, last frame value, average over the history), sorted by name."""
+        return [(name, self.last_counts.get(name, 0), sum(ring) / len(ring))
+                for name, ring in sorted(self._counters.items()) if ring]
+
+
+__all__ = [
+    "FrameProfiler",
+]
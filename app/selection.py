@@ -0,0 +1,170 @@
+"""Note selection model.
+
+This module provides:
+- Selection: per-track byte masks over note indices with cached aggregates
+
+Each track with selected notes has a bytearray mask (1 = selected) parallel to
+its NoteStore columns, so membership is one index operation and select-all is
+a single allocation. The count, the per-track counts and the beat bounds are
+maintained as notes are added; `version` increases on every change so views
+can cache anything derived from the selection.
+
+Usage:
+    from app.selection import Selection
+    sel = Selection()
+    sel.bind(doc)
+    sel.add_many(0, [3, 4, 5])
+    if sel.contains(0, 4): ...
+    lo, hi = sel.bounds          # beats, or None when empty
+    for ti in sel.tracks:
+        for ni in sel.indices(ti): ...
+"""
+from __future__ import annotations
+
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class Selection:
+    def __init__(self) -> None:
+        self._doc = None
+        self._masks: Dict[int, bytearray] = {}
+        self._counts: Dict[int, int] = {}
+        self.count: int = 0
+        self.version: int = 0
+        self._lo = float("inf")
+        self._hi = float("-inf")
+        self._bounds_stale = False
+
+    # -------- Lifecycle --------
+    def bind(self, doc) -> None:
+        """Attach to a (new) document; clears the selection."""
+        self._doc = doc
+        self._reset()
+
+    def clear(self) -> None:
+        if self.count:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._masks.clear()
+        self._counts.clear()
+        self.count = 0
+        self._lo = float("inf")
+        self._hi = float("-inf")
+        self._bounds_stale = False
+        self.version += 1
+
+    def remap(self, mapping: Dict[int, int]) -> None:
+        """Move masks to new track indices after MidiDoc.reload(); unmapped tracks drop out."""
+        masks = {mapping[ti]: m for ti, m in self._masks.items() if ti in mapping}
+        counts = {mapping[ti]: c for ti, c in self._counts.items() if ti in mapping}
+        self._masks = masks
+        self._counts = counts
+        self.count = sum(counts.values())
+        self._bounds_stale = True
+        self.version += 1
+
+    # -------- Mutation --------
+    def _mask(self, ti: int) -> bytearray:
+        m = self._masks.get(ti)
+        if m is None:
+            m = self._masks[ti] = bytearray(len(self._doc.track_notes(ti)))
+            self._counts[ti] = 0
+        return m
+
+    def add(self, ti: int, ni: int) -> None:
+        self.add_many(ti, (ni,))
+
+    def add_many(self, ti: int, indices: Iterable[int]) -> None:
+        m = self._mask(ti)
+        notes = self._doc.track_notes(ti)
+        sb, eb = notes.start_beats, notes.end_beats
+        lo, hi = self._lo, self._hi
+        added = 0
+        for ni in indices:
+            if m[ni]:
+                continue
+            m[ni] = 1
+            added += 1
+            if sb[ni] < lo:
+                lo = sb[ni]
+            if eb[ni] > hi:
+                hi = eb[ni]
+        if added:
+            self._counts[ti] += added
+            self.count += added
+            self._lo, self._hi = lo, hi
+            self.version += 1
+
+    def select_track(self, ti: int) -> None:
+        """Select every note of one track."""
+        notes = self._doc.track_notes(ti)
+        n = len(notes)
+        if not n or self._counts.get(ti) == n:
+            return
+        m = self._mask(ti)
+        m[:] = b"\x01" * n
+        self.count += n - self._counts[ti]
+        self._counts[ti] = n
+        self._lo = min(self._lo, notes.start_beats[0])  # columns are sorted by start
+        self._hi = max(self._hi, max(notes.end_beats))
+        self.version += 1
+
+    def select_all(self) -> None:
+        for ti in range(len(self._doc.tracks)):
+            self.select_track(ti)
+
+    # -------- Queries --------
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def contains(self, ti: int, ni: int) -> bool:
+        m = self._masks.get(ti)
+        return m is not None and m[ni] == 1
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return self.contains(key[0], key[1])
+
+    def mask(self, ti: int) -> Optional[bytearray]:
+        """Selection mask of one track (do not modify), or None when nothing is selected there."""
+        return self._masks.get(ti) if self._counts.get(ti) else None
+
+    @property
+    def tracks(self) -> List[int]:
+        """Sorted indices of tracks with at least one selected note."""
+        return sorted(ti for ti, c in self._counts.items() if c)
+
+    def indices(self, ti: int) -> List[int]:
+        """Selected note indices of one track, ascending."""
+        m = self.mask(ti)
+        return list(compress(range(len(m)), m)) if m is not None else []
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for ti in self.tracks:
+            for ni in self.indices(ti):
+                yield ti, ni
+
+    @property
+    def bounds(self) -> Optional[Tuple[float, float]]:
+        """(first start, last end) of the selection in beats, or None when empty."""
+        if not self.count:
+            return None
+        if self._bounds_stale:
+            lo, hi = float("inf"), float("-inf")
+            for ti in self.tracks:
+                notes = self._doc.track_notes(ti)
+                m = self._masks[ti]
+                lo = min(lo, min(compress(notes.start_beats, m)))
+                hi = max(hi, max(compress(notes.end_beats, m)))
+            self._lo, self._hi = lo, hi
+            self._bounds_stale = False
+        return self._lo, self._hi
+
+
+__all__ = [
+    "Selection",
+]
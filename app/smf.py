@@ -0,0 +1,373 @@
+"""Native Standard MIDI File reader.
+
+This module provides:
+- SmfError:     raised for malformed files
+- SmfHeader:    MThd fields plus the byte ranges of every MTrk chunk
+- SmfTrack:     one decoded track (paired notes, names, tempo and TS events)
+- read_header:  locate the MThd header and the MTrk chunks in a buffer
+- decode_track: decode one MTrk chunk in a single pass
+- scan_track:   metadata-only skim of one MTrk chunk (no note pairing)
+- parse_smf:    header + all tracks
+- decode_tracks_parallel: decode MTrk chunks of a file in a process pool
+
+The reader works directly on any indexable byte buffer (bytes, memoryview,
+mmap) and never builds per-event objects: running status, VLQ deltas, meta
+and sysex events are handled inline and only the data MidiDoc needs is kept.
+
+Usage:
+    from app.smf import parse_smf
+    with open("song.mid", "rb") as f:
+        header, tracks = parse_smf(f.read())
+"""
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Data-byte counts for system common messages (0xF1..0xFE, minus sysex/meta)
+_SYSTEM_DATA_LEN = {0xF1: 1, 0xF2: 2, 0xF3: 1}
+
+# decode_track/scan_track call their progress hook about this often (bytes)
+PROGRESS_BYTES = 64 * 1024
+
+
+class SmfError(ValueError):
+    """Malformed or unsupported Standard MIDI File data."""
+
+
+class SmfHeader:
+    __slots__ = ("format", "num_tracks", "ticks_per_beat", "chunks")
+
+    def __init__(self, format: int, num_tracks: int, ticks_per_beat: int, chunks: List[Tuple[int, int]]):
+        self.format = int(format)
+        self.num_tracks = int(num_tracks)
+        self.ticks_per_beat = int(ticks_per_beat)
+        # (start, end) byte offsets of each MTrk payload, in file order
+        self.chunks = chunks
+
+
+class SmfTrack:
+    """Result of decoding one MTrk chunk.
+
+    notes:        closed notes as (start_tick, end_tick, pitch, velocity, channel),
+                  in note-off order
+    dangling:     notes still held at end of track as (start_tick, pitch, velocity, channel)
+    ts_changes:   (abs_tick, numerator, denominator)
+    tempo_events: (abs_tick, us_per_beat)
+    end_tick:     absolute tick of the last event in the chunk
+    """
+    __slots__ = ("name", "notes", "dangling", "ts_changes", "tempo_events", "end_tick")
+
+    def __init__(self) -> None:
+        self.name: Optional[str] = None
+        self.notes: List[Tuple[int, int, int, int, int]] = []
+        self.dangling: List[Tuple[int, int, int, int]] = []
+        self.ts_changes: List[Tuple[int, int, int]] = []
+        self.tempo_events: List[Tuple[int, int]] = []
+        self.end_tick: int = 0
+
+
+def _u32(buf, pos: int) -> int:
+    return (buf[pos] << 24) | (buf[pos + 1] << 16) | (buf[pos + 2] << 8) | buf[pos + 3]
+
+
+def read_header(buf) -> SmfHeader:
+    """Parse MThd and index the MTrk chunks that follow it.
+
+    Unknown chunk types are skipped; at most `num_tracks` MTrk chunks are indexed.
+    """
+    size = len(buf)
+    if size < 14 or bytes(buf[0:4]) != b"MThd":
+        raise SmfError("not a Standard MIDI File (missing MThd)")
+    hdr_len = _u32(buf, 4)
+    if hdr_len < 6 or 8 + hdr_len > size:
+        raise SmfError("truncated MThd header")
+    fmt = (buf[8] << 8) | buf[9]
+    ntrks = (buf[10] << 8) | buf[11]
+    division = (buf[12] << 8) | buf[13]
+
+    chunks: List[Tuple[int, int]] = []
+    pos = 8 + hdr_len
+    while pos + 8 <= size and len(chunks) < ntrks:
+        tag = bytes(buf[pos:pos + 4])
+        length = _u32(buf, pos + 4)
+        start = pos + 8
+        end = start + length
+        if end > size:
+            # Truncated last chunk: decode what is there
+            end = size
+        if tag == b"MTrk":
+            chunks.append((start, end))
+        pos = end
+
+    return SmfHeader(fmt, ntrks, division, chunks)
+
+
+def decode_track(buf, start: int, end: int, progress: Optional[Callable[[int], None]] = None) -> SmfTrack:
+    """Decode one MTrk payload buf[start:end] and pair note-on/note-off events.
+
+    Pairing follows the mido-based loader: a note-on for an already held
+    (pitch, channel) restarts it, note-on with velocity 0 is a note-off, and
+    zero-length notes are dropped.
+
+    progress(pos) is called with the current offset in buf every
+    PROGRESS_BYTES or so, so a single huge track (format 0) still reports
+    progress; an exception raised from it aborts the decode.
+    """
+    out = SmfTrack()
+    notes = out.notes
+    append_note = notes.append
+    # key: channel << 7 | pitch -> (start_tick, velocity)
+    active: Dict[int, Tuple[int, int]] = {}
+    name: Optional[str] = None
+
+    pos = start
+    abs_tick = 0
+    status = 0
+    step = PROGRESS_BYTES if progress is not None else end - start
+    while pos < end:
+        # Events may run a little past the window; the next one picks up there
+        window_end = min(end, pos + step)
+        while pos < window_end:
+            # VLQ delta time
+            b = buf[pos]; pos += 1
+            delta = b & 0x7F
+            while b & 0x80:
+                b = buf[pos]; pos += 1
+                delta = (delta << 7) | (b & 0x7F)
+            abs_tick += delta
+
+            b = buf[pos]
+            if b & 0x80:
+                pos += 1
+                if b < 0xF0:
+                    status = b
+                elif b == 0xFF:
+                    # Meta event: type, VLQ length, data. Does not touch running status.
+                    mtype = buf[pos]; pos += 1
+                    c = buf[pos]; pos += 1
+                    mlen = c & 0x7F
+                    while c & 0x80:
+                        c = buf[pos]; pos += 1
+                        mlen = (mlen << 7) | (c & 0x7F)
+                    if mtype == 0x03:
+                        if name is None:
+                            name = bytes(buf[pos:pos + mlen]).decode("latin-1")
+                    elif mtype == 0x51:
+                        if mlen >= 3:
+                            out.tempo_events.append((abs_tick, (buf[pos] << 16) | (buf[pos + 1] << 8) | buf[pos + 2]))
+                    elif mtype == 0x58:
+                        if mlen >= 2:
+                            num = buf[pos] or 4
+                            den = (1 << buf[pos + 1]) or 4
+                            out.ts_changes.append((abs_tick, num, den))
+                    pos += mlen
+                    continue
+                elif b == 0xF0 or b == 0xF7:
+                    # Sysex: VLQ length + payload; cancels running status
+                    c = buf[pos]; pos += 1
+                    slen = c & 0x7F
+                    while c & 0x80:
+                        c = buf[pos]; pos += 1
+                        slen = (slen << 7) | (c & 0x7F)
+                    pos += slen
+                    status = 0
+                    continue
+                else:
+                    pos += _SYSTEM_DATA_LEN.get(b, 0)
+                    status = 0
+                    continue
+            elif not status:
+                raise SmfError(f"running status without a previous status byte at offset {pos}")
+
+            kind = status & 0xF0
+            if kind == 0xC0 or kind == 0xD0:
+                pos += 1
+                continue
+            d1 = buf[pos] & 0x7F
+            d2 = buf[pos + 1] & 0x7F
+            pos += 2
+            if kind == 0x90 and d2 > 0:
+                active[((status & 0x0F) << 7) | d1] = (abs_tick, d2)
+            elif kind == 0x80 or kind == 0x90:
+                key = ((status & 0x0F) << 7) | d1
+                held = active.pop(key, None)
+                if held is not None and abs_tick > held[0]:
+                    append_note((held[0], abs_tick, d1, held[1], status & 0x0F))
+        if progress is not None and pos < end:
+            progress(pos)
+
+    out.name = name
+    out.end_tick = abs_tick
+    out.dangling = [(st, key & 0x7F, vel, key >> 7) for key, (st, vel) in active.items()]
+    return out
+
+
+class SmfTrackInfo:
+    """Result of skimming one MTrk chunk without pairing notes.
+
+    pitch_min/pitch_max cover every note-on with velocity > 0 (127/0 when
+    there are none); has_notes is True if any such note-on was seen.
+    """
+    __slots__ = ("name", "ts_changes", "tempo_events", "end_tick", "has_notes", "pitch_min", "pitch_max")
+
+    def __init__(self) -> None:
+        self.name: Optional[str] = None
+        self.ts_changes: List[Tuple[int, int, int]] = []
+        self.tempo_events: List[Tuple[int, int]] = []
+        self.end_tick: int = 0
+        self.has_notes: bool = False
+        self.pitch_min: int = 127
+        self.pitch_max: int = 0
+
+
+def scan_track(buf, start: int, end: int, progress: Optional[Callable[[int], None]] = None) -> SmfTrackInfo:
+    """Walk one MTrk payload collecting only names, TS, tempo, end tick and pitch bounds.
+
+    progress: as for decode_track.
+    """
+    out = SmfTrackInfo()
+    name: Optional[str] = None
+    pmin, pmax = 127, 0
+
+    pos = start
+    abs_tick = 0
+    status = 0
+    step = PROGRESS_BYTES if progress is not None else end - start
+    while pos < end:
+        # Events may run a little past the window; the next one picks up there
+        window_end = min(end, pos + step)
+        while pos < window_end:
+            b = buf[pos]; pos += 1
+            delta = b & 0x7F
+            while b & 0x80:
+                b = buf[pos]; pos += 1
+                delta = (delta << 7) | (b & 0x7F)
+            abs_tick += delta
+
+            b = buf[pos]
+            if b & 0x80:
+                pos += 1
+                if b < 0xF0:
+                    status = b
+                elif b == 0xFF:
+                    mtype = buf[pos]; pos += 1
+                    c = buf[pos]; pos += 1
+                    mlen = c & 0x7F
+                    while c & 0x80:
+                        c = buf[pos]; pos += 1
+                        mlen = (mlen << 7) | (c & 0x7F)
+                    if mtype == 0x03:
+                        if name is None:
+                            name = bytes(buf[pos:pos + mlen]).decode("latin-1")
+                    elif mtype == 0x51:
+                        if mlen >= 3:
+                            out.tempo_events.append((abs_tick, (buf[pos] << 16) | (buf[pos + 1] << 8) | buf[pos + 2]))
+                    elif mtype == 0x58:
+                        if mlen >= 2:
+                            out.ts_changes.append((abs_tick, buf[pos] or 4, (1 << buf[pos + 1]) or 4))
+                    pos += mlen
+                    continue
+                elif b == 0xF0 or b == 0xF7:
+                    c = buf[pos]; pos += 1
+                    slen = c & 0x7F
+                    while c & 0x80:
+                        c = buf[pos]; pos += 1
+                        slen = (slen << 7) | (c & 0x7F)
+                    pos += slen
+                    status = 0
+                    continue
+                else:
+                    pos += _SYSTEM_DATA_LEN.get(b, 0)
+                    status = 0
+                    continue
+            elif not status:
+                raise SmfError(f"running status without a previous status byte at offset {pos}")
+
+            kind = status & 0xF0
+            if kind == 0xC0 or kind == 0xD0:
+                pos += 1
+            elif kind == 0x90 and buf[pos + 1] & 0x7F:
+                p = buf[pos] & 0x7F
+                if p < pmin:
+                    pmin = p
+                if p > pmax:
+                    pmax = p
+                pos += 2
+            else:
+                pos += 2
+        if progress is not None and pos < end:
+            progress(pos)
+
+    out.name = name
+    out.end_tick = abs_tick
+    out.has_notes = pmin <= pmax
+    out.pitch_min, out.pitch_max = pmin, pmax
+    return out
+
+
+def parse_smf(buf) -> Tuple[SmfHeader, List[SmfTrack]]:
+    """Decode every MTrk chunk of an in-memory SMF."""
+    header = read_header(buf)
+    try:
+        tracks = [decode_track(buf, s, e) for (s, e) in header.chunks]
+    except IndexError:
+        raise SmfError("unexpected end of track data") from None
+    return header, tracks
+
+
+def _decode_file_chunk(path: str, start: int, end: int) -> SmfTrack:
+    """Process-pool worker: read one MTrk payload from disk and decode it."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        return decode_track(data, 0, len(data))
+    except IndexError:
+        raise SmfError("unexpected end of track data") from None
+
+
+def decode_tracks_parallel(path: str, chunks: List[Tuple[int, int]],
+                           max_workers: Optional[int] = None,
+                           progress: Optional[Callable[[int], None]] = None) -> List[SmfTrack]:
+    """Decode MTrk chunks of `path` across worker processes.
+
+    Each worker reads only its own chunk, so nothing large is pickled on the
+    way in. Chunks are submitted largest first to keep the pool busy; results
+    come back in file order. `progress(chunk_bytes)` is called as each chunk
+    finishes; if it raises, pending chunks are cancelled and the error propagates.
+
+    Workers are spawned, never forked: this runs on the loader thread of a
+    process that also has SDL, GL and file-watcher threads, and a forked child
+    could inherit a lock held by one of them. Workers only need the path and
+    chunk offsets.
+    """
+    order = sorted(range(len(chunks)), key=lambda i: chunks[i][0] - chunks[i][1])
+    results: List[Optional[SmfTrack]] = [None] * len(chunks)
+    ex = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {ex.submit(_decode_file_chunk, path, *chunks[i]): i for i in order}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = fut.result()
+            if progress is not None:
+                progress(chunks[i][1] - chunks[i][0])
+    except BaseException:
+        ex.shutdown(wait=False, cancel_futures=True)
+        raise
+    ex.shutdown()
+    return results  # type: ignore[return-value]
+
+
+__all__ = [
+    "SmfError",
+    "SmfHeader",
+    "SmfTrack",
+    "read_header",
+    "decode_track",
+    "SmfTrackInfo",
+    "scan_track",
+    "parse_smf",
+    "decode_tracks_parallel",
+]
@@ -8,10 +8,17 @@ Usage:
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Tuple, Set
+from typing import Dict, List, Optional, Tuple
 import math
 
+from app.frame_pacer import FramePacer
+from app.loader import LoadJob
 from app.midi_doc import MidiDoc, TrackData
+from app.parse_cache import ParseCache
+from app.profiler import FrameProfiler
+from app.selection import Selection
+from app.watch import FileWatcher
+from tracker.export import ExportCache
 from tracker.types import FurnaceConfig
 
 # ----------------- Helpers -----------------
@@ -29,15 +36,8 @@ def tick_to_beats(ticks: int, tpq: int) -> float:
 
 
 def compute_track_pitch_bounds(state: "AppState") -> tuple[bool, int, int]:
-    has_notes = False
-    gmin, gmax = 127, 0
-    for td in state.midi.tracks:
-        if not td.notes:
-            continue
-        has_notes = True
-        gmin = min(gmin, td.pitch_min)
-        gmax = max(gmax, td.pitch_max)
-    return has_notes, gmin, gmax
+    st = state.midi.stats
+    return st.has_notes, st.pitch_min, st.pitch_max
 
 
 def center_track_pitch_scroll(state: "AppState", td: TrackData) -> None:
@@ -63,13 +63,7 @@ def zoom_to_fit_time(state: "AppState") -> None:
 
 def zoom_to_fit_vertical(state: "AppState") -> None:
     """Fit the largest pitch range across all tracks into a single track height."""
-    largest_range = 0
-    for td in state.midi.tracks:
-        if not td.notes:
-            continue
-        prange = (td.pitch_max - td.pitch_min + 1)
-        largest_range = max(largest_range, prange)
-
+    largest_range = state.midi.stats.largest_track_range
     if largest_range <= 0:
         return
 
@@ -115,6 +109,8 @@ class AppState:
     track_height: int = 120
     note_height: int = 8
     ruler_h: int = 28
+    minimap_h: int = 40
+    show_minimap: bool = True
     track_header_w: int = 160
 
     # Global scroll (canvas space, pixels)
@@ -127,18 +123,35 @@ class AppState:
     pan_scroll_anchor: Tuple[float, float] = (0.0, 0.0)
 
     # Selection / marquee
-    selected_notes: Set[Tuple[int, int]] = field(default_factory=set)
+    selection: Selection = field(default_factory=Selection)
     marquee_active: bool = False
     marquee_start: Tuple[float, float] = (0.0, 0.0)
     marquee_end: Tuple[float, float] = (0.0, 0.0)
+    marquee_hits: Dict[int, List[int]] = field(default_factory=dict)   # live hits of the current drag
 
     # Custom vertical scrollbar drag state
     vsb_dragging: bool = False
     vsb_anchor_mouse_y: float = 0.0
     vsb_anchor_scroll_y: float = 0.0
 
+    # Overview strip drag state
+    minimap_dragging: bool = False
+    minimap_anchor: Tuple[float, float] = (0.0, 0.0)   # grab point relative to the viewport centre
+
     # MIDI
     midi: MidiDoc = field(default_factory=MidiDoc)
+    parallel_load: bool = False   # decode big multi-track files in a process pool
+    lazy_load: bool = False       # decode track notes on first use (huge files)
+    use_parse_cache: bool = True
+    parse_cache: ParseCache = field(default_factory=ParseCache)
+    load_job: Optional[LoadJob] = None   # background open in progress
+    watch_file: bool = True              # reload the open file when it changes on disk
+    file_watcher: Optional[FileWatcher] = None
+
+    # Rendering
+    gpu_notes: bool = True   # draw notes through the GL note layer (falls back to imgui)
+    frame_pacer: FramePacer = field(default_factory=FramePacer)   # idle throttling + fps/CPU stats
+    profiler: FrameProfiler = field(default_factory=FrameProfiler)   # View -> Diagnostics
 
     # Window/canvas cache
     window_size: Tuple[int, int] = (1280, 720)
@@ -166,9 +179,14 @@ class AppState:
 
     show_tracker_settings = True
     tracker_cfg = FurnaceConfig()
+    export_cache: ExportCache = field(default_factory=ExportCache)   # memoized preview/copy text
+    preview_pattern_rows: int = 64   # Furnace pattern length marked in the export preview
 
     pending_export_popup: str | None = None
-    
+
+    def __post_init__(self) -> None:
+        self.selection.bind(self.midi)
+
 __all__ = [
     "AppState",
     "clamp",
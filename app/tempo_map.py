@@ -0,0 +1,197 @@
+"""Tempo map: beats <-> microseconds conversion.
+
+This module provides:
+- TempoMap: piecewise-constant tempo segments stored as sorted parallel arrays,
+            with O(log n) scalar lookups and batch conversions
+
+Usage:
+    from app.tempo_map import TempoMap
+    tm = TempoMap.build([(0, 500_000), (1920, 400_000)], ticks_per_beat=480, total_beats=64.0)
+    us = tm.beat_to_us(12.5)
+    us_list = tm.beats_to_us_many(beat_array)
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+
+class TempoMap:
+    """Contiguous tempo segments as parallel arrays, sorted by start.
+
+    Columns (one entry per segment):
+      start_tick, end_tick (int64)
+      start_beats, end_beats, us_per_beat, start_us, end_us (float64)
+    """
+    __slots__ = ("start_tick", "end_tick", "start_beats", "end_beats",
+                 "us_per_beat", "start_us", "end_us", "default_us_per_beat")
+
+    def __init__(self, default_bpm: float = 120.0) -> None:
+        self.start_tick = array("q")
+        self.end_tick = array("q")
+        self.start_beats = array("d")
+        self.end_beats = array("d")
+        self.us_per_beat = array("d")
+        self.start_us = array("d")
+        self.end_us = array("d")
+        # Used when there are no segments at all
+        self.default_us_per_beat = 60_000_000 / float(default_bpm or 120.0)
+
+    @classmethod
+    def build(cls, tempo_events: Iterable[Tuple[int, int]], ticks_per_beat: int,
+              total_beats: float, default_bpm: float = 120.0) -> "TempoMap":
+        """Build from (abs_tick, us_per_beat) events collected across all tracks."""
+        tm = cls(default_bpm)
+        tpq = int(ticks_per_beat or 480)
+        events = sorted(tempo_events, key=lambda x: x[0])
+
+        # Default tempo if none present
+        DEFAULT_USPB = int(60_000_000 / default_bpm)  # e.g. 500_000 for 120 BPM
+
+        # Build breakpoints: always have a 0-start tempo
+        breakpoints: List[Tuple[int, int]] = []
+        if events and events[0][0] == 0:
+            breakpoints.append((0, events[0][1]))
+            breakpoints.extend(events[1:])
+        else:
+            breakpoints.append((0, DEFAULT_USPB))
+            breakpoints.extend(events)
+
+        us_cursor = 0.0
+        prev_tick = 0
+        prev_beats = 0.0
+        prev_uspb = breakpoints[0][1]
+
+        for i in range(1, len(breakpoints)):
+            btick, buspb = breakpoints[i]
+            bbeats = btick / float(tpq)
+            # duration of previous tempo span in beats
+            dbeats = max(0.0, bbeats - prev_beats)
+            if dbeats > 0:
+                tm._append(prev_tick, btick, prev_beats, bbeats, float(prev_uspb), us_cursor)
+                us_cursor += dbeats * float(prev_uspb)
+
+            prev_tick = btick
+            prev_beats = bbeats
+            prev_uspb = buspb
+
+        # Final segment to song end
+        if total_beats > prev_beats:
+            tm._append(prev_tick, int(total_beats * tpq), prev_beats, total_beats, float(prev_uspb), us_cursor)
+
+        return tm
+
+    def _append(self, start_tick: int, end_tick: int, start_beats: float, end_beats: float,
+                us_per_beat: float, start_us: float) -> None:
+        self.start_tick.append(int(start_tick))
+        self.end_tick.append(int(end_tick))
+        self.start_beats.append(start_beats)
+        self.end_beats.append(end_beats)
+        self.us_per_beat.append(us_per_beat)
+        self.start_us.append(start_us)
+        self.end_us.append(start_us + (end_beats - start_beats) * us_per_beat)
+
+    # -------- Queries --------
+    def __len__(self) -> int:
+        return len(self.start_beats)
+
+    @property
+    def total_us(self) -> float:
+        """Song length in microseconds (end of the last segment)."""
+        return self.end_us[-1] if self.end_us else 0.0
+
+    @property
+    def initial_bpm(self) -> float:
+        uspb = self.us_per_beat[0] if self.us_per_beat else self.default_us_per_beat
+        return 60_000_000.0 / uspb
+
+    def beat_to_us(self, beat: float) -> float:
+        """Map an absolute beat position to absolute microseconds."""
+        if not self.start_beats:
+            return float(beat) * self.default_us_per_beat
+        return self._beat_to_us(beat, bisect_right(self.start_beats, beat) - 1)
+
+    def us_to_beat(self, us: float) -> float:
+        """Map absolute microseconds to an absolute beat position."""
+        if not self.start_us:
+            return float(us) / self.default_us_per_beat
+        return self._us_to_beat(us, bisect_right(self.start_us, us) - 1)
+
+    def beats_to_us_many(self, beats: Iterable[float]) -> array:
+        """Convert many beat positions at once.
+
+        Consecutive inputs that fall in the same segment reuse it without a
+        search, so sorted input costs O(n + k) and unsorted input O(n log k).
+        """
+        out = array("d")
+        if not self.start_beats:
+            uspb = self.default_us_per_beat
+            out.extend(float(b) * uspb for b in beats)
+            return out
+        starts, ends = self.start_beats, self.end_beats
+        last = len(starts) - 1
+        i = 0
+        for b in beats:
+            if not (starts[i] <= b < ends[i]):
+                i = bisect_right(starts, b) - 1
+                if i < 0:
+                    out.append(self._beat_to_us(b, -1))
+                    i = 0
+                    continue
+            out.append(self._beat_to_us(b, i) if i == last else self.start_us[i] + (b - starts[i]) * self.us_per_beat[i])
+        return out
+
+    def us_to_beats_many(self, us_values: Iterable[float]) -> array:
+        """Convert many microsecond positions at once (see beats_to_us_many)."""
+        out = array("d")
+        if not self.start_us:
+            uspb = self.default_us_per_beat
+            out.extend(float(u) / uspb for u in us_values)
+            return out
+        starts, ends = self.start_us, self.end_us
+        last = len(starts) - 1
+        i = 0
+        for u in us_values:
+            if not (starts[i] <= u < ends[i]):
+                i = bisect_right(starts, u) - 1
+                if i < 0:
+                    out.append(self._us_to_beat(u, -1))
+                    i = 0
+                    continue
+            out.append(self._us_to_beat(u, i) if i == last else self.start_beats[i] + (u - starts[i]) / self.us_per_beat[i])
+        return out
+
+    def _beat_to_us(self, beat: float, i: int) -> float:
+        # i: index of the last segment with start_beats <= beat, or -1
+        if i < 0:
+            # before first
+            return max(0.0, self.start_us[0] - (self.start_beats[0] - beat) * self.us_per_beat[0])
+        if beat < self.end_beats[i]:
+            return self.start_us[i] + (beat - self.start_beats[i]) * self.us_per_beat[i]
+        # after last
+        extra = max(0.0, beat - self.end_beats[-1])
+        return self.end_us[-1] + extra * self.us_per_beat[-1]
+
+    def _us_to_beat(self, us: float, i: int) -> float:
+        if i < 0:
+            deficit = self.start_us[0] - us
+            return max(0.0, self.start_beats[0] - deficit / self.us_per_beat[0])
+        if us < self.end_us[i]:
+            return self.start_beats[i] + (us - self.start_us[i]) / self.us_per_beat[i]
+        extra = max(0.0, us - self.end_us[-1])
+        return self.end_beats[-1] + extra / self.us_per_beat[-1]
+
+    def segments(self) -> List[Dict[str, float]]:
+        """Segments as dicts (start_tick, end_tick, start_beats, end_beats, us_per_beat, start_us, end_us)."""
+        return [
+            dict(start_tick=self.start_tick[i], end_tick=self.end_tick[i],
+                 start_beats=self.start_beats[i], end_beats=self.end_beats[i],
+                 us_per_beat=self.us_per_beat[i], start_us=self.start_us[i], end_us=self.end_us[i])
+            for i in range(len(self.start_beats))
+        ]
+
+
+__all__ = [
+    "TempoMap",
+]
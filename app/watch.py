@@ -0,0 +1,115 @@
+"""Watch the open MIDI file for changes on disk.
+
+This module provides:
+- FileWatcher: reports (debounced) modifications of a single file
+
+Uses watchdog when it is installed and falls back to polling the file's
+mtime/size otherwise. Events arrive on a watchdog thread; poll() is called
+from the UI thread and only returns True once the file has been quiet for
+`settle_s`, so a DAW that writes the file in several steps triggers a single
+reload.
+
+Usage:
+    from app.watch import FileWatcher
+    watcher = FileWatcher(path)
+    ...
+    if watcher.poll():   # each frame
+        doc.reload()
+    watcher.stop()
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+
+
+class _Handler(FileSystemEventHandler):  # type: ignore[misc]
+    def __init__(self, watcher: "FileWatcher") -> None:
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        target = self._watcher.path
+        for attr in ("src_path", "dest_path"):
+            p = getattr(event, attr, None)
+            if p and os.path.abspath(os.fsdecode(p)) == target:
+                self._watcher._touch()
+                return
+
+
+class FileWatcher:
+    def __init__(self, path: str, settle_s: float = 0.3, poll_interval_s: float = 0.5) -> None:
+        self.path = os.path.abspath(path)
+        self.settle_s = float(settle_s)
+        self.poll_interval_s = float(poll_interval_s)
+        self._lock = threading.Lock()
+        self._dirty_at: Optional[float] = None
+        self._last_poll = 0.0
+        self._sig = self._signature()      # state of the last reported version
+        self._polled_sig = self._sig       # state seen by the last mtime poll
+        self._observer = None
+        if Observer is not None:
+            try:
+                obs = Observer()
+                obs.schedule(_Handler(self), os.path.dirname(self.path) or ".", recursive=False)
+                obs.daemon = True
+                obs.start()
+                self._observer = obs
+            except Exception as e:
+                print(f"[Watch] watchdog unavailable, polling instead: {e}")
+
+    @property
+    def uses_watchdog(self) -> bool:
+        return self._observer is not None
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _touch(self) -> None:
+        with self._lock:
+            self._dirty_at = time.monotonic()
+
+    def poll(self) -> bool:
+        """True once per settled change of the file."""
+        now = time.monotonic()
+        if self._observer is None and now - self._last_poll >= self.poll_interval_s:
+            self._last_poll = now
+            sig = self._signature()
+            if sig != self._polled_sig:
+                self._polled_sig = sig
+                self._touch()
+        with self._lock:
+            if self._dirty_at is None or now - self._dirty_at < self.settle_s:
+                return False
+            self._dirty_at = None
+        sig = self._signature()
+        if sig is None or sig == self._sig:
+            return False  # deleted mid-save, or touched without changes
+        self._sig = sig
+        return True
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+            self._observer = None
+
+
+__all__ = [
+    "FileWatcher",
+]
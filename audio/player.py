@@ -1,49 +1,40 @@
 # audio/player.py
-import math
 import pygame
 from audio.synth import init_audio, tone
 
 def selection_bounds_in_beats(state):
-    if not state.selected_notes:
-        return None
-    tpq = state.midi.ticks_per_beat or 480
-    lo = math.inf
-    hi = 0.0
-    for (ti, ni) in state.selected_notes:
-        td = state.midi.tracks[ti]
-        n = td.notes[ni]
-        lo = min(lo, n.start_tick / tpq)
-        hi = max(hi, n.end_tick / tpq)
-    return None if lo is math.inf else (lo, hi)
+    return state.selection.bounds
 
 def build_schedule(state, start_b: float, end_b: float):
     """Precompute per-note start_us/end_us for fast, tempo-accurate playback."""
-    ev = []
-    tpq = state.midi.ticks_per_beat or 480
-    if state.selected_notes:
-        src = list(state.selected_notes)
-    else:
-        src = [(ti, ni) for ti, td in enumerate(state.midi.tracks) for ni, _ in enumerate(td.notes)]
+    sel = state.selection
+    clipped = []  # (start_beats, end_beats, pitch)
+    for ti in (sel.tracks if sel else range(len(state.midi.tracks))):
+        notes = state.midi.track_notes(ti)
+        for ni in (sel.indices(ti) if sel else range(len(notes))):
+            sb = notes.start_beats[ni]
+            eb = notes.end_beats[ni]
+            if eb <= start_b or sb >= end_b:
+                continue
+            sb_clip = max(sb, start_b)
+            eb_clip = max(sb_clip + 1e-4, min(eb, end_b))  # avoid zero-length
+            clipped.append((sb_clip, eb_clip, notes.pitch[ni]))
+    # Sorted by start beat == sorted by start_us (tempo map is monotonic), which
+    # also lets the batch conversion walk the tempo segments in order.
+    clipped.sort(key=lambda c: c[0])
 
-    b2us = state.midi.beat_to_us
-    for (ti, ni) in src:
-        td = state.midi.tracks[ti]
-        n = td.notes[ni]
-        sb = n.start_tick / tpq
-        eb = n.end_tick  / tpq
-        if eb <= start_b or sb >= end_b:
-            continue
-        sb_clip = max(sb, start_b)
-        eb_clip = max(sb_clip + 1e-4, min(eb, end_b))  # avoid zero-length
-        ev.append({
-            "start_beats": sb_clip,
-            "end_beats": eb_clip,
-            "start_us": b2us(sb_clip),
-            "end_us": b2us(eb_clip),
-            "pitch": n.pitch,
-        })
-    ev.sort(key=lambda e: e["start_us"])
-    state.play_events = ev
+    starts_us = state.midi.beats_to_us_many(c[0] for c in clipped)
+    ends_us = state.midi.beats_to_us_many(c[1] for c in clipped)
+    state.play_events = [
+        {
+            "start_beats": sb,
+            "end_beats": eb,
+            "start_us": starts_us[i],
+            "end_us": ends_us[i],
+            "pitch": pitch,
+        }
+        for i, (sb, eb, pitch) in enumerate(clipped)
+    ]
     state.play_next_index = 0
 
 def start_playback(state):
@@ -67,6 +67,6 @@ def handle_global_keys(io, state):
         except Exception:
             pass
     if esc:
-        state.selected_notes.clear()
+        state.selection.clear()
         state.marquee_active = False
         state.playhead_beats = 0.0
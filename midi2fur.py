@@ -1,25 +1,20 @@
 import sys
 import math
-import pygame
-from pygame.locals import DOUBLEBUF, OPENGL, RESIZABLE, VIDEORESIZE, QUIT
-import OpenGL.GL as gl
-
-import imgui
-from imgui.integrations.pygame import PygameRenderer
-
+import multiprocessing
+
+# Headless batch / render-bench modes: dispatch before pygame/OpenGL/imgui are imported
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "batch":
+    from tracker.batch import main as batch_main
+    sys.exit(batch_main(sys.argv[2:]))
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "render-bench":
+    from ui.render_bench import main as render_bench_main
+    sys.exit(render_bench_main(sys.argv[2:]))
+
+# pygame/OpenGL/imgui and the ui/input/audio modules are imported in main():
+# process-pool workers (batch, parallel MIDI loading) are spawned on Windows and
+# macOS and re-import this file as __mp_main__, and must not pull in the GUI.
 from typing import List, Tuple, Optional
 
-
-from input.shortcuts import handle_shortcuts, handle_global_keys
-from input.nav import handle_navigation_keys
-from ui.menu import draw_menu_bar
-from ui.panels import draw_zoom_settings_window, draw_info_window
-from ui.timeline import draw_timeline_canvas
-from audio.player import update_playback
-from input.play_keys import handle_play_keys
-from ui.tracker_panel import draw_tracker_settings_window
-from tracker.export import copy_selection_to_clipboard
-
 from version import __version__
 
 
@@ -33,6 +28,8 @@ from app.state import (
     zoom_to_fit_time, zoom_to_fit_vertical, zoom_reset, zoom_time_center,
 )
 from app.midi_doc import MidiDoc, Note, TrackData
+from app.loader import LoadJob
+from app.watch import FileWatcher
 
 
 # ---- simple file dialog for Open ----
@@ -56,16 +53,94 @@ def do_open_file(state: AppState):
     path = ask_open_midi()
     if not path:
         return
+    if state.load_job is not None:
+        state.load_job.cancel()
+    cache = state.parse_cache if state.use_parse_cache else None
+    state.load_job = LoadJob(path, parallel=state.parallel_load, cache=cache, lazy=state.lazy_load).start()
+
+
+def poll_load_job(state: AppState) -> bool:
+    """Swap a finished background load into the app state. True when the job finished."""
+    from audio.player import stop_playback
+    job = state.load_job
+    if job is None or not job.done:
+        return False
+    state.load_job = None
+    if job.error is not None:
+        print(f"Failed to open MIDI: {job.error}")
+        return True
+    if job.doc is None:  # cancelled
+        return True
+    stop_playback(state, restore_cursor=False)
+    state.midi = job.doc
+    state.selection.bind(job.doc)
+    state.marquee_active = False
+    state.playhead_beats = 0.0
+    # After load, try to fit both axes initially
+    state.request_fit_all = True
+    if state.file_watcher is not None:
+        state.file_watcher.stop()
+    state.file_watcher = FileWatcher(job.doc.path)
+    return True
+
+
+def poll_file_watch(state: AppState) -> bool:
+    """Re-read the open file after it changed on disk, keeping zoom/scroll. True on reload."""
+    watcher = state.file_watcher
+    if watcher is None or not state.watch_file or state.load_job is not None:
+        return False
+    if not watcher.poll():
+        return False
+    from audio.player import stop_playback
     try:
-        state.midi.load(path)
-        # After load, try to fit both axes initially
-        state.request_fit_all = True
+        mapping = state.midi.reload()
     except Exception as e:
-        print(f"Failed to open MIDI: {e}")
+        print(f"Failed to reload MIDI: {e}")
+        return False
+    stop_playback(state, restore_cursor=False)
+    state.selection.remap(mapping)
+    state.marquee_active = False
+    state.playhead_beats = min(state.playhead_beats, state.midi.total_beats)
+    return True
+
+
+def frame_busy(state: AppState) -> bool:
+    """Something animates or is being dragged, so every frame must be drawn."""
+    import pygame
+    return bool(
+        state.playing
+        or state.load_job is not None
+        or state.marquee_active
+        or state.panning
+        or state.vsb_dragging
+        or state.minimap_dragging
+        or any(pygame.mouse.get_pressed())
+        or any(pygame.key.get_pressed())  # held arrows/zoom keys act every frame
+    )
 
 
 # ----------------- App -----------------
 def main():
+    import pygame
+    from pygame.locals import DOUBLEBUF, OPENGL, RESIZABLE, VIDEORESIZE, QUIT
+    import OpenGL.GL as gl
+
+    import imgui
+    from imgui.integrations.pygame import PygameRenderer
+
+    from input.shortcuts import handle_shortcuts, handle_global_keys
+    from input.nav import handle_navigation_keys
+    from ui.menu import draw_menu_bar
+    from ui.panels import (draw_zoom_settings_window, draw_info_window, draw_load_progress_window,
+                           draw_profiler_window)
+    from ui.timeline import draw_timeline_canvas
+    from ui.gl_notes import release_note_layer
+    from ui.minimap import release_minimap
+    from audio.player import update_playback, stop_playback
+    from input.play_keys import handle_play_keys
+    from ui.tracker_panel import draw_tracker_settings_window
+    from tracker.export import copy_selection_to_clipboard
+
     # --- Pygame / GL init ---
     pygame.init()
     size = (1280, 720)
@@ -183,9 +258,19 @@ def main():
     state = AppState()
     state.window_size = size
 
+    pacer = state.frame_pacer
+    prof = state.profiler
+
     try:
         while not state.should_quit:
-            for event in pygame.event.get():
+            events = pygame.event.get()
+            if not events and not pacer.should_render(frame_busy(state)):
+                # Idle: sleep in the event queue instead of redrawing an unchanged UI
+                event = pygame.event.wait(pacer.idle_timeout_ms)
+                if event.type != pygame.NOEVENT:
+                    events = [event] + pygame.event.get()
+            prof.begin_frame()
+            for event in events:
                 if event.type == QUIT:
                     state.should_quit = True
                 elif event.type == VIDEORESIZE:
@@ -194,11 +279,24 @@ def main():
                     gl.glViewport(0, 0, *size)
                     state.window_size = size
                 renderer.process_event(event)
+            if events:
+                pacer.note_activity()
+            prof.mark("events")
+
+            if poll_load_job(state) | poll_file_watch(state):
+                pacer.note_activity()
+            pacer.update_stats()
+            prof.mark("load/watch")
+            if not pacer.should_render(frame_busy(state)):
+                prof.discard_frame()
+                continue
 
             renderer.process_inputs()
             io.display_size = state.window_size
+            io.delta_time = pacer.frame_dt(io.delta_time)
 
             imgui.new_frame()
+            prof.mark("new frame")
 
             # UI
             draw_menu_bar(
@@ -209,11 +307,17 @@ def main():
             )
             draw_zoom_settings_window(state)
             draw_info_window(state)
+            draw_load_progress_window(state)
+            draw_profiler_window(state)
+            prof.mark("menu + panels")
             draw_tracker_settings_window(state)
+            prof.mark("tracker panel")
 
             # Update play transport and keys
             update_playback(state)
+            prof.mark("playback")
             draw_timeline_canvas(state)  # playhead draws inside this fn
+            prof.mark("timeline")
             handle_navigation_keys(io, state)
             handle_play_keys(io, state)  # SPACE to toggle play
             handle_global_keys(io, state)
@@ -222,16 +326,28 @@ def main():
 
             if state.show_demo:
                 imgui.show_demo_window()
+            prof.mark("input")
 
             # Render
             gl.glClearColor(0.10, 0.10, 0.10, 1.0)
             gl.glClear(gl.GL_COLOR_BUFFER_BIT)
 
             imgui.render()
-            renderer.render(imgui.get_draw_data())
+            draw_data = imgui.get_draw_data()
+            renderer.render(draw_data)
+            if prof.enabled:
+                prof.count("imgui draw cmds", sum(len(cl.commands) for cl in draw_data.commands_lists))
+            prof.mark("render")
             pygame.display.flip()
-            clock.tick(120)
+            prof.mark("flip")
+            prof.end_frame()
+            pacer.frame_rendered()
+            clock.tick(pacer.active_fps)
     finally:
+        if state.file_watcher is not None:
+            state.file_watcher.stop()
+        release_note_layer()
+        release_minimap()
         try:
             renderer.shutdown()
             try:
@@ -249,4 +365,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # parallel MIDI loading in frozen builds
     main()
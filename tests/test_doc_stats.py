@@ -0,0 +1,78 @@
+"""DocStats totals must not depend on how (or in which order) tracks were summarized.
+
+Run: python -m pytest tests
+"""
+import random
+
+import pytest
+
+from app.midi_doc import MidiDoc
+from app.smf import SmfTrack
+
+
+def song(seed, tracks=5):
+    rng = random.Random(seed)
+    decoded = []
+    for _ in range(tracks):
+        st = SmfTrack()
+        for _ in range(rng.randint(0, 80)):
+            s = rng.randint(0, 4000)
+            st.notes.append((s, s + rng.randint(1, 400), rng.randint(0, 127), rng.randint(1, 127), rng.randint(0, 15)))
+        st.end_tick = max((e for _, e, _, _, _ in st.notes), default=0)
+        decoded.append(st)
+    doc = MidiDoc()
+    doc.load_tracks(decoded, 96)
+    return doc
+
+
+def peak_polyphony(doc):
+    events = sorted((t, d) for td in doc.tracks for n in td.notes for t, d in ((n.start_tick, 1), (n.end_tick, -1)))
+    cur = peak = 0
+    for _, d in events:   # ends sort before starts at the same tick: touching notes do not overlap
+        cur += d
+        peak = max(peak, cur)
+    return peak
+
+
+def test_totals_match_brute_force():
+    for seed in range(20):
+        doc = song(seed)
+        tot = doc.stats.totals
+        assert tot.note_count == sum(len(td.notes) for td in doc.tracks)
+        assert tot.peak_polyphony == peak_polyphony(doc)
+        assert sum(tot.bar_density) == tot.note_count
+        assert list(tot.pitch_hist) == [sum(1 for td in doc.tracks for p in td.notes.pitch if p == v) for v in range(128)]
+
+
+def test_lazy_totals_match_eager(tmp_path):
+    mido = pytest.importorskip("mido")
+    rng = random.Random(7)
+    mid = mido.MidiFile(ticks_per_beat=96)
+    for _ in range(6):
+        events = []
+        for _ in range(rng.randint(0, 60)):
+            s = rng.randint(0, 3000)
+            p = rng.randint(0, 127)
+            events += [(s, 1, p), (s + rng.randint(1, 300), 0, p)]
+        tr = mido.MidiTrack()
+        now = 0
+        for t, on, p in sorted(events):
+            tr.append(mido.Message("note_on", note=p, velocity=80 if on else 0, time=t - now))
+            now = t
+        mid.tracks.append(tr)
+    path = str(tmp_path / "song.mid")
+    mid.save(path)
+
+    eager = MidiDoc()
+    eager.load(path)
+    ref = eager.stats.totals
+    lazy = MidiDoc()
+    lazy.load(path, lazy=True)
+    st = lazy.stats
+    assert not st.complete
+    for td in reversed(lazy.tracks):   # decoding summarizes, in any order
+        td.notes
+    assert st.complete and st is lazy.stats
+    tot = st.totals
+    assert (tot.note_count, tot.peak_polyphony, list(tot.bar_density), list(tot.pitch_hist), tot.channels) == \
+           (ref.note_count, ref.peak_polyphony, list(ref.bar_density), list(ref.pitch_hist), ref.channels)
@@ -0,0 +1,118 @@
+"""The byte-buffer pattern grid must produce the same text as a list-of-strings grid.
+
+_StringGrid is the grid the exporter used before _PatternGrid: one string per
+cell, joined with "|" per row at the end. Both are run on the same songs,
+including MIDI notes 0..11 (octave -1) and negative transposes, in per-track
+and spillover mode with OFF and REL cells.
+
+Run: python -m pytest tests
+"""
+import random
+
+import pytest
+
+import tracker.export as export
+from app.midi_doc import MidiDoc
+from app.smf import SmfTrack
+from app.state import AppState
+from tracker.types import FurnaceConfig
+
+TPQ = 96
+
+
+class _StringGrid:
+    def __init__(self, rows, chans):
+        self.cells = [[export._blank_cell() for _ in range(chans)] for _ in range(rows)]
+
+    def is_blank(self, line, ch):
+        return self.cells[line][ch] == export._blank_cell()
+
+    def put(self, line, ch, cell):
+        self.cells[line][ch] = cell.decode("ascii")
+
+    def text(self):
+        return "\n".join("".join(cell + "|" for cell in row) for row in self.cells)
+
+
+def song(seed, tracks=3, low=False):
+    rng = random.Random(seed)
+    decoded = []
+    for _ in range(tracks):
+        st = SmfTrack()
+        for _ in range(rng.randint(5, 60)):
+            s = rng.randint(0, 64) * TPQ // 4
+            pitch = rng.randint(0, 11) if low and rng.random() < 0.5 else rng.randint(0, 127)
+            st.notes.append((s, s + rng.randint(1, 16) * TPQ // 4, pitch, rng.randint(1, 127), 0))
+        st.end_tick = max(e for _, e, _, _, _ in st.notes)
+        decoded.append(st)
+    doc = MidiDoc()
+    doc.load_tracks(decoded, TPQ)
+    state = AppState()
+    state.midi = doc
+    state.selection.bind(doc)
+    return state
+
+
+def export_both(state, cfg, monkeypatch):
+    ok, text = export.build_furnace_clipboard_text(state, cfg)
+    with monkeypatch.context() as m:
+        m.setattr(export, "_PatternGrid", _StringGrid)
+        ok_ref, ref = export.build_furnace_clipboard_text(state, cfg)
+    assert ok and ok_ref
+    return text, ref
+
+
+def assert_rectangular(text, chans):
+    rows = text.split("\n")[2:]
+    assert rows
+    for row in rows:
+        assert len(row) == chans * (export.CELL_W + 1)
+        assert row.count("|") == chans
+
+
+CONFIGS = [
+    dict(polyphony_mode=mode, note_off_mode=off, transpose_octaves=tr, velocity_enabled=vel)
+    for mode in ("per_track", "spillover")
+    for off in ("OFF", "REL")
+    for tr in (-2, 0, 1)
+    for vel in (False, True)
+]
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("conf", CONFIGS, ids=lambda c: "-".join(str(v) for v in c.values()))
+def test_grid_matches_string_grid(seed, conf, monkeypatch):
+    state = song(seed, low=seed % 2 == 0)
+    if conf["polyphony_mode"] == "spillover":
+        state.selection.select_track(0)
+    cfg = FurnaceConfig(lines_per_quarter=4, spillover_count=4, **conf)
+    text, ref = export_both(state, cfg, monkeypatch)
+    assert text == ref
+    chans = text.split("\n")[2].count("|")
+    assert chans <= (4 if conf["polyphony_mode"] == "spillover" else len(state.midi.tracks))
+    assert_rectangular(text, chans)
+
+
+@pytest.mark.parametrize("transpose", [-6, -1, 0])
+def test_octave_minus_one_cells_keep_the_grid_aligned(transpose):
+    st = SmfTrack()
+    st.notes = [(i * TPQ, (i + 1) * TPQ, pitch, 100, 0) for i, pitch in enumerate(list(range(12)) + [60, 127])]
+    st.end_tick = len(st.notes) * TPQ
+    other = SmfTrack()
+    other.notes = [(0, 20 * TPQ, 72, 100, 0)]
+    other.end_tick = 20 * TPQ
+    doc = MidiDoc()
+    doc.load_tracks([st, other], TPQ)
+    state = AppState()
+    state.midi = doc
+    state.selection.bind(doc)
+    cfg = FurnaceConfig(lines_per_quarter=1, transpose_octaves=transpose, note_off_mode="OFF")
+    ok, text = export.build_furnace_clipboard_text(state, cfg)
+    assert ok
+    assert_rectangular(text, 2)
+    rows = text.split("\n")[2:]
+    names = [row.split("|")[0][:3] for row in rows[:12]]
+    if transpose == 0:
+        assert names == ["c_1", "c+1", "d_1", "d+1", "e_1", "f_1", "f+1", "g_1", "g+1", "a_1", "a+1", "b_1"]
+    assert all(len(row.split("|")[1]) == export.CELL_W for row in rows)
+    assert rows[19].split("|")[1].startswith("OFF")
@@ -0,0 +1,109 @@
+"""Lazy documents: nothing is decoded until asked for, and a file rewritten
+on disk underneath one never raises out of the UI-facing accessors.
+
+Run: python -m pytest tests
+"""
+import os
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from app.midi_doc import MidiDoc
+from app.smf import SmfError
+from app.state import AppState
+from tracker.export import build_furnace_clipboard_text
+from tracker.types import FurnaceConfig
+
+
+def write_song(path, tracks=4, edited=None):
+    """edited: index of a track whose notes are moved up a semitone."""
+    mid = mido.MidiFile(ticks_per_beat=96)
+    for t in range(tracks):
+        tr = mido.MidiTrack()
+        tr.append(mido.MetaMessage("track_name", name=f"T{t}", time=0))
+        base = 40 + t * 5 + (t == edited)
+        for i in range(20):
+            tr.append(mido.Message("note_on", note=base + i % 5, velocity=90, time=0 if i == 0 else 48))
+            tr.append(mido.Message("note_off", note=base + i % 5, velocity=0, time=48))
+        mid.tracks.append(tr)
+    mid.save(path)
+
+
+def lazy_state(path):
+    doc = MidiDoc()
+    doc.load(path, lazy=True)
+    state = AppState()
+    state.midi = doc
+    state.selection.bind(doc)
+    return state
+
+
+def test_preview_leaves_lazy_tracks_undecoded(tmp_path):
+    path = str(tmp_path / "song.mid")
+    write_song(path)
+    state = lazy_state(path)
+    doc = state.midi
+    cfg = FurnaceConfig()
+    assert state.export_cache.get(state, cfg, loaded_only=True)[0]
+    assert doc.loaded_track_count == 0
+    doc.tracks[1].notes
+    preview = state.export_cache.get(state, cfg, loaded_only=True)[1]
+    assert doc.loaded_track_count == 1
+    assert preview.count("|") == (len(preview.split("\n")) - 2)   # one channel: track 1 only
+    ok, full = build_furnace_clipboard_text(state, cfg)
+    assert ok and doc.loaded_track_count == len(doc.tracks)
+    assert full != preview
+
+
+def test_rewritten_file_reads_as_empty(tmp_path):
+    path = str(tmp_path / "song.mid")
+    write_song(path)
+    state = lazy_state(path)
+    doc = state.midi
+    doc.tracks[0].notes
+    state.selection.select_track(0)
+    with open(path, "wb") as f:
+        f.write(b"MThd")
+    with pytest.raises(SmfError):
+        doc.tracks[2].notes
+    assert not doc.stale
+    assert len(doc.track_notes(2)) == 0
+    assert doc.stale and not doc.tracks[2].loaded
+    # None of the UI-facing readers raise
+    state.selection.select_all()
+    assert state.selection.count == len(doc.tracks[0].notes)
+    doc.stats.track(3)
+    ok, msg = build_furnace_clipboard_text(state, FurnaceConfig())
+    assert not ok and "changed on disk" in msg
+
+    write_song(path)
+    os.utime(path, None)
+    doc.reload()
+    assert not doc.stale
+    assert len(doc.tracks[2].notes) == 20
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_reload_keeps_unchanged_tracks(tmp_path, lazy):
+    path = str(tmp_path / "song.mid")
+    write_song(path)
+    doc = MidiDoc()
+    doc.load(path, lazy=lazy)
+    for ti, td in enumerate(doc.tracks):
+        td.pitch_scroll_px = 10.0 * ti
+    before = list(doc.tracks)
+    read = (0, 2) if lazy else (0, 1, 2, 3)   # lazy: tracks 1 and 3 are never read
+    stats = {ti: doc.stats.track(ti) for ti in read}
+
+    write_song(path, edited=2)
+    os.utime(path, None)
+    assert doc.reload() == {0: 0, 1: 1, 3: 3}
+    for ti in (0, 1, 3):
+        assert doc.tracks[ti] is before[ti] and doc.tracks[ti].pitch_scroll_px == 10.0 * ti
+    assert doc.tracks[1].loaded == doc.tracks[3].loaded == (not lazy)
+    for ti in read:
+        assert (doc.stats.track(ti) is stats[ti]) == (ti != 2)
+    assert doc.tracks[2] is not before[2]
+    assert doc.tracks[2].pitch_min == 51
+    assert len(doc.tracks[1].notes) == 20
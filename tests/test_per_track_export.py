@@ -0,0 +1,116 @@
+"""per_track export must place OFF/REL cells like the row-by-row scan.
+
+The reference walks every row of every channel, as the exporter did before
+it swept only the rows with note events: the overlap count rises by the notes
+starting on a row and falls by those ending there (ends past the last row
+clamp to it), and a row where notes end, none start and nothing is left
+sounding gets an OFF/REL unless a note-on occupies the cell.
+
+Run: python -m pytest tests
+"""
+import random
+
+import pytest
+
+from app.midi_doc import MidiDoc
+from app.smf import SmfTrack
+from app.state import AppState
+from tracker.export import _note_on_cell, _off_cell, build_furnace_clipboard_text
+from tracker.types import FurnaceConfig
+
+TPQ = 96
+HEADER = "org.tildearrow.furnace - Pattern Data (219)\n0\n"
+
+
+def make_state(tracks):
+    """tracks: per track, a list of (start_line, end_line, pitch, velocity) at 1 line per beat."""
+    decoded = []
+    for notes in tracks:
+        st = SmfTrack()
+        st.notes = [(s * TPQ, e * TPQ, p, v, 0) for (s, e, p, v) in notes]
+        st.end_tick = max(e for _, e, _, _ in notes) * TPQ
+        decoded.append(st)
+    doc = MidiDoc()
+    doc.load_tracks(decoded, TPQ)
+    state = AppState()
+    state.midi = doc
+    state.selection.bind(doc)
+    return state
+
+
+def row_scan(chosen, cfg):
+    """chosen: per track, the exported notes (tracks with none get no channel)."""
+    used = [notes for notes in chosen if notes]
+    first = min(s for notes in used for s, _, _, _ in notes)
+    total = max(1, max(e for notes in used for _, e, _, _ in notes) - first)
+    grid = [["." * 11] * len(used) for _ in range(total)]
+    for ch, notes in enumerate(used):
+        starts, ends = {}, {}
+        for s, e, p, v in sorted(notes):
+            s, e = s - first, e - first
+            grid[s][ch] = _note_on_cell(p, v, cfg)
+            starts[s] = starts.get(s, 0) + 1
+            off = max(0, min(e, total - 1))
+            ends[off] = ends.get(off, 0) + 1
+        cur = 0
+        for line in range(total):
+            s, e = starts.get(line, 0), ends.get(line, 0)
+            cur += s - e
+            if e and s == 0 and cur == 0 and grid[line][ch] == "." * 11:
+                grid[line][ch] = _off_cell(cfg)
+    return HEADER + "\n".join("".join(cell + "|" for cell in row) for row in grid)
+
+
+def export(state, off_mode):
+    cfg = FurnaceConfig(lines_per_quarter=1, polyphony_mode="per_track", note_off_mode=off_mode)
+    ok, text = build_furnace_clipboard_text(state, cfg)
+    assert ok, text
+    return text, cfg
+
+
+def random_track(rng):
+    notes = []
+    start = rng.choice([0, 0, rng.randint(0, 300)])
+    for _ in range(rng.randint(1, 30)):
+        s = start + rng.randint(0, 80) * rng.choice([1, 1, 8])   # clusters with long gaps
+        notes.append((s, s + rng.randint(1, 12), rng.randint(0, 127), rng.randint(1, 127)))
+    return notes
+
+
+def test_off_only_after_the_last_overlapping_note():
+    track = [(0, 4, 60, 100), (2, 6, 64, 100),      # overlapping: nothing at 4
+             (6, 8, 62, 100),                        # starts where the overlap ends: no OFF at 6, OFF at 8
+             (10, 12, 65, 100), (12, 14, 67, 100)]   # back to back: no OFF at 12, last one clamps to row 13
+    state = make_state([track])
+    for off_mode in ("OFF", "REL"):
+        text, cfg = export(state, off_mode)
+        assert text == row_scan([track], cfg)
+        cells = [row.split("|")[0] for row in text[len(HEADER):].split("\n")]
+        assert [i for i, cell in enumerate(cells) if cell == _off_cell(cfg)] == [8, 13]
+
+
+@pytest.mark.parametrize("off_mode", ["OFF", "REL"])
+@pytest.mark.parametrize("seed", range(40))
+def test_random_songs(seed, off_mode):
+    rng = random.Random(seed)
+    tracks = [random_track(rng) for _ in range(rng.randint(1, 6))]
+    state = make_state(tracks)
+    text, cfg = export(state, off_mode)
+    assert text == row_scan(tracks, cfg)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_selections(seed):
+    rng = random.Random(seed)
+    tracks = [random_track(rng) for _ in range(rng.randint(2, 6))]
+    state = make_state(tracks)
+    doc = state.midi
+    chosen = [[] for _ in tracks]
+    for ti in rng.sample(range(len(tracks)), rng.randint(1, len(tracks))):
+        store = doc.tracks[ti].notes
+        picked = rng.sample(range(len(store)), rng.randint(1, len(store)))
+        state.selection.add_many(ti, picked)
+        chosen[ti] = [(store.start_tick[ni] // TPQ, store.end_tick[ni] // TPQ,
+                       store.pitch[ni], store.velocity[ni]) for ni in picked]
+    text, cfg = export(state, "OFF")
+    assert text == row_scan(chosen, cfg)
@@ -0,0 +1,117 @@
+"""Selection (per-track masks) must agree with a plain set of (track, note) pairs.
+
+Random add / add_many / select_track / select_all / clear sequences are applied
+to both; count, per-track indices, iteration order, membership and beat bounds
+are compared after every step, and version must move exactly when the
+selection changes. remap() is checked against a reordered document the way
+MidiDoc.reload() leaves it.
+
+Run: python -m pytest tests
+"""
+import random
+
+import pytest
+
+from app.midi_doc import MidiDoc
+from app.selection import Selection
+from app.smf import SmfTrack
+
+TPQ = 96
+
+
+def make_doc(rng, tracks=4):
+    decoded = []
+    for _ in range(tracks):
+        st = SmfTrack()
+        for _ in range(rng.randint(1, 50)):
+            s = rng.randint(0, 400)
+            st.notes.append((s, s + rng.randint(1, 200), rng.randint(0, 127), 100, 0))
+        st.end_tick = max((e for _, e, _, _, _ in st.notes), default=0)
+        decoded.append(st)
+    doc = MidiDoc()
+    doc.load_tracks(decoded, TPQ)
+    return doc
+
+
+def check(sel, doc, ref):
+    assert sel.count == len(sel) == len(ref)
+    assert bool(sel) == bool(ref)
+    assert list(sel) == sorted(ref)
+    assert sel.tracks == sorted({ti for ti, _ in ref})
+    for ti in range(len(doc.tracks)):
+        want = sorted(ni for t, ni in ref if t == ti)
+        assert sel.indices(ti) == want
+        assert (sel.mask(ti) is None) == (not want)
+        for ni in range(len(doc.tracks[ti].notes)):
+            assert sel.contains(ti, ni) == ((ti, ni) in ref) == ((ti, ni) in sel)
+    if ref:
+        starts = [doc.tracks[ti].notes.start_beats[ni] for ti, ni in ref]
+        ends = [doc.tracks[ti].notes.end_beats[ni] for ti, ni in ref]
+        assert sel.bounds == (min(starts), max(ends))
+    else:
+        assert sel.bounds is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_operations_match_set(seed):
+    rng = random.Random(seed)
+    doc = make_doc(rng)
+    sel = Selection()
+    sel.bind(doc)
+    ref = set()
+    check(sel, doc, ref)
+    for _ in range(40):
+        ti = rng.randrange(len(doc.tracks))
+        n = len(doc.tracks[ti].notes)
+        before = sel.version
+        op = rng.choice(["add", "add_many", "add_many", "track", "all", "clear"])
+        if op == "add":
+            ni = rng.randrange(n)
+            new = {(ti, ni)}
+            sel.add(ti, ni)
+        elif op == "add_many":
+            idx = [rng.randrange(n) for _ in range(rng.randint(0, 10))]
+            new = {(ti, ni) for ni in idx}
+            sel.add_many(ti, idx)
+        elif op == "track":
+            new = {(ti, ni) for ni in range(n)}
+            sel.select_track(ti)
+        elif op == "all":
+            new = {(t, ni) for t, td in enumerate(doc.tracks) for ni in range(len(td.notes))}
+            sel.select_all()
+        else:
+            sel.clear()
+            assert sel.version == before + (1 if ref else 0)
+            ref = set()
+            check(sel, doc, ref)
+            continue
+        changed = not new <= ref
+        ref |= new
+        assert (sel.version != before) == changed
+        check(sel, doc, ref)
+
+
+def test_remap_follows_reordered_tracks():
+    doc = make_doc(random.Random(7))
+    sel = Selection()
+    sel.bind(doc)
+    sel.add_many(0, [0])
+    sel.select_track(2)
+    sel.add_many(3, [0])
+    t0, t2 = doc.tracks[0], doc.tracks[2]
+    doc.tracks = [t2, t0]          # track 3 dropped, 0 and 2 swapped
+    before = sel.version
+    sel.remap({2: 0, 0: 1})
+    assert sel.version > before
+    ref = {(0, ni) for ni in range(len(t2.notes))} | {(1, 0)}
+    check(sel, doc, ref)
+
+
+def test_bind_clears():
+    doc = make_doc(random.Random(3))
+    sel = Selection()
+    sel.bind(doc)
+    sel.select_all()
+    assert sel
+    sel.bind(make_doc(random.Random(4)))
+    assert not sel and sel.tracks == [] and sel.bounds is None
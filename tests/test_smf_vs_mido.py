@@ -0,0 +1,206 @@
+"""The native SMF reader (app.smf) must produce the same MidiDoc as the mido path.
+
+Crafted files cover running status (including across meta events), note-on
+velocity 0 as note-off, sysex (F0 and F7 escapes), unknown meta and system
+common events, restarted and dangling notes, and TS/tempo changes spread
+over several tracks; random songs written by mido cover the rest. Set
+M2F_TEST_MIDI_DIR to also compare every .mid/.midi file under a directory.
+
+Run: python -m pytest tests
+"""
+import os
+import random
+import struct
+
+import pytest
+
+mido = pytest.importorskip("mido")
+
+from app.midi_doc import MidiDoc
+
+
+# -------- SMF writing helpers --------
+def vlq(n):
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.append(0x80 | (n & 0x7F))
+        n >>= 7
+    return bytes(reversed(out))
+
+
+def mtrk(events):
+    """events: list of (delta, raw event bytes) written as-is (running status allowed)."""
+    body = b"".join(vlq(d) + ev for d, ev in events)
+    return b"MTrk" + struct.pack(">I", len(body)) + body
+
+
+def smf(fmt, tpq, tracks):
+    return b"MThd" + struct.pack(">IHHH", 6, fmt, len(tracks), tpq) + b"".join(tracks)
+
+
+def meta(mtype, data):
+    return bytes([0xFF, mtype]) + vlq(len(data)) + data
+
+
+END = meta(0x2F, b"")
+
+
+def tempo(us):
+    return meta(0x51, us.to_bytes(3, "big"))
+
+
+def timesig(num, den_pow):
+    return meta(0x58, bytes([num, den_pow, 24, 8]))
+
+
+CRAFTED = {
+    # Format 0: running status across note-on/off, vel-0 note-offs, program
+    # change / channel pressure / pitch bend under running status.
+    "running_status": smf(0, 96, [mtrk([
+        (0, meta(0x03, b"Lead")),
+        (0, timesig(3, 2)), (0, tempo(400000)),
+        (0, b"\x90\x3C\x64"), (0, b"\x40\x50"), (48, b"\x3C\x00"), (0, b"\x40\x00"),
+        (0, b"\xC1\x05"), (0, b"\x07"),                 # program change, running status (1 data byte)
+        (0, b"\x91\x30\x40"), (24, b"\xD1\x22"), (0, b"\x11"),  # channel pressure x2
+        (0, b"\xE1\x00\x40"), (0, b"\x10\x41"),         # pitch bend x2
+        (24, b"\x81\x30\x00"), (0, b"\x32\x00"),        # note-off running status (no held note)
+        (0, b"\x90\x43\x70"), (0, meta(0x01, b"text between running status")),
+        (96, b"\x43\x00"),                              # running status after a meta event
+        (0, END)])]),
+    # Format 1: conductor with tempo + TS changes, sysex (F0 and F7 escape),
+    # unknown meta, system common events, restarted and dangling notes.
+    "sysex_meta": smf(1, 480, [
+        mtrk([(0, timesig(4, 2)), (0, tempo(500000)), (1920, tempo(300000)),
+              (960, timesig(7, 3)), (0, meta(0x7F, b"\x00\x00\x41seq")),
+              (3360, tempo(650000)), (0, END)]),
+        mtrk([(0, meta(0x03, b"Keys")),
+              (0, b"\xF0\x05\x7E\x7F\x09\x01\xF7"),     # GM reset
+              (10, b"\x92\x48\x60"), (0, b"\xF7\x02\x01\x02"),  # escape sysex
+              (5, b"\x92\x4A\x61"),
+              (100, b"\x92\x48\x62"),                   # restart a held note
+              (0, meta(0x21, b"\x00")),                 # MIDI port (ignored)
+              (200, b"\x82\x48\x00"), (0, b"\xF3\x02"), # song select (system common)
+              (300, b"\x92\x4C\x10"), (0, b"\x82\x4C\x00"),  # zero-length note (dropped)
+              (0, b"\x92\x4F\x50"),                     # dangling at end of track
+              (500, END)]),
+        mtrk([(0, meta(0x03, b"Bass")), (0, timesig(6, 3)),
+              (2400, b"\x93\x24\x7F"), (480, b"\x83\x24\x40"),
+              (0, b"\x9F\x26\x20"), (7, b"\x26\x00"), (0, END)]),
+    ]),
+    # Zero-delta TS/tempo stacks and notes overlapping on many channels.
+    "dense_channels": smf(1, 24, [
+        mtrk([(0, tempo(1000000)), (0, tempo(250000)), (0, timesig(5, 2)), (0, timesig(2, 1)),
+              (48, timesig(9, 3)), (0, END)]),
+        mtrk([(0, bytes([0x90 | ch, 60 + ch, 1 + ch])) for ch in range(16)]
+             + [(3, bytes([0x80 | ch, 60 + ch, 0])) for ch in range(0, 16, 2)]
+             + [(0, END)]),
+    ]),
+}
+
+
+def random_song(seed):
+    """Multi-track song written by mido (no running status, many event kinds)."""
+    rng = random.Random(seed)
+    mid = mido.MidiFile(type=1, ticks_per_beat=rng.choice([24, 96, 480, 960]))
+    conductor = mido.MidiTrack()
+    mid.tracks.append(conductor)
+    for _ in range(rng.randint(0, 6)):
+        conductor.append(mido.MetaMessage("set_tempo", tempo=rng.randint(200000, 1500000),
+                                          time=rng.randint(0, 4000)))
+        if rng.random() < 0.5:
+            conductor.append(mido.MetaMessage("time_signature", numerator=rng.randint(1, 13),
+                                              denominator=rng.choice([2, 4, 8, 16]), time=0))
+    for t in range(rng.randint(1, 4)):
+        tr = mido.MidiTrack()
+        tr.append(mido.MetaMessage("track_name", name=f"T{t}", time=0))
+        held = []
+        for _ in range(rng.randint(0, 300)):
+            dt = rng.choice([0, 0, 1, 10, 120, 480])
+            r = rng.random()
+            ch = rng.randrange(16)
+            if r < 0.45:
+                note = rng.randrange(128)
+                tr.append(mido.Message("note_on", note=note, velocity=rng.randint(1, 127), channel=ch, time=dt))
+                held.append((note, ch))
+            elif r < 0.8 and held:
+                note, ch = held.pop(rng.randrange(len(held)))
+                if rng.random() < 0.5:
+                    tr.append(mido.Message("note_on", note=note, velocity=0, channel=ch, time=dt))
+                else:
+                    tr.append(mido.Message("note_off", note=note, velocity=rng.randrange(128), channel=ch, time=dt))
+            elif r < 0.85:
+                tr.append(mido.Message("control_change", control=rng.randrange(120), value=rng.randrange(128),
+                                       channel=ch, time=dt))
+            elif r < 0.9:
+                tr.append(mido.Message("sysex", data=[rng.randrange(128) for _ in range(rng.randint(0, 20))],
+                                       time=dt))
+            elif r < 0.95:
+                tr.append(mido.Message("pitchwheel", pitch=rng.randint(-8192, 8191), channel=ch, time=dt))
+            else:
+                tr.append(mido.MetaMessage("marker", text="m", time=dt))
+        mid.tracks.append(tr)
+    return mid
+
+
+# -------- comparison --------
+def _load(path, parser):
+    doc = MidiDoc()
+    doc.load(path, parser=parser)
+    return doc
+
+
+def assert_same_doc(path):
+    native, ref = _load(path, "native"), _load(path, "mido")
+    assert native.ticks_per_beat == ref.ticks_per_beat
+    assert native.total_ticks == ref.total_ticks
+    assert [td.name for td in native.tracks] == [td.name for td in ref.tracks]
+    for a, b in zip(native.tracks, ref.tracks):
+        na, nb = a.notes, b.notes
+        for col in ("start_tick", "end_tick", "pitch", "velocity", "channel", "start_beats", "end_beats"):
+            assert list(getattr(na, col)) == list(getattr(nb, col)), (a.name, col)
+        assert (a.pitch_min, a.pitch_max) == (b.pitch_min, b.pitch_max)
+    assert native.ts_changes == ref.ts_changes
+    assert native.ts_segments == ref.ts_segments
+    assert list(native.beat_grid.bars) == list(ref.beat_grid.bars)
+    assert native.tempo_segments == ref.tempo_segments
+    beats = [native.total_beats * k / 37.0 for k in range(40)]
+    for beat in beats:
+        us = native.beat_to_us(beat)
+        assert us == ref.beat_to_us(beat)
+        assert native.us_to_beat(us) == ref.us_to_beat(us)
+    assert list(native.beats_to_us_many(beats)) == list(ref.beats_to_us_many(beats))
+
+
+@pytest.mark.parametrize("name", sorted(CRAFTED))
+def test_crafted(tmp_path, name):
+    path = tmp_path / f"{name}.mid"
+    path.write_bytes(CRAFTED[name])
+    assert_same_doc(str(path))
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_random_mido_songs(tmp_path, seed):
+    path = tmp_path / f"song{seed}.mid"
+    random_song(seed).save(str(path))
+    assert_same_doc(str(path))
+
+
+def _corpus():
+    root = os.environ.get("M2F_TEST_MIDI_DIR")
+    if not root:
+        return []
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(root)
+                  for f in files if f.lower().endswith((".mid", ".midi")))
+
+
+@pytest.mark.parametrize("path", _corpus())
+def test_corpus(path):
+    try:
+        _load(path, "native")
+    except Exception:
+        # Broken files must be rejected by both readers
+        with pytest.raises(Exception):
+            _load(path, "mido")
+        return
+    assert_same_doc(path)
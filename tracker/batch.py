@@ -0,0 +1,209 @@
+# tracker/batch.py
+"""Headless MIDI -> Furnace pattern conversion.
+
+Runs MidiDoc.load + build_furnace_clipboard_text over files and directories
+without touching pygame, OpenGL or imgui, fanning files out over a process
+pool. Entry points: `python midi2fur.py batch ...` or `python -m tracker.batch ...`.
+
+per_track mode writes one <name>.txt per MIDI file. spillover needs a single
+source track, so it writes one <name>.trackNN.txt per track with notes.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import List, Optional, Sequence, Tuple
+
+from tracker.types import FurnaceConfig
+from tracker.export import build_furnace_clipboard_text
+from tracker.voices import STEAL_POLICIES
+
+MIDI_EXTS = (".mid", ".midi")
+
+# (src, outputs, notes, bytes_in, seconds, error)
+Result = Tuple[str, List[str], int, int, float, Optional[str]]
+
+
+def collect_inputs(paths: Sequence[str]) -> List[Tuple[str, str]]:
+    """Expand files/directories into (src, relative output stem) pairs."""
+    out: List[Tuple[str, str]] = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, files in os.walk(p):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(MIDI_EXTS):
+                        src = os.path.join(root, name)
+                        out.append((src, os.path.splitext(os.path.relpath(src, p))[0]))
+        else:
+            out.append((p, os.path.splitext(os.path.basename(p))[0]))
+    return out
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
+def convert_file(src: str, out_stem: str, cfg_dict: dict, parser: str = "native") -> Result:
+    """Convert one MIDI file. Runs inside pool workers, so it never raises."""
+    # Imported here so the GUI-free path stays cheap for workers
+    from app.midi_doc import MidiDoc
+    from app.state import AppState
+
+    t0 = time.perf_counter()
+    outputs: List[str] = []
+    notes = 0
+    try:
+        size = os.path.getsize(src)
+        doc = MidiDoc()
+        doc.load(src, parser=parser)
+        cfg = FurnaceConfig(**cfg_dict)
+        state = AppState(midi=doc)
+        notes = sum(len(td.notes) for td in doc.tracks)
+
+        if cfg.polyphony_mode == "spillover":
+            for ti, td in enumerate(doc.tracks):
+                if len(td.notes) == 0:
+                    continue
+                state.selection.clear()
+                state.selection.select_track(ti)
+                ok, text = build_furnace_clipboard_text(state, cfg)
+                if not ok:
+                    raise ValueError(text)
+                dst = f"{out_stem}.track{ti:02d}.txt"
+                _write(dst, text)
+                outputs.append(dst)
+        else:
+            ok, text = build_furnace_clipboard_text(state, cfg)
+            if not ok:
+                raise ValueError(text)
+            dst = out_stem + ".txt"
+            _write(dst, text)
+            outputs.append(dst)
+    except Exception as e:
+        return src, outputs, notes, 0, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+    return src, outputs, notes, size, time.perf_counter() - t0, None
+
+
+def _convert_job(job: Tuple[str, str, dict, str]) -> Result:
+    return convert_file(*job)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    d = FurnaceConfig()
+    ap = argparse.ArgumentParser(
+        prog="midi2fur.py batch",
+        description="Convert MIDI files to Furnace pattern text without the GUI.",
+    )
+    ap.add_argument("inputs", nargs="+", help="MIDI files and/or directories (searched recursively)")
+    ap.add_argument("-o", "--out-dir", default=None,
+                    help="output directory (default: next to each input)")
+    ap.add_argument("-j", "--jobs", type=int, default=0,
+                    help="worker processes (default: all cores; 1 = no pool)")
+    ap.add_argument("--parser", choices=("native", "mido"), default="native")
+    ap.add_argument("--mode", choices=("per_track", "spillover"), default=d.polyphony_mode,
+                    help="channel-per-track, or spillover (one output per track)")
+    ap.add_argument("--spillover-count", type=int, default=d.spillover_count)
+    ap.add_argument("--steal", choices=tuple(STEAL_POLICIES), default=d.spillover_steal,
+                    help="spillover: voice to cut when every channel is sounding")
+    ap.add_argument("--lpq", type=int, default=d.lines_per_quarter, help="lines per quarter note")
+    ap.add_argument("--transpose", type=int, default=d.transpose_octaves, help="octaves")
+    ap.add_argument("--instrument", default=None, metavar="HEX",
+                    help="write this instrument in every note-on")
+    ap.add_argument("--velocity", action="store_true", help="map velocity to the volume column")
+    ap.add_argument("--velocity-max", default=d.velocity_max_hex, metavar="HEX")
+    ap.add_argument("--note-off", choices=("OFF", "REL"), default=d.note_off_mode)
+    ap.add_argument("-q", "--quiet", action="store_true", help="only print failures and the summary")
+    return ap
+
+
+def config_from_args(args: argparse.Namespace) -> FurnaceConfig:
+    cfg = FurnaceConfig(
+        lines_per_quarter=args.lpq,
+        transpose_octaves=args.transpose,
+        instrument_hex=args.instrument or "00",
+        define_instrument=args.instrument is not None,
+        velocity_enabled=args.velocity,
+        velocity_max_hex=args.velocity_max,
+        note_off_mode=args.note_off,
+        polyphony_mode=args.mode,
+        spillover_count=args.spillover_count,
+        spillover_steal=args.steal,
+    )
+    cfg.sanitize()
+    return cfg
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as e:
+        print(f"Invalid export settings: {e}", file=sys.stderr)
+        return 2
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No MIDI files found.", file=sys.stderr)
+        return 2
+
+    cfg_dict = asdict(cfg)
+    jobs = []
+    for src, rel_stem in inputs:
+        if args.out_dir:
+            stem = os.path.join(args.out_dir, rel_stem)
+        else:
+            stem = os.path.splitext(src)[0]
+        jobs.append((src, stem, cfg_dict, args.parser))
+
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    workers = min(workers, len(jobs))
+
+    t0 = time.perf_counter()
+    ok_files = failed = total_notes = total_bytes = total_outputs = 0
+    if workers <= 1:
+        results = map(_convert_job, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        # Many small files: batch them so IPC does not dominate
+        chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+        results = pool.map(_convert_job, jobs, chunksize=chunksize)
+    try:
+        for src, outputs, notes, nbytes, secs, error in results:
+            if error is not None:
+                failed += 1
+                print(f"FAIL {src}: {error}", file=sys.stderr)
+                continue
+            ok_files += 1
+            total_notes += notes
+            total_bytes += nbytes
+            total_outputs += len(outputs)
+            if not args.quiet:
+                print(f"ok   {src} -> {', '.join(outputs)} ({notes} notes, {secs * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        return 130
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = max(1e-9, time.perf_counter() - t0)
+    print(
+        f"Converted {ok_files}/{len(jobs)} files ({failed} failed) -> {total_outputs} outputs "
+        f"in {elapsed:.2f} s with {workers} worker{'s' if workers != 1 else ''}: "
+        f"{ok_files / elapsed:.1f} files/s, {total_notes / elapsed:,.0f} notes/s, "
+        f"{total_bytes / elapsed / (1024 * 1024):.2f} MiB/s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,28 @@
 # tracker/export.py
 import math
-from typing import List, Tuple, Dict, Set
+import time
+import weakref
+from dataclasses import astuple
+from typing import List, Optional, Tuple, Dict, Set
 from tracker.types import FurnaceConfig
+from tracker.voices import VoiceAllocator
 
 NOTE_NAMES = ["C","C#","D","D#","E","F","F#","G","G#","A","A#","B"]
 
-def _midi_to_name_oct(note: int, transpose_octaves: int) -> Tuple[str, str, int]:
+def _midi_to_name_oct(note: int, transpose_octaves: int) -> Tuple[str, str, str]:
+    """(letter, accidental, octave digit) of a transposed MIDI note.
+
+    MIDI 0..11 are octave -1, which Furnace writes like its other negative
+    octaves: lowercase letter, "_" or "+", then the octave without sign
+    ("c_1", "c+1"), so every note name is 3 characters.
+    """
     n = max(0, min(127, int(note) + 12 * transpose_octaves))
     name = NOTE_NAMES[n % 12]
-    letter = name[0]
-    accidental = '#' if (len(name) >= 2 and name[1] == '#') else '-'
+    sharp = len(name) >= 2 and name[1] == '#'
     octave = n // 12 - 1
-    return letter, accidental, octave
+    if octave < 0:
+        return name[0].lower(), '+' if sharp else '_', str(-octave)
+    return name[0], '#' if sharp else '-', str(octave)
 
 def _vol_hex(vel: int, cfg: FurnaceConfig) -> str:
     if not cfg.velocity_enabled:
@@ -44,39 +55,83 @@ def _off_cell(cfg: FurnaceConfig) -> str:
 def _blank_cell() -> str:
     return "..........."  # 11 dots
 
+CELL_W = 11             # characters per pattern cell
+_STRIDE = CELL_W + 1    # cell + "|"
+_DOT = ord(".")
+
+class _PatternGrid:
+    """rows x chans pattern cells in one preallocated bytearray.
+
+    Each row is chans * (11-byte cell + "|") plus "\n", prefilled with blank
+    cells, so a write is one slice assignment and text() decodes the whole
+    pattern once. Every non-blank cell starts with a letter (note name, OFF,
+    REL), so is_blank() only reads the first byte.
+    """
+    __slots__ = ("buf", "row_w")
+
+    def __init__(self, rows: int, chans: int):
+        self.row_w = chans * _STRIDE + 1
+        self.buf = bytearray((_blank_cell().encode("ascii") + b"|") * chans + b"\n") * rows
+
+    def is_blank(self, line: int, ch: int) -> bool:
+        return self.buf[line * self.row_w + ch * _STRIDE] == _DOT
+
+    def put(self, line: int, ch: int, cell: bytes):
+        # A cell of any other width would shift every later cell and row
+        assert len(cell) == CELL_W, cell
+        o = line * self.row_w + ch * _STRIDE
+        self.buf[o:o + CELL_W] = cell
+
+    def text(self) -> str:
+        return self.buf[:-1].decode("ascii")   # rows joined by "\n", no trailing newline
+
+class _NoteOnCells:
+    """Encoded note-on cells for one export, built once per (pitch, velocity)."""
+    __slots__ = ("cfg", "cache")
+
+    def __init__(self, cfg: FurnaceConfig):
+        self.cfg = cfg
+        self.cache: Dict[Tuple[int, int], bytes] = {}
+
+    def get(self, pitch: int, vel: int) -> bytes:
+        if not self.cfg.velocity_enabled:
+            vel = 0  # the cell does not depend on velocity
+        cell = self.cache.get((pitch, vel))
+        if cell is None:
+            cell = self.cache[(pitch, vel)] = _note_on_cell(pitch, vel, self.cfg).encode("ascii")
+        return cell
+
 def _quantize_beats_to_line(beat: float, lpq: int) -> int:
     return int(round(beat * lpq))
 
-def _gather_notes(state, cfg: FurnaceConfig):
+def _gather_notes(state, cfg: FurnaceConfig, loaded_only: bool = False):
     """Return:
        items: list[(ti, sl, el, pitch, vel)]
        min_line, max_line: int (exclusive end)
        used_tracks: sorted list of track indices used
        by_track: dict[ti] -> list[(sl, el, pitch, vel)]
+    loaded_only: leave out lazy tracks that have not been decoded yet
     """
-    tpq = state.midi.ticks_per_beat or 480
     lpq = max(1, int(cfg.lines_per_quarter))
     items: List[Tuple[int,int,int,int,int]] = []
     used: Set[int] = set()
     by_track: Dict[int, List[Tuple[int,int,int,int]]] = {}
 
-    if state.selected_notes:
-        src = list(state.selected_notes)
-    else:
-        src = [(ti, ni) for ti, td in enumerate(state.midi.tracks) for ni, _ in enumerate(td.notes)]
-
-    for (ti, ni) in src:
-        td = state.midi.tracks[ti]
-        n = td.notes[ni]
-        sb = n.start_tick / tpq
-        eb = n.end_tick  / tpq
-        sl = _quantize_beats_to_line(sb, lpq)
-        el = _quantize_beats_to_line(eb, lpq)
-        if el <= sl:
-            el = sl + 1  # ensure >= 1 line
-        items.append((ti, sl, el, n.pitch, n.velocity))
-        used.add(ti)
-        by_track.setdefault(ti, []).append((sl, el, n.pitch, n.velocity))
+    sel = state.selection
+    doc = state.midi
+    for ti in (sel.tracks if sel else range(len(doc.tracks))):
+        if loaded_only and not doc.tracks[ti].loaded:
+            continue
+        notes = doc.track_notes(ti)
+        for ni in (sel.indices(ti) if sel else range(len(notes))):
+            sl = _quantize_beats_to_line(notes.start_beats[ni], lpq)
+            el = _quantize_beats_to_line(notes.end_beats[ni], lpq)
+            if el <= sl:
+                el = sl + 1  # ensure >= 1 line
+            pitch, vel = notes.pitch[ni], notes.velocity[ni]
+            items.append((ti, sl, el, pitch, vel))
+            used.add(ti)
+            by_track.setdefault(ti, []).append((sl, el, pitch, vel))
 
     if not items:
         return [], 0, 0, [], {}
@@ -85,24 +140,16 @@ def _gather_notes(state, cfg: FurnaceConfig):
     max_l = max(el for _, _, el, _, _ in items)
     return items, min_l, max_l, sorted(used), by_track
 
-def _max_concurrency(intervals: List[Tuple[int,int]]) -> int:
-    """Given (start,end) line intervals, return peak active overlap."""
-    events: List[Tuple[int,int]] = []
-    for sl, el in intervals:
-        events.append((sl, +1))
-        events.append((el, -1))
-    events.sort()
-    cur = 0
-    peak = 0
-    for _, d in events:
-        cur += d
-        peak = max(peak, cur)
-    return peak
-
-def build_furnace_clipboard_text(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
-    """Return (ok, text_or_error). On success, ok=True and text is the clipboard payload."""
+def build_furnace_clipboard_text(state, cfg: FurnaceConfig, loaded_only: bool = False) -> Tuple[bool, str]:
+    """Return (ok, text_or_error). On success, ok=True and text is the clipboard payload.
+
+    loaded_only: skip lazy tracks that are not decoded yet (the live preview
+    must not decode a whole lazy document on the UI thread).
+    """
     cfg.sanitize()
-    items, min_line, max_line, used_tracks, by_track = _gather_notes(state, cfg)
+    items, min_line, max_line, used_tracks, by_track = _gather_notes(state, cfg, loaded_only)
+    if state.midi.stale:
+        return False, "The MIDI file changed on disk; reload it before exporting."
     header = "org.tildearrow.furnace - Pattern Data (219)\n0\n"
 
     if not items:
@@ -110,6 +157,8 @@ def build_furnace_clipboard_text(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
 
     total_lines = max(1, max_line - min_line)  # rows
     lpq = max(1, int(cfg.lines_per_quarter))
+    note_on = _NoteOnCells(cfg)
+    off_cell = _off_cell(cfg).encode("ascii")
 
     if cfg.polyphony_mode == "spillover":
         # Require single track selection
@@ -117,57 +166,40 @@ def build_furnace_clipboard_text(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
             return False, ("Spillover export requires notes from a single track.\n"
                            f"{len(used_tracks)} tracks detected in the selection.")
         ti = used_tracks[0] if used_tracks else 0
-        track_items = by_track.get(ti, [])
-        # channels needed = concurrency (clamped to spillover_count)
-        intervals = [(sl, el) for (sl, el, _, _) in track_items]
-        need = max(1, _max_concurrency(intervals))
-        chans = max(1, min(int(cfg.spillover_count), need))
-
-        # grid: rows x chans
-        grid: List[List[str]] = [[_blank_cell() for _ in range(chans)] for __ in range(total_lines)]
 
-        # spillover placement with stomp
-        chan_ends = [ -10**9 for _ in range(chans) ]   # end line per subchannel
-        off_events: Dict[int, List[int]] = {}          # line -> list[subch]
-
-        # sort by (start, end, pitch) for stable placement
+        # Allocate voices in (start, end, pitch) order for stable placement. The
+        # grid width is the number of channels that sounded, min(spillover_count,
+        # peak overlap), so the cells are collected first and written after.
+        voices = VoiceAllocator(cfg.spillover_count, cfg.spillover_steal)
+        placed: List[Tuple[int, int, bytes]] = []     # (line, subch, note-on cell)
+        offs: List[Optional[Tuple[int, int]]] = []    # (line, subch) per note; None once cut
+        sounding: Dict[int, int] = {}                  # subch -> index in offs of its latest note
         for (tix, sl, el, pitch, vel) in sorted(items, key=lambda x: (x[1], x[2], x[3])):
             if tix != ti:
                 continue
             sl_rel = sl - min_line
             el_rel = el - min_line
-            # find free subch
-            free = None
-            for j in range(chans):
-                if chan_ends[j] <= sl_rel:
-                    free = j
-                    break
-            if free is None:
-                # stomp oldest (smallest end)
-                j = min(range(chans), key=lambda k: chan_ends[k])
-                # emit OFF at sl_rel unless a note-on is here already
-                if grid[sl_rel][j] == _blank_cell():
-                    grid[sl_rel][j] = _off_cell(cfg)
-                chan_ends[j] = sl_rel
-                free = j
-
-            # place note-on
-            grid[sl_rel][free] = _note_on_cell(pitch, vel, cfg)
+            sub, stolen = voices.allocate(sl_rel, el_rel, vel)
+            if stolen:
+                # The new note-on cuts the stolen note, so its own OFF must go:
+                # left in place it would cut whatever sounds on the channel later
+                offs[sounding[sub]] = None
+            placed.append((sl_rel, sub, note_on.get(pitch, vel)))
             # schedule OFF at el_rel if no new note-on overwrites it
-            off_line = max(0, min(el_rel, total_lines - 1))
-            off_events.setdefault(off_line, []).append(free)
-            chan_ends[free] = el_rel  # keep true end for channel availability
+            sounding[sub] = len(offs)
+            offs.append((max(0, min(el_rel, total_lines - 1)), sub))
+
+        # grid: rows x chans
+        grid = _PatternGrid(total_lines, max(1, voices.used))
+        for line, sub, cell in placed:
+            grid.put(line, sub, cell)
 
         # emit OFFs
-        for line, subs in off_events.items():
-            for sub in subs:
-                if 0 <= line < total_lines and grid[line][sub] == _blank_cell():
-                    grid[line][sub] = _off_cell(cfg)
+        for off in offs:
+            if off is not None and grid.is_blank(*off):
+                grid.put(off[0], off[1], off_cell)
 
-        # compose
-        bar = "|"
-        out_lines = ["".join(cell + bar for cell in row) for row in grid]
-        return True, header + "\n".join(out_lines)
+        return True, header + grid.text()
 
     # ----- per_track (channel-per-track) -----
     # Only include channels for tracks that actually have notes in this export
@@ -175,10 +207,9 @@ def build_furnace_clipboard_text(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
     track_to_ch = {ti: idx for idx, ti in enumerate(track_order)}
     chans = len(track_order)
 
-    grid: List[List[str]] = [[_blank_cell() for _ in range(chans)] for __ in range(total_lines)]
+    grid = _PatternGrid(total_lines, chans)
 
     # Count starts/ends per track, per line
-    from typing import Dict
     starts_by_track: Dict[int, Dict[int, int]] = {ti: {} for ti in track_order}
     ends_by_track:   Dict[int, Dict[int, int]] = {ti: {} for ti in track_order}
 
@@ -190,37 +221,88 @@ def build_furnace_clipboard_text(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
         sl_rel = sl - min_line
         el_rel = el - min_line
         # place note-on (latest wins if multiple at same line)
-        grid[sl_rel][ch] = _note_on_cell(pitch, vel, cfg)
+        grid.put(sl_rel, ch, note_on.get(pitch, vel))
         # record start
         starts_by_track[ti][sl_rel] = starts_by_track[ti].get(sl_rel, 0) + 1
         # clamp OFF line to last row (so boundary notes still get an OFF)
         off_line = max(0, min(el_rel, total_lines - 1))
         ends_by_track[ti][off_line] = ends_by_track[ti].get(off_line, 0) + 1
 
-    # Emit OFF/REL when the last overlap ends and no new start occurs on that line
+    # Emit OFF/REL when the last overlap ends and no new start occurs on that line.
+    # The overlap count only changes on lines with events, so sweep those in order.
     for ti in track_order:
         ch = track_to_ch[ti]
+        starts, ends = starts_by_track[ti], ends_by_track[ti]
         cur = 0  # active overlapping notes on this track
-        for line in range(total_lines):
-            s = starts_by_track[ti].get(line, 0)
-            e = ends_by_track[ti].get(line, 0)
+        for line in sorted(starts.keys() | ends.keys()):
+            s = starts.get(line, 0)
+            e = ends.get(line, 0)
             cur += s
             cur_after = cur - e
             # If everything ended on this line AND nothing starts on this line,
             # we need an OFF/REL (unless a note-on already occupies the cell).
             if e > 0 and cur_after == 0 and s == 0:
-                if grid[line][ch] == _blank_cell():
-                    grid[line][ch] = _off_cell(cfg)
+                if grid.is_blank(line, ch):
+                    grid.put(line, ch, off_cell)
             cur = cur_after
 
-    # compose
-    bar = "|"
-    out_lines = ["".join(cell + bar for cell in row) for row in grid]
-    return True, header + "\n".join(out_lines)
+    return True, header + grid.text()
+
+class ExportCache:
+    """Memoized build_furnace_clipboard_text for the live preview and copy.
+
+    The result is keyed on the document (a weak reference, so a replaced
+    document is not kept alive, + version), the selection version and the
+    sanitized config values; anything else returns the cached (ok, text)
+    pair. hits/builds/last_build_ms feed the Diagnostics window. rows() gives
+    the pattern rows as a list, so the preview can draw only the rows in view.
+    """
+    def __init__(self):
+        self._key = None
+        self._result: Tuple[bool, str] = (False, "")
+        self._rows: List[str] = []
+        self._rows_ready = True
+        self.hits = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.builds
+        return self.hits / total if total else 0.0
+
+    def get(self, state, cfg: FurnaceConfig, stale_ok: bool = False,
+            loaded_only: bool = False) -> Tuple[bool, str]:
+        """stale_ok: return the last result as is if there is one (the preview
+        does this while a marquee drag changes the selection every frame).
+        loaded_only: as for build_furnace_clipboard_text (preview only)."""
+        cfg.sanitize()
+        doc = state.midi
+        key = (weakref.ref(doc), doc.version, state.selection.version, astuple(cfg),
+               doc.loaded_track_count if loaded_only else None)
+        if key == self._key or (stale_ok and self._key is not None):
+            self.hits += 1
+            return self._result
+        t0 = time.perf_counter()
+        self._result = build_furnace_clipboard_text(state, cfg, loaded_only)
+        self.last_build_ms = (time.perf_counter() - t0) * 1000.0
+        self.builds += 1
+        self._key = key
+        self._rows_ready = False
+        return self._result
+
+    def rows(self) -> List[str]:
+        """Pattern rows of the cached text (header lines excluded), split once per build."""
+        if not self._rows_ready:
+            ok, text = self._result
+            body = text.split("\n", 2)[2] if ok else ""   # after the two header lines
+            self._rows = body.split("\n") if body else []
+            self._rows_ready = True
+        return self._rows
 
 def copy_selection_to_clipboard(state, cfg: FurnaceConfig) -> Tuple[bool, str]:
     """(ok, message). On success, message='Copied'. On error, message explains why."""
-    ok, text_or_error = build_furnace_clipboard_text(state, cfg)
+    ok, text_or_error = state.export_cache.get(state, cfg)
     if not ok:
         return False, text_or_error
 
@@ -1,5 +1,6 @@
 # tracker/types.py
 from dataclasses import dataclass
+from tracker.voices import DEFAULT_STEAL_POLICY, STEAL_POLICIES
 
 @dataclass
 class FurnaceConfig:
@@ -12,6 +13,7 @@ class FurnaceConfig:
     note_off_mode: str = "REL"
     polyphony_mode: str = "per_track"
     spillover_count: int = 3
+    spillover_steal: str = DEFAULT_STEAL_POLICY   # voice to cut when all spillover channels sound
 
     def sanitize(self):
         self.instrument_hex = f"{int(self.instrument_hex or '0', 16) & 0xFF:02X}"
@@ -22,3 +24,5 @@ class FurnaceConfig:
         if self.polyphony_mode not in ("per_track", "spillover"):
             self.polyphony_mode = "per_track"
         self.spillover_count = max(1, min(16, int(self.spillover_count)))
+        if self.spillover_steal not in STEAL_POLICIES:
+            self.spillover_steal = DEFAULT_STEAL_POLICY
@@ -0,0 +1,80 @@
+# tracker/voices.py
+"""Voice allocation for spillover export.
+
+VoiceAllocator hands out up to `voices` channels to notes fed in start order.
+A note gets the lowest-numbered idle channel (free-list kept as a min-heap);
+channels come back when their note ends (min-heap of end lines). When all
+channels are sounding, the steal policy picks the voice to cut:
+
+  shortest_remaining  the voice whose note ends first (default)
+  oldest              the voice whose note started first
+  lowest_velocity     the quietest voice
+
+Ties go to the lower channel. Each note costs O(log k) for k voices; stale
+heap entries left by steals and releases are compacted away once they
+outnumber the live ones. `used` is the number of channels that ever sounded,
+which equals min(voices, peak overlap), so callers get the concurrency from
+the same sweep.
+"""
+from heapq import heapify, heappop, heappush
+from typing import Callable, Dict, List, Tuple
+
+# policy name -> key(start, end, velocity); the sounding voice with the smallest key is stolen
+STEAL_POLICIES: Dict[str, Callable[[int, int, int], int]] = {
+    "shortest_remaining": lambda start, end, vel: end,
+    "oldest": lambda start, end, vel: start,
+    "lowest_velocity": lambda start, end, vel: vel,
+}
+DEFAULT_STEAL_POLICY = "shortest_remaining"
+
+
+class VoiceAllocator:
+    def __init__(self, voices: int, policy: str = DEFAULT_STEAL_POLICY):
+        self.voices = max(1, int(voices))
+        self._key = STEAL_POLICIES[policy]
+        self._free: List[int] = list(range(self.voices))    # idle channels (sorted = heap)
+        self._ends: List[Tuple[int, int, int]] = []          # (end, ch, gen) of sounding voices
+        self._steal: List[Tuple[int, int, int]] = []         # (policy key, ch, gen)
+        self._gen = [0] * self.voices   # bumped when a channel's note stops; older entries are stale
+        self.used = 0
+
+    def allocate(self, start: int, end: int, velocity: int = 0) -> Tuple[int, bool]:
+        """Channel for a note sounding [start, end). Notes must come in start order.
+
+        Returns (channel, stolen); stolen is True when the channel's previous
+        note was still sounding and is cut at `start`.
+        """
+        ends, gen = self._ends, self._gen
+        while ends and ends[0][0] <= start:
+            _, ch, g = heappop(ends)
+            if g == gen[ch]:
+                gen[ch] += 1
+                heappush(self._free, ch)
+
+        if self._free:
+            ch = heappop(self._free)
+            stolen = False
+            if ch >= self.used:
+                self.used = ch + 1
+        else:
+            steal = self._steal
+            while True:
+                _, ch, g = heappop(steal)
+                if g == gen[ch]:
+                    break
+            gen[ch] += 1
+            stolen = True
+
+        g = gen[ch]
+        heappush(ends, (end, ch, g))
+        heappush(self._steal, (self._key(start, end, velocity), ch, g))
+        if len(ends) + len(self._steal) > 4 * self.voices:
+            self._compact()
+        return ch, stolen
+
+    def _compact(self):
+        gen = self._gen
+        self._ends = [e for e in self._ends if e[2] == gen[e[1]]]
+        self._steal = [e for e in self._steal if e[2] == gen[e[1]]]
+        heapify(self._ends)
+        heapify(self._steal)
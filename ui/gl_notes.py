@@ -0,0 +1,343 @@
+# ui/gl_notes.py
+"""GPU note layer for the piano roll.
+
+Notes of each track live in a vertex buffer (one quad per note, built once
+per NoteStore); scroll and zoom are shader uniforms and selection is a
+per-note colour attribute. The layer renders into an offscreen texture that
+the timeline composites with draw_list.add_image, so it sits between the row
+backgrounds and the grid/marquee/playhead overlays exactly like the imgui
+rectangles it replaces.
+
+Works on GL 2.1+ (including Mesa llvmpipe). If shaders, buffer objects or
+framebuffer objects are missing, `note_layer()` returns None and the timeline
+keeps drawing notes through imgui.
+"""
+import ctypes
+from array import array
+from typing import Dict, Optional, Tuple
+
+import OpenGL.GL as gl
+
+_VERT_120 = """
+#version 120
+attribute vec4 a_note;   // start_beats, end_beats, pitch, corner (cx + 2*cy)
+attribute float a_sel;
+uniform vec2 u_scale;    // px_per_beat, note_height
+uniform vec2 u_origin;   // x of beat 0, y of the top of pitch 127 (px, layer space)
+uniform vec2 u_size;     // layer size (px)
+varying float v_sel;
+varying vec2 v_px;       // position inside the note rect (px)
+varying vec2 v_wh;       // note rect size (px)
+void main() {
+    float cx = mod(a_note.w, 2.0);
+    float cy = floor(a_note.w / 2.0);
+    float w = (a_note.y - a_note.x) * u_scale.x;
+    float h = u_scale.y - 1.0;
+    float x = u_origin.x + a_note.x * u_scale.x + cx * w;
+    float y = u_origin.y + (127.0 - a_note.z) * u_scale.y + cy * h;
+    gl_Position = vec4(x / u_size.x * 2.0 - 1.0, 1.0 - y / u_size.y * 2.0, 0.0, 1.0);
+    v_sel = a_sel;
+    v_px = vec2(cx * w, cy * h);
+    v_wh = vec2(w, h);
+}
+"""
+
+_FRAG_120 = """
+#version 120
+uniform vec4 u_fill;
+uniform vec4 u_edge;
+uniform vec4 u_sel_fill;
+uniform vec4 u_sel_edge;
+varying float v_sel;
+varying vec2 v_px;
+varying vec2 v_wh;
+void main() {
+    bool edge = v_px.x < 1.0 || v_px.y < 1.0 || v_px.x > v_wh.x - 1.0 || v_px.y > v_wh.y - 1.0;
+    vec4 fill = v_sel > 0.5 ? u_sel_fill : u_fill;
+    vec4 line = v_sel > 0.5 ? u_sel_edge : u_edge;
+    gl_FragColor = edge ? line : fill;
+}
+"""
+
+
+def _core(src: str, stage: str) -> str:
+    """GLSL 1.20 -> 1.50 for core-profile contexts."""
+    src = src.replace("#version 120", "#version 150")
+    if stage == "vert":
+        src = src.replace("attribute ", "in ").replace("varying ", "out ")
+    else:
+        src = src.replace("varying ", "in ").replace("gl_FragColor", "o_color")
+        src = src.replace("void main()", "out vec4 o_color;\nvoid main()", 1)
+    return src
+
+
+# Quad corners (cx + 2*cy) as two triangles
+_CORNERS = (0.0, 1.0, 3.0, 0.0, 3.0, 2.0)
+_FLOATS_PER_NOTE = 4 * len(_CORNERS)
+
+FILL = (0.27, 0.58, 0.98, 0.95)
+EDGE = (0.05, 0.1, 0.18, 1.0)
+SEL_FILL = (0.98, 0.78, 0.28, 0.95)
+SEL_EDGE = (0.95, 0.85, 0.45, 1.0)
+
+
+class _TrackBuffers:
+    __slots__ = ("notes", "vbo", "sel_vbo", "count", "sel_version")
+
+    def __init__(self, notes, vbo: int, sel_vbo: int) -> None:
+        self.notes = notes  # keeps id(notes) from being reused while cached
+        self.vbo = vbo
+        self.sel_vbo = sel_vbo
+        self.count = len(notes)
+        self.sel_version = -1
+
+
+def _compile(src: str, kind) -> int:
+    sh = gl.glCreateShader(kind)
+    gl.glShaderSource(sh, src)
+    gl.glCompileShader(sh)
+    if not gl.glGetShaderiv(sh, gl.GL_COMPILE_STATUS):
+        log = gl.glGetShaderInfoLog(sh)
+        gl.glDeleteShader(sh)
+        raise RuntimeError(f"shader compile failed: {log!r}")
+    return sh
+
+
+class GLNoteLayer:
+    def __init__(self) -> None:
+        self.program = 0
+        self.vao = 0
+        self.fbo = 0
+        self.tex = 0
+        self.size: Tuple[int, int] = (0, 0)
+        self._tracks: Dict[int, _TrackBuffers] = {}
+        self._doc_key: Optional[Tuple[int, int]] = None
+        # Work done by the last render() (diagnostics counters)
+        self.last_notes = 0
+        self.last_draw_calls = 0
+        self._build_program()
+        self._uniforms = {name: gl.glGetUniformLocation(self.program, name) for name in (
+            "u_scale", "u_origin", "u_size", "u_fill", "u_edge", "u_sel_fill", "u_sel_edge")}
+        try:
+            self.vao = int(gl.glGenVertexArrays(1))
+        except Exception:
+            self.vao = 0  # GL 2.1: attributes live in the default state
+        self.fbo = int(gl.glGenFramebuffers(1))
+
+    def _build_program(self) -> None:
+        last_err: Optional[Exception] = None
+        for vsrc, fsrc in ((_VERT_120, _FRAG_120), (_core(_VERT_120, "vert"), _core(_FRAG_120, "frag"))):
+            try:
+                vs = _compile(vsrc, gl.GL_VERTEX_SHADER)
+                fs = _compile(fsrc, gl.GL_FRAGMENT_SHADER)
+            except Exception as e:
+                last_err = e
+                continue
+            prog = gl.glCreateProgram()
+            gl.glAttachShader(prog, vs)
+            gl.glAttachShader(prog, fs)
+            gl.glBindAttribLocation(prog, 0, "a_note")
+            gl.glBindAttribLocation(prog, 1, "a_sel")
+            gl.glLinkProgram(prog)
+            gl.glDeleteShader(vs)
+            gl.glDeleteShader(fs)
+            if gl.glGetProgramiv(prog, gl.GL_LINK_STATUS):
+                self.program = prog
+                return
+            last_err = RuntimeError(f"program link failed: {gl.glGetProgramInfoLog(prog)!r}")
+            gl.glDeleteProgram(prog)
+        raise last_err or RuntimeError("no usable GLSL version")
+
+    # -------- Buffers --------
+    def _buffers_for(self, notes) -> _TrackBuffers:
+        tb = self._tracks.get(id(notes))
+        if tb is not None and tb.notes is notes:
+            return tb
+        n = len(notes)
+        verts = array("f", bytes(4 * _FLOATS_PER_NOTE * n))
+        if n:
+            cols = (array("f", notes.start_beats), array("f", notes.end_beats), array("f", notes.pitch))
+            for v, corner in enumerate(_CORNERS):
+                base = 4 * v
+                for k, col in enumerate(cols):
+                    verts[base + k::_FLOATS_PER_NOTE] = col
+                verts[base + 3::_FLOATS_PER_NOTE] = array("f", [corner]) * n
+        vbo, sel_vbo = (int(b) for b in gl.glGenBuffers(2))
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, len(verts) * 4, verts.tobytes() if n else None, gl.GL_STATIC_DRAW)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, sel_vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, 4 * len(_CORNERS) * n, bytes(4 * len(_CORNERS) * n) if n else None,
+                        gl.GL_DYNAMIC_DRAW)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        tb = _TrackBuffers(notes, vbo, sel_vbo)
+        self._tracks[id(notes)] = tb
+        return tb
+
+    def _update_selection(self, tb: _TrackBuffers, ti: int, selection) -> None:
+        if tb.sel_version == selection.version:
+            return
+        per = len(_CORNERS)
+        sel = array("f", bytes(4 * per * tb.count))
+        mask = selection.mask(ti)
+        if mask is not None and len(mask) == tb.count:
+            flags = array("f", iter(mask))  # a bytes-like initializer would be read as raw floats
+            for k in range(per):  # same flag on every vertex of a note
+                sel[k::per] = flags
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, tb.sel_vbo)
+        if tb.count:
+            gl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, len(sel) * 4, sel.tobytes())
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        tb.sel_version = selection.version
+
+    def _drop_tracks(self) -> None:
+        for tb in self._tracks.values():
+            gl.glDeleteBuffers(2, [tb.vbo, tb.sel_vbo])
+        self._tracks.clear()
+
+    # -------- Target --------
+    def _ensure_target(self, w: int, h: int) -> None:
+        if (w, h) == self.size and self.tex:
+            return
+        if self.tex:
+            gl.glDeleteTextures([self.tex])
+        self.tex = int(gl.glGenTextures(1))
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.tex)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA8, w, h, 0, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, None)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.fbo)
+        gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_TEXTURE_2D, self.tex, 0)
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"framebuffer incomplete (0x{int(status):04X})")
+        self.size = (w, h)
+
+    # -------- Frame --------
+    def render(self, doc, rows, px_per_beat: float, scroll_x_px: float, note_height: int,
+               width: int, height: int, selection) -> int:
+        """Draw notes into the layer texture and return its GL name.
+
+        rows: iterable of (track_index, note_area_y0, clip_y0, clip_y1, t0, t1)
+              in layer pixel space (y=0 at the top of the note area).
+        """
+        w, h = max(1, int(width)), max(1, int(height))
+        key = (id(doc), doc.version)
+        if key != self._doc_key:
+            self._drop_tracks()
+            self._doc_key = key
+        self._ensure_target(w, h)
+
+        prev_viewport = gl.glGetIntegerv(gl.GL_VIEWPORT)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.fbo)
+        gl.glViewport(0, 0, w, h)
+        gl.glDisable(gl.GL_BLEND)
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+        gl.glClearColor(0.0, 0.0, 0.0, 0.0)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+
+        gl.glUseProgram(self.program)
+        if self.vao:
+            gl.glBindVertexArray(self.vao)
+        u = self._uniforms
+        gl.glUniform2f(u["u_size"], float(w), float(h))
+        gl.glUniform4f(u["u_fill"], *FILL)
+        gl.glUniform4f(u["u_edge"], *EDGE)
+        gl.glUniform4f(u["u_sel_fill"], *SEL_FILL)
+        gl.glUniform4f(u["u_sel_edge"], *SEL_EDGE)
+        gl.glUniform2f(u["u_scale"], float(px_per_beat), float(note_height))
+        gl.glEnableVertexAttribArray(0)
+        gl.glEnableVertexAttribArray(1)
+        per = len(_CORNERS)
+        self.last_notes = self.last_draw_calls = 0
+        try:
+            for (ti, note_area_y0, clip_y0, clip_y1, t0, t1) in rows:
+                notes = doc.track_notes(ti)
+                if not len(notes):
+                    continue
+                tb = self._buffers_for(notes)
+                self._update_selection(tb, ti, selection)
+                # Contiguous range of candidates: the index keeps end-before-t0 notes out
+                lo, hi = notes.candidate_span(t0, t1)
+                if hi <= lo:
+                    continue
+                y0 = max(0, int(clip_y0))
+                y1 = min(h, int(clip_y1) + 1)
+                if y1 <= y0:
+                    continue
+                gl.glScissor(0, h - y1, w, y1 - y0)
+                gl.glUniform2f(u["u_origin"], -float(scroll_x_px), float(note_area_y0))
+                gl.glBindBuffer(gl.GL_ARRAY_BUFFER, tb.vbo)
+                gl.glVertexAttribPointer(0, 4, gl.GL_FLOAT, gl.GL_FALSE, 0, ctypes.c_void_p(0))
+                gl.glBindBuffer(gl.GL_ARRAY_BUFFER, tb.sel_vbo)
+                gl.glVertexAttribPointer(1, 1, gl.GL_FLOAT, gl.GL_FALSE, 0, ctypes.c_void_p(0))
+                gl.glDrawArrays(gl.GL_TRIANGLES, lo * per, (hi - lo) * per)
+                self.last_notes += hi - lo
+                self.last_draw_calls += 1
+        finally:
+            gl.glDisableVertexAttribArray(0)
+            gl.glDisableVertexAttribArray(1)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+            if self.vao:
+                gl.glBindVertexArray(0)
+            gl.glUseProgram(0)
+            gl.glDisable(gl.GL_SCISSOR_TEST)
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+            gl.glViewport(*[int(v) for v in prev_viewport])
+        return self.tex
+
+    def release(self) -> None:
+        self._drop_tracks()
+        if self.tex:
+            gl.glDeleteTextures([self.tex])
+            self.tex = 0
+        if self.fbo:
+            gl.glDeleteFramebuffers(1, [self.fbo])
+            self.fbo = 0
+        if self.vao:
+            gl.glDeleteVertexArrays(1, [self.vao])
+            self.vao = 0
+        if self.program:
+            gl.glDeleteProgram(self.program)
+            self.program = 0
+
+
+_layer: Optional[GLNoteLayer] = None
+_layer_failed = False
+
+
+def note_layer() -> Optional[GLNoteLayer]:
+    """The shared layer, or None when the GL context cannot support it."""
+    global _layer, _layer_failed
+    if _layer is None and not _layer_failed:
+        try:
+            _layer = GLNoteLayer()
+        except Exception as e:
+            _layer_failed = True
+            print(f"[GL] Note layer unavailable, drawing notes with imgui: {e}")
+    return _layer
+
+
+def disable_note_layer(reason: Exception) -> None:
+    """Switch to the imgui fallback for the rest of the session."""
+    global _layer, _layer_failed
+    print(f"[GL] Note layer failed, drawing notes with imgui: {reason}")
+    if _layer is not None:
+        try:
+            _layer.release()
+        except Exception:
+            pass
+    _layer = None
+    _layer_failed = True
+
+
+def release_note_layer() -> None:
+    global _layer
+    if _layer is not None:
+        try:
+            _layer.release()
+        except Exception:
+            pass
+        _layer = None
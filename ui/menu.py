@@ -5,6 +5,17 @@ def draw_menu_bar(state, *, on_open, ini_path: str, on_copy=None):
         if imgui.begin_menu("File", True):
             if imgui.menu_item("Open…", "Ctrl+O", False, True)[0]:
                 on_open()
+            if imgui.menu_item("Parallel Loading (large files)", None, state.parallel_load, True)[0]:
+                state.parallel_load = not state.parallel_load
+            if imgui.menu_item("Lazy Track Loading (huge files)", None, state.lazy_load, True)[0]:
+                state.lazy_load = not state.lazy_load
+            if imgui.menu_item("Use Parse Cache", None, state.use_parse_cache, True)[0]:
+                state.use_parse_cache = not state.use_parse_cache
+            if imgui.menu_item("Clear Parse Cache", None, False, True)[0]:
+                removed = state.parse_cache.clear()
+                print(f"[Cache] Cleared {removed} entries from {state.parse_cache.directory}")
+            if imgui.menu_item("Reload on Change", None, state.watch_file, True)[0]:
+                state.watch_file = not state.watch_file
             imgui.separator()
             if imgui.menu_item("Quit", "Ctrl+Q", False, True)[0]:
                 state.should_quit = True
@@ -22,6 +33,15 @@ def draw_menu_bar(state, *, on_open, ini_path: str, on_copy=None):
                 state.show_info_pane = not state.show_info_pane
             if imgui.menu_item("Furnace Export Settings…", None, state.show_tracker_settings, True)[0]:
                 state.show_tracker_settings = not state.show_tracker_settings
+            if imgui.menu_item("Overview Strip", None, state.show_minimap, True)[0]:
+                state.show_minimap = not state.show_minimap
+            if imgui.menu_item("GPU Note Layer", None, state.gpu_notes, True)[0]:
+                state.gpu_notes = not state.gpu_notes
+            if imgui.menu_item("Idle Throttling", None, state.frame_pacer.enabled, True)[0]:
+                state.frame_pacer.enabled = not state.frame_pacer.enabled
+            if imgui.menu_item("Diagnostics", None, state.profiler.enabled, True)[0]:
+                state.profiler.enabled = not state.profiler.enabled
+                state.profiler.reset()
             imgui.separator()
             if imgui.menu_item("Zoom to Fit (Time)", None, False, True)[0]:
                 state.request_fit_time = True
@@ -0,0 +1,137 @@
+# ui/minimap.py
+"""Overview strip above the timeline ruler.
+
+Shows the note density of every track over the whole song (one texture row per
+track, from the document's SongOverview, which LoadJob builds off the UI thread), the
+playhead and the current viewport as a rectangle. Clicking jumps the view
+there; dragging the rectangle scrolls. A frame costs one image plus a few
+rectangles.
+
+If the texture cannot be created the strip still draws the viewport
+rectangle, so navigation keeps working.
+"""
+from typing import Optional
+
+import imgui
+import OpenGL.GL as gl
+
+from app.overview import SongOverview
+
+COLOR = (0.27, 0.58, 0.98)
+
+
+class _OverviewTexture:
+    def __init__(self) -> None:
+        self.tex = 0
+        self.overview: Optional[SongOverview] = None
+
+    def texture_for(self, doc) -> int:
+        """GL texture of the doc's overview, uploaded again when the overview changes."""
+        ov = doc.overview
+        if ov is not self.overview:
+            if not self.tex:
+                self.tex = int(gl.glGenTextures(1))
+            gl.glBindTexture(gl.GL_TEXTURE_2D, self.tex)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+            gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA8, ov.columns, len(ov.rows), 0,
+                            gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, ov.rgba(COLOR))
+            gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+            self.overview = ov
+        return self.tex
+
+    def release(self) -> None:
+        if self.tex:
+            gl.glDeleteTextures([self.tex])
+        self.tex = 0
+        self.overview = None
+
+
+_texture: Optional[_OverviewTexture] = None
+_texture_failed = False
+
+
+def release_minimap() -> None:
+    global _texture
+    if _texture is not None:
+        try:
+            _texture.release()
+        except Exception:
+            pass
+        _texture = None
+
+
+def disable_minimap_texture() -> None:
+    """Draw the viewport-only strip from now on (no GL context, e.g. headless runs)."""
+    global _texture_failed
+    release_minimap()
+    _texture_failed = True
+
+
+def _overview_texture(doc) -> int:
+    """Texture name, or 0 when textures are unavailable (viewport-only strip)."""
+    global _texture, _texture_failed
+    if _texture_failed:
+        return 0
+    try:
+        if _texture is None:
+            _texture = _OverviewTexture()
+        return _texture.texture_for(doc)
+    except Exception as e:
+        print(f"[GL] Overview texture unavailable: {e}")
+        release_minimap()
+        _texture_failed = True
+        return 0
+
+
+def draw_minimap(draw_list, state, x0: float, y0: float, x1: float, y1: float,
+                 view_w_px: float, view_h_px: float) -> None:
+    """Draw the strip in [x0, x1] x [y0, y1] and handle click/drag navigation.
+
+    view_w_px/view_h_px: size of the timeline's note area (the viewport).
+    """
+    doc = state.midi
+    w, h = x1 - x0, y1 - y0
+    total_beats = doc.total_beats
+    num_tracks = len(doc.tracks)
+    draw_list.add_rect_filled(x0, y0, x1, y1, imgui.get_color_u32_rgba(0.09, 0.09, 0.09, 1.0))
+    if w <= 2 or h <= 2 or total_beats <= 0 or num_tracks == 0:
+        return
+
+    tex = _overview_texture(doc)
+    if tex:
+        draw_list.add_image(tex, (x0, y0), (x1, y1))
+
+    # Viewport rectangle in strip space
+    ppb = max(1e-6, state.px_per_beat)
+    content_h = max(1.0, num_tracks * float(state.track_height))
+    vx0 = x0 + w * min(1.0, (state.scroll_x_px / ppb) / total_beats)
+    vx1 = x0 + w * min(1.0, ((state.scroll_x_px + view_w_px) / ppb) / total_beats)
+    vy0 = y0 + h * min(1.0, state.scroll_y_px / content_h)
+    vy1 = y0 + h * min(1.0, (state.scroll_y_px + view_h_px) / content_h)
+    vx1 = max(vx1, vx0 + 2.0)
+    vy1 = max(vy1, vy0 + 2.0)
+    draw_list.add_rect_filled(vx0, vy0, vx1, vy1, imgui.get_color_u32_rgba(1, 1, 1, 0.10))
+    draw_list.add_rect(vx0, vy0, vx1, vy1, imgui.get_color_u32_rgba(1, 1, 1, 0.75))
+    xp = x0 + w * min(1.0, max(0.0, state.playhead_beats / total_beats))
+    draw_list.add_line(xp, y0, xp, y1, imgui.get_color_u32_rgba(1.0, 0.4, 0.2, 0.95))
+
+    # Click jumps the viewport centre to the mouse; dragging keeps the grab offset
+    imgui.set_cursor_screen_position((x0, y0))
+    imgui.invisible_button("##minimap", w, h)
+    if imgui.is_item_active():
+        mx, my = imgui.get_io().mouse_pos
+        if not state.minimap_dragging:
+            state.minimap_dragging = True
+            inside = vx0 <= mx <= vx1 and vy0 <= my <= vy1
+            state.minimap_anchor = ((mx - (vx0 + vx1) * 0.5, my - (vy0 + vy1) * 0.5) if inside else (0.0, 0.0))
+        cx = mx - state.minimap_anchor[0]
+        cy = my - state.minimap_anchor[1]
+        state.scroll_x_px = max(0.0, (cx - x0) / w * total_beats * ppb - view_w_px * 0.5)
+        state.scroll_y_px = max(0.0, (cy - y0) / h * content_h - view_h_px * 0.5)
+    else:
+        state.minimap_dragging = False
+
@@ -50,9 +50,18 @@ def draw_info_window(state):
         imgui.text(f"Loaded: {state.midi.path}")
         imgui.text(f"Tracks: {len(state.midi.tracks)}   Ticks/Beat: {state.midi.ticks_per_beat}")
         imgui.text(f"Length: {state.midi.total_beats:.2f} quarter-beats")
+        loaded = state.midi.loaded_track_count
+        if loaded < len(state.midi.tracks):
+            imgui.text(f"Decoded tracks: {loaded}/{len(state.midi.tracks)} (lazy)")
         has_notes, gmin, gmax = compute_track_pitch_bounds(state)
         if has_notes:
             imgui.text(f"Pitch span across tracks: {gmin}..{gmax} ({gmax-gmin+1} semitones)")
+        stats = state.midi.stats
+        if stats.complete:
+            tot = stats.totals
+            imgui.text(f"Notes: {tot.note_count}   Peak polyphony: {tot.peak_polyphony}   Bars: {stats.num_bars}")
+            if tot.channels:
+                imgui.text("Channels: " + ", ".join(str(c + 1) for c in sorted(tot.channels)))
         if state.midi.ts_segments:
             imgui.separator()
             imgui.text("Time Signatures:")
@@ -66,3 +75,66 @@ def draw_info_window(state):
     else:
         imgui.text("No MIDI loaded.")
     imgui.end()
+
+
+def draw_profiler_window(state):
+    """Frame-time breakdown of the main loop (View -> Diagnostics)."""
+    prof = state.profiler
+    if not prof.enabled:
+        return
+    _, opened = imgui.begin("Diagnostics", True)
+    if not opened:
+        prof.enabled = False
+
+    pacer = state.frame_pacer
+    imgui.text(f"Frames: {pacer.fps:.0f}/s   CPU: {pacer.cpu_percent:.0f}%")
+    if pacer.enabled:
+        idle = "n/a" if pacer.idle_cpu_percent is None else f"{pacer.idle_cpu_percent:.1f}%"
+        imgui.text(f"Idle CPU: {idle}   (idle wake-ups {pacer.idle_fps:g}/s)")
+    else:
+        imgui.text("Idle throttling off (View menu)")
+
+    imgui.separator()
+    if prof.frame_count:
+        avg, p95, worst = prof.frame_stats()
+        imgui.text(f"Frame work over {prof.frame_count} frames: avg {avg:.2f} ms   p95 {p95:.2f}   worst {worst:.2f}")
+        history = prof.frame_history()
+        imgui.plot_lines("##frame_times", history, overlay_text=f"{history[-1]:.2f} ms",
+                         scale_min=0.0, scale_max=max(worst, 1000.0 / 60.0), graph_size=(0, 60))
+        imgui.text(f"{'stage':<16}{'avg':>8}{'p95':>8}{'worst':>8}  (ms)")
+        for stage in prof.stages:
+            s_avg, s_p95, s_worst = prof.stage_stats(stage)
+            imgui.text(f"{stage:<16}{s_avg:>8.2f}{s_p95:>8.2f}{s_worst:>8.2f}")
+        counters = prof.counters()
+        if counters:
+            imgui.separator()
+            imgui.text(f"{'counter':<20}{'last':>10}{'avg':>10}")
+            for name, last, mean in counters:
+                imgui.text(f"{name:<20}{last:>10}{mean:>10.0f}")
+    else:
+        imgui.text("Collecting…")
+    cache = state.export_cache
+    imgui.separator()
+    imgui.text(f"Export preview: {cache.builds} builds, hit rate {cache.hit_rate * 100.0:.1f}%, "
+               f"last build {cache.last_build_ms:.1f} ms")
+    if imgui.button("Reset"):
+        prof.reset()
+    imgui.end()
+
+
+def draw_load_progress_window(state):
+    job = state.load_job
+    if job is None:
+        return
+    imgui.begin("Loading")
+    imgui.text(f"Opening {job.name}")
+    label = f"{job.fraction * 100.0:.0f}%  ({job.elapsed:.1f}s)"
+    try:
+        imgui.progress_bar(job.fraction, (-1, 0), label)
+    except Exception:
+        imgui.text(label)
+    if job.cancelled:
+        imgui.text("Cancelling…")
+    elif imgui.button("Cancel"):
+        job.cancel()
+    imgui.end()
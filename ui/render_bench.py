@@ -0,0 +1,421 @@
+# ui/render_bench.py
+"""Headless render-budget harness for the piano roll.
+
+Runs ui.timeline.draw_timeline_canvas against RecordingImGui, a stand-in for
+the imgui module that counts draw-list primitives and replays scripted mouse
+and keyboard input. No window, GL context or pygame display is needed: the GPU
+note layer and the overview texture are switched off, so notes take the imgui
+path. Every scenario starts from the same view of a synthetic song (or a .mid
+file) and reports ms and primitives per frame. Entry points:
+`python midi2fur.py render-bench ...` or `python -m ui.render_bench ...`.
+
+Scenarios: pan (right-drag), zoom (Ctrl+wheel out, then in), marquee
+(left-drag across the visible rows), playback (playhead sweep, the view pages
+along), scroll (wheel down through the tracks).
+
+--budget-ms / --budget-prims turn a run into a regression check: the exit
+code is 1 when a scenario's p95 frame time or peak primitive count is over.
+"""
+import argparse
+import importlib.util
+import json
+import random
+import sys
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.midi_doc import MidiDoc
+from app.profiler import FrameProfiler
+from app.smf import SmfTrack
+from app.state import AppState
+
+SCROLLBAR = 18.0   # ui.timeline reserves this much for its scrollbars
+
+
+# -------- imgui stand-in --------
+class _DrawList:
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = dict.fromkeys(("rect_filled", "rect", "line", "text", "image"), 0)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def add_rect_filled(self, *args, **kwargs) -> None:
+        self.counts["rect_filled"] += 1
+
+    def add_rect(self, *args, **kwargs) -> None:
+        self.counts["rect"] += 1
+
+    def add_line(self, *args, **kwargs) -> None:
+        self.counts["line"] += 1
+
+    def add_text(self, *args, **kwargs) -> None:
+        self.counts["text"] += 1
+
+    def add_image(self, *args, **kwargs) -> None:
+        self.counts["image"] += 1
+
+    def __getattr__(self, name: str):
+        # Any other add_* primitive is counted under its own name
+        if not name.startswith("add_"):
+            raise AttributeError(name)
+        kind = name[4:]
+        self.counts.setdefault(kind, 0)
+
+        def add(*args, **kwargs) -> None:
+            self.counts[kind] += 1
+        return add
+
+
+class _IO:
+    def __init__(self) -> None:
+        self.mouse_pos: Tuple[float, float] = (-1.0, -1.0)
+        self.mouse_down: List[bool] = [False] * 5
+        self.mouse_wheel: float = 0.0
+        self.key_ctrl = False
+        self.key_shift = False
+        self.key_alt = False
+        self.delta_time: float = 1.0 / 60.0
+
+
+class RecordingImGui:
+    """The slice of the imgui module used by ui.timeline and ui.minimap.
+
+    The window content region is width x height at (0, 0). Scripts set `io`
+    before each frame; new_frame() derives clicks and button activity from it
+    and starts an empty draw list.
+    """
+    WINDOW_NO_SCROLLBAR = 1 << 3
+    WINDOW_NO_SCROLL_WITH_MOUSE = 1 << 4
+
+    def __init__(self, width: float, height: float) -> None:
+        self.width = float(width)
+        self.height = float(height)
+        self.io = _IO()
+        self.draw_list = _DrawList()
+        self._cursor: Tuple[float, float] = (0.0, 0.0)
+        self._prev_down = [False] * 5
+        self._clicked = [False] * 5
+        self._active_id: Optional[str] = None
+        self._last_item: Optional[str] = None
+
+    def new_frame(self) -> None:
+        down = self.io.mouse_down
+        self._clicked = [d and not p for d, p in zip(down, self._prev_down)]
+        self._prev_down = list(down)
+        if not down[0]:
+            self._active_id = None
+        self.draw_list = _DrawList()
+
+    # Windows and layout
+    def begin(self, name: str, closable: bool = False, flags: int = 0):
+        self._cursor = (0.0, 0.0)
+        return True, True
+
+    def end(self) -> None:
+        pass
+
+    def get_cursor_screen_pos(self) -> Tuple[float, float]:
+        return self._cursor
+
+    def set_cursor_screen_position(self, pos) -> None:
+        self._cursor = (float(pos[0]), float(pos[1]))
+
+    def get_content_region_available(self) -> Tuple[float, float]:
+        return self.width, self.height
+
+    def get_window_draw_list(self) -> _DrawList:
+        return self.draw_list
+
+    def push_item_width(self, width: float) -> None:
+        pass
+
+    def pop_item_width(self) -> None:
+        pass
+
+    # Input
+    def get_io(self) -> _IO:
+        return self.io
+
+    def is_mouse_clicked(self, button: int = 0) -> bool:
+        return self._clicked[button]
+
+    def is_mouse_down(self, button: int = 0) -> bool:
+        return self.io.mouse_down[button]
+
+    # Widgets
+    def invisible_button(self, label: str, width: float, height: float) -> bool:
+        x, y = self._cursor
+        mx, my = self.io.mouse_pos
+        pressed = self._clicked[0] and x <= mx <= x + width and y <= my <= y + height
+        if pressed:
+            self._active_id = label
+        self._last_item = label
+        return pressed
+
+    def is_item_active(self) -> bool:
+        return self._active_id is not None and self._active_id == self._last_item
+
+    def slider_float(self, label: str, value: float, v_min: float, v_max: float, *args, **kwargs):
+        return False, value
+
+    @staticmethod
+    def get_color_u32_rgba(r: float, g: float, b: float, a: float) -> int:
+        return (int(a * 255) << 24) | (int(b * 255) << 16) | (int(g * 255) << 8) | int(r * 255)
+
+
+@contextmanager
+def recording_imgui(rec: RecordingImGui):
+    """Point ui.timeline and ui.minimap at rec while the block runs.
+
+    When imgui is not installed, rec stands in for it during the import. The
+    overview texture stays disabled afterwards, so use this in headless
+    processes only.
+    """
+    injected = "imgui" not in sys.modules and importlib.util.find_spec("imgui") is None
+    if injected:
+        sys.modules["imgui"] = rec
+    try:
+        from ui import minimap, timeline
+    finally:
+        if injected:
+            del sys.modules["imgui"]
+    saved = timeline.imgui, minimap.imgui
+    timeline.imgui = minimap.imgui = rec
+    minimap.disable_minimap_texture()
+    try:
+        yield timeline
+    finally:
+        timeline.imgui, minimap.imgui = saved
+
+
+# -------- Songs --------
+def synthetic_doc(tracks: int = 16, notes: int = 20000, density: float = 4.0,
+                  tpq: int = 480, seed: int = 1) -> MidiDoc:
+    """`tracks` tracks of `notes` notes each, `density` note starts per beat.
+
+    Pitches wander over two octaves per track, lengths range from a sixteenth
+    to a half note, and the second half of the song is in 7/8.
+    """
+    rng = random.Random(seed)
+    step = tpq / max(1e-6, density)
+    lengths = (tpq // 4, tpq // 2, tpq, tpq * 2)
+    decoded: List[SmfTrack] = []
+    end_tick = 0
+    for t in range(tracks):
+        st = SmfTrack()
+        st.name = f"Synth {t + 1}"
+        base = 36 + (t * 7) % 36
+        rows = []
+        for i in range(notes):
+            start = int(i * step) + rng.randrange(max(1, int(step)))
+            rows.append((start, start + rng.choice(lengths), base + rng.randrange(24),
+                         40 + rng.randrange(88), t % 16))
+        st.notes = rows
+        st.end_tick = max((r[1] for r in rows), default=0)
+        end_tick = max(end_tick, st.end_tick)
+        decoded.append(st)
+
+    conductor = SmfTrack()
+    bar = 4 * tpq
+    conductor.ts_changes = [(0, 4, 4), ((end_tick // 2) // bar * bar, 7, 8)]
+    conductor.tempo_events = [(0, 500000)]
+    conductor.end_tick = end_tick
+    doc = MidiDoc()
+    doc.load_tracks([conductor] + decoded, tpq, path="<synthetic>")
+    return doc
+
+
+# -------- Scenarios --------
+# script(rec, state, area, i, n) sets the input for frame i of n;
+# area = (x0, y0, x1, y1) of the note area
+Script = Callable[[RecordingImGui, AppState, Tuple[float, float, float, float], int, int], None]
+
+
+def _note_area(state: AppState, width: float, height: float) -> Tuple[float, float, float, float]:
+    """Mirror of the draw_timeline_canvas layout for a window at (0, 0)."""
+    strip = state.minimap_h if state.show_minimap and state.midi.tracks else 0
+    return (float(state.track_header_w), float(strip + state.ruler_h),
+            width - SCROLLBAR, height - SCROLLBAR)
+
+
+def _pan(rec, state, area, i, n) -> None:
+    x0, y0, x1, y1 = area
+    cx, cy = (x0 + x1) * 0.5, (y0 + y1) * 0.5
+    rec.io.mouse_down[1] = i < n - 1
+    rec.io.mouse_pos = (cx - 12.0 * i, cy - 2.0 * i)
+
+
+def _zoom(rec, state, area, i, n) -> None:
+    x0, y0, x1, y1 = area
+    rec.io.mouse_pos = ((x0 + x1) * 0.5, (y0 + y1) * 0.5)
+    rec.io.key_ctrl = True
+    rec.io.mouse_wheel = -1.0 if i < n // 3 else 1.0
+
+
+def _marquee(rec, state, area, i, n) -> None:
+    x0, y0, x1, y1 = area
+    f = min(1.0, i / max(1, n - 2))
+    rec.io.mouse_down[0] = i < n - 1
+    rec.io.mouse_pos = (x0 + 10 + f * (x1 - x0 - 20), y0 + 10 + f * (y1 - y0 - 20))
+
+
+def _playback(rec, state, area, i, n) -> None:
+    x0, y0, x1, y1 = area
+    view_beats = (x1 - x0) / state.px_per_beat
+    state.playing = i < n - 1
+    state.playhead_beats = 4.0 * view_beats * i / max(1, n - 1)
+    if state.playhead_beats * state.px_per_beat - state.scroll_x_px > x1 - x0:
+        state.scroll_x_px = state.playhead_beats * state.px_per_beat   # page along
+
+
+def _scroll(rec, state, area, i, n) -> None:
+    x0, y0, x1, y1 = area
+    rec.io.mouse_pos = ((x0 + x1) * 0.5, (y0 + y1) * 0.5)
+    rec.io.mouse_wheel = -1.0
+
+
+SCENARIOS: Dict[str, Script] = {
+    "pan": _pan,
+    "zoom": _zoom,
+    "marquee": _marquee,
+    "playback": _playback,
+    "scroll": _scroll,
+}
+
+
+@dataclass
+class SessionResult:
+    scenario: str
+    frames: int
+    ms_avg: float
+    ms_p95: float
+    ms_worst: float
+    prims_avg: float
+    prims_max: int
+    kinds_avg: Dict[str, float] = field(default_factory=dict)     # primitives per frame by kind
+    counters_avg: Dict[str, float] = field(default_factory=dict)  # timeline profiler counters
+
+
+def run_session(doc: MidiDoc, scenario: str, frames: int = 120, size: Tuple[int, int] = (1600, 900),
+                warmup: int = 2) -> SessionResult:
+    """Replay one scenario on a fresh view of doc and measure draw_timeline_canvas."""
+    script = SCENARIOS[scenario]
+    frames = max(1, int(frames))
+    state = AppState(midi=doc, gpu_notes=False)
+    state.request_fit_vertical = True
+    prof = state.profiler = FrameProfiler(history=frames)
+    rec = RecordingImGui(*size)
+    prims: List[int] = []
+    kinds: Dict[str, int] = {}
+    with recording_imgui(rec) as timeline:
+        for _ in range(warmup):   # view fit, lazy caches
+            rec.new_frame()
+            timeline.draw_timeline_canvas(state)
+        area = _note_area(state, *size)
+        prof.enabled = True
+        for i in range(frames):
+            script(rec, state, area, i, frames)
+            rec.new_frame()
+            prof.begin_frame()
+            timeline.draw_timeline_canvas(state)
+            prof.mark("timeline")
+            prof.end_frame()
+            rec.io.mouse_wheel = 0.0
+            counts = rec.draw_list.counts
+            prims.append(sum(counts.values()))
+            for kind, c in counts.items():
+                kinds[kind] = kinds.get(kind, 0) + c
+    avg, p95, worst = prof.frame_stats()
+    return SessionResult(
+        scenario=scenario, frames=frames, ms_avg=avg, ms_p95=p95, ms_worst=worst,
+        prims_avg=sum(prims) / frames, prims_max=max(prims),
+        kinds_avg={k: c / frames for k, c in sorted(kinds.items()) if c},
+        counters_avg={name: mean for name, _last, mean in prof.counters()},
+    )
+
+
+# -------- CLI --------
+def _int_list(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def _size(text: str) -> Tuple[int, int]:
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(
+        prog="midi2fur.py render-bench",
+        description="Replay scripted piano-roll sessions without a display and report frame cost.",
+    )
+    ap.add_argument("--file", default=None, help="benchmark this MIDI file instead of synthetic songs")
+    ap.add_argument("--tracks", type=int, default=16, help="synthetic song: tracks")
+    ap.add_argument("--notes", type=_int_list, default=[20000], metavar="N[,N...]",
+                    help="synthetic song: notes per track; several values measure scaling")
+    ap.add_argument("--density", type=float, default=4.0, help="synthetic song: note starts per beat")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--scenario", default=",".join(SCENARIOS), metavar="NAME[,NAME...]",
+                    help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    ap.add_argument("--frames", type=int, default=120, help="timed frames per scenario")
+    ap.add_argument("--size", type=_size, default=(1600, 900), metavar="WxH", help="canvas size in pixels")
+    ap.add_argument("--json", default=None, metavar="PATH", help="also write the results as JSON")
+    ap.add_argument("--budget-ms", type=float, default=None,
+                    help="fail when a scenario's p95 frame time exceeds this")
+    ap.add_argument("--budget-prims", type=int, default=None,
+                    help="fail when a frame draws more primitives than this")
+    return ap
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    scenarios = [s.strip() for s in args.scenario.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown or not scenarios:
+        print(f"Unknown scenario: {', '.join(unknown) or '(none)'}", file=sys.stderr)
+        return 2
+
+    songs: List[Tuple[str, Callable[[], MidiDoc]]] = []
+    if args.file:
+        def load() -> MidiDoc:
+            doc = MidiDoc()
+            doc.load(args.file)
+            return doc
+        songs.append((args.file, load))
+    else:
+        for n in args.notes:
+            songs.append((f"{args.tracks} tracks x {n:,} notes",
+                          lambda n=n: synthetic_doc(args.tracks, n, args.density, seed=args.seed)))
+
+    report = []
+    over: List[str] = []
+    for label, make in songs:
+        doc = make()
+        total = sum(len(td.notes) for td in doc.tracks)
+        print(f"{label}: {total:,} notes, {doc.total_beats:,.0f} beats, "
+              f"canvas {args.size[0]}x{args.size[1]}, {args.frames} frames")
+        print(f"  {'scenario':<10} {'ms avg':>8} {'p95':>8} {'worst':>8} {'prims avg':>10} {'max':>7} "
+              f"{'notes drawn':>12}")
+        for name in scenarios:
+            r = run_session(doc, name, args.frames, args.size)
+            print(f"  {r.scenario:<10} {r.ms_avg:8.2f} {r.ms_p95:8.2f} {r.ms_worst:8.2f} "
+                  f"{r.prims_avg:10.0f} {r.prims_max:7d} {r.counters_avg.get('notes drawn', 0.0):12.0f}")
+            report.append(dict(song=label, notes=total, **asdict(r)))
+            if args.budget_ms is not None and r.ms_p95 > args.budget_ms:
+                over.append(f"{label} / {name}: p95 {r.ms_p95:.2f} ms > {args.budget_ms:g} ms")
+            if args.budget_prims is not None and r.prims_max > args.budget_prims:
+                over.append(f"{label} / {name}: {r.prims_max} primitives > {args.budget_prims}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for line in over:
+        print(f"OVER BUDGET {line}", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
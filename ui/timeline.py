@@ -1,7 +1,145 @@
 # ui/timeline.py
 import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List
 import imgui
 from app.state import clamp, center_track_pitch_scroll
+from app.beat_grid import visible_span
+from app.density import pyramid_for
+from app.note_grid import grid_for
+from ui.gl_notes import note_layer, disable_note_layer
+from ui.minimap import draw_minimap
+
+# Level of detail: below this average on-screen note width (or with more notes
+# starting in view than there are pixel columns) a track is drawn as merged
+# occupancy runs from its density pyramid instead of note by note.
+LOD_MIN_NOTE_PX = 4.0
+LOD_MIN_BUCKET_PX = 3.0
+
+
+def _use_density_lod(notes, tpq: int, px_per_beat: float, t0: int, t1: int, view_w: float) -> bool:
+    if not len(notes):
+        return False
+    pyr = pyramid_for(notes, tpq)
+    if pyr.mean_note_ticks / float(tpq or 1) * px_per_beat < LOD_MIN_NOTE_PX:
+        return True
+    starts = notes.start_tick
+    return bisect_right(starts, t1) - bisect_left(starts, t0) > view_w
+
+
+def _draw_notes_imgui(draw_list, state, ti, notes, header_x1, view_x1,
+                      note_area_y0, clip_y0, clip_y1, t0, t1) -> int:
+    """Per-note imgui rectangles (fallback when the GPU note layer is unavailable).
+    Returns the number of notes drawn."""
+    note_color = imgui.get_color_u32_rgba(0.27, 0.58, 0.98, 0.95)
+    border_col = imgui.get_color_u32_rgba(0.05, 0.1, 0.18, 1.0)
+    start_bs, end_bs, pitches = notes.start_beats, notes.end_beats, notes.pitch
+    sel_mask = state.selection.mask(ti)
+    drawn = 0
+    for ni in notes.in_range(t0, t1):
+        x_start = header_x1 + (start_bs[ni] * state.px_per_beat) - state.scroll_x_px
+        x_end   = header_x1 + (end_bs[ni]   * state.px_per_beat) - state.scroll_x_px
+        if x_end < header_x1 or x_start > view_x1:
+            continue
+
+        y_note = note_area_y0 + ((127 - pitches[ni]) * state.note_height)
+        y2     = y_note + state.note_height - 1
+        if y2 < clip_y0 or y_note > clip_y1:
+            continue
+
+        y1c = max(clip_y0, y_note)
+        y2c = min(clip_y1, y2)
+        x1c = max(header_x1, x_start)
+        x2c = min(view_x1, x_end)
+
+        sel = sel_mask is not None and sel_mask[ni]
+        fill_col = note_color if not sel else imgui.get_color_u32_rgba(0.98, 0.78, 0.28, 0.95)
+        edge_col = border_col if not sel else imgui.get_color_u32_rgba(0.95, 0.85, 0.45, 1.0)
+        draw_list.add_rect_filled(x1c, y1c, x2c, y2c, fill_col)
+        draw_list.add_rect(x1c, y1c, x2c, y2c, edge_col)
+        drawn += 1
+    return drawn
+
+
+def _marquee_hits(state, header_x1, view_x1, track_area_y0, track_area_y1,
+                  first_row: int, last_row: int) -> Dict[int, List[int]]:
+    """{track: ascending note indices} of visible notes touched by the marquee."""
+    sx0, sy0 = state.marquee_start
+    sx1_, sy1_ = state.marquee_end
+    if sx1_ < sx0: sx0, sx1_ = sx1_, sx0
+    if sy1_ < sy0: sy0, sy1_ = sy1_, sy0
+    sx0 = max(sx0, header_x1); sx1_ = min(sx1_, view_x1)
+    sy0 = max(sy0, track_area_y0); sy1_ = min(sy1_, track_area_y1)
+    hits: Dict[int, List[int]] = {}
+    if (sx1_ - sx0) <= 2 or (sy1_ - sy0) <= 2:
+        return hits
+
+    # Ticks and pitches under the rectangle (one note of slack; the pixel test below is exact)
+    tpq = state.midi.ticks_per_beat
+    ppb = max(1e-6, state.px_per_beat)
+    nh = float(state.note_height)
+    sel_start_tick = int(math.floor((state.scroll_x_px + sx0 - header_x1) / ppb * tpq))
+    sel_end_tick = int(math.ceil((state.scroll_x_px + sx1_ - header_x1) / ppb * tpq))
+    for ti in range(first_row, last_row + 1):
+        td = state.midi.tracks[ti]
+        if not td.has_notes:
+            continue
+        row_top = track_area_y0 + (ti * state.track_height) - state.scroll_y_px
+        note_area_y0 = row_top + 4 + td.pitch_scroll_px
+        pitch_lo = 127 - int(math.floor((sy1_ - note_area_y0) / nh)) - 1
+        pitch_hi = 127 - int(math.ceil((sy0 - note_area_y0 - nh + 1) / nh)) + 1
+        if pitch_hi < 0 or pitch_lo > 127:
+            continue
+        notes = state.midi.track_notes(ti)
+        start_bs, end_bs, pitches = notes.start_beats, notes.end_beats, notes.pitch
+        found = []
+        for ni in grid_for(notes, tpq).query(sel_start_tick, sel_end_tick, pitch_lo, pitch_hi):
+            x_start = header_x1 + (start_bs[ni] * state.px_per_beat) - state.scroll_x_px
+            x_end   = header_x1 + (end_bs[ni]   * state.px_per_beat) - state.scroll_x_px
+            y_note  = note_area_y0 + ((127 - pitches[ni]) * state.note_height)
+            y2      = y_note + state.note_height - 1
+            if x_end < sx0 or x_start > sx1_:
+                continue
+            if y2 < sy0 or y_note > sy1_:
+                continue
+            found.append(ni)
+        if found:
+            hits[ti] = found
+    return hits
+
+
+def _draw_density_runs(draw_list, state, ti, notes, tpq, header_x1, view_x1,
+                       note_area_y0, clip_y0, clip_y1, t0, t1) -> int:
+    """Draw a track as one rectangle per occupied run of a pitch row, with the
+    selected notes' runs on top in the selection colour; returns the run count."""
+    pyr = pyramid_for(notes, tpq)
+    px_per_tick = state.px_per_beat / float(tpq or 1)
+    level = pyr.level_for(px_per_tick, LOD_MIN_BUCKET_PX)
+    nh = state.note_height
+    # Pitch rows intersecting the clip rect
+    pitch_hi = int(127 - math.floor((clip_y0 - note_area_y0) / nh)) if nh else 127
+    pitch_lo = int(127 - math.floor((clip_y1 - note_area_y0) / nh)) if nh else 0
+    # Denser runs are drawn more opaque
+    layers = [(pyr, [imgui.get_color_u32_rgba(0.27, 0.58, 0.98, 0.35 + 0.15 * k) for k in range(5)])]
+    sel_mask = state.selection.mask(ti)
+    if sel_mask is not None:
+        layers.append((pyr.selected(sel_mask, state.selection.version),
+                       [imgui.get_color_u32_rgba(0.98, 0.78, 0.28, 0.55 + 0.1 * k) for k in range(5)]))
+    drawn = 0
+    for layer, cols in layers:
+        for pitch, ts, te, peak in layer.runs(level, t0, t1, pitch_lo, pitch_hi):
+            x_start = header_x1 + ts * px_per_tick - state.scroll_x_px
+            x_end = header_x1 + te * px_per_tick - state.scroll_x_px
+            y_note = note_area_y0 + ((127 - pitch) * nh)
+            y1c = max(clip_y0, y_note)
+            y2c = min(clip_y1, y_note + nh - 1)
+            x1c = max(header_x1, x_start)
+            x2c = min(view_x1, x_end)
+            if x2c <= x1c or y2c <= y1c:
+                continue
+            draw_list.add_rect_filled(x1c, y1c, x2c, y2c, cols[min(4, peak)])
+            drawn += 1
+    return drawn
 
 def draw_timeline_canvas(state):
     """Main piano roll canvas: grid, notes, marquee, scrollbars, ruler."""
@@ -22,9 +160,11 @@ def draw_timeline_canvas(state):
     view_x1 = x1 - sb
     view_y1 = y1 - sb
 
-    # Areas
-    ruler_y0 = y0
-    ruler_y1 = y0 + state.ruler_h
+    # Areas (overview strip, ruler, tracks)
+    minimap_y0 = y0
+    minimap_y1 = y0 + (state.minimap_h if state.show_minimap and state.midi.tracks else 0)
+    ruler_y0 = minimap_y1
+    ruler_y1 = ruler_y0 + state.ruler_h
     track_area_y0 = ruler_y1
     track_area_y1 = view_y1
 
@@ -54,11 +194,7 @@ def draw_timeline_canvas(state):
 
     if do_fit_vert:
         # Fit max pitch span into one track height
-        largest_range = 0
-        for td in state.midi.tracks:
-            if not td.notes:
-                continue
-            largest_range = max(largest_range, td.pitch_max - td.pitch_min + 1)
+        largest_range = state.midi.stats.largest_track_range
         if largest_range > 0:
             available = max(8, state.track_height - 8)
             new_note_h = max(2, int(available / largest_range))
@@ -95,7 +231,8 @@ def draw_timeline_canvas(state):
         state.marquee_active = True
         state.marquee_start = (mousex, mousey)
         state.marquee_end = (mousex, mousey)
-        state.selected_notes.clear()
+        state.marquee_hits = {}
+        state.selection.clear()
     if state.marquee_active and imgui.is_mouse_down(0):
         state.marquee_end = (mousex, mousey)
 
@@ -152,9 +289,21 @@ def draw_timeline_canvas(state):
     vis_start_tick  = int(left_beat * tpq)
     vis_end_tick    = int(right_beat * tpq)
 
-    # Draw rows + notes
-    note_color = imgui.get_color_u32_rgba(0.27, 0.58, 0.98, 0.95)
-    border_col = imgui.get_color_u32_rgba(0.05, 0.1, 0.18, 1.0)
+    # Live marquee: re-query the notes under the rectangle every frame of the drag
+    if state.marquee_active:
+        hits = _marquee_hits(state, header_x1, view_x1, track_area_y0, track_area_y1,
+                             first_visible_row, last_visible_row)
+        if hits != state.marquee_hits:
+            state.selection.clear()
+            for ti, indices in hits.items():
+                state.selection.add_many(ti, indices)
+            state.marquee_hits = hits
+
+    # Draw rows + notes (notes go through the GPU layer when it is available)
+    gpu_layer = note_layer() if state.gpu_notes else None
+    gpu_rows = []
+    # Diagnostics counters
+    notes_drawn = row_notes = density_runs = gl_draw_calls = 0
 
     if last_visible_row >= first_visible_row:
         for ti in range(first_visible_row, last_visible_row + 1):
@@ -189,37 +338,50 @@ def draw_timeline_canvas(state):
                         draw_list.add_line(header_x1, y_line, view_x1, y_line, grid_col_h)
                         y_line += step
 
-            # Draw notes in visible time
-            for ni, n in enumerate(td.notes):
-                if n.end_tick < vis_start_tick or n.start_tick > vis_end_tick:
-                    continue
-
-                start_b = n.start_tick / float(tpq or 1)
-                end_b   = n.end_tick / float(tpq or 1)
-                x_start = header_x1 + (start_b * state.px_per_beat) - state.scroll_x_px
-                x_end   = header_x1 + (end_b   * state.px_per_beat) - state.scroll_x_px
-                if x_end < header_x1 or x_start > view_x1:
-                    continue
-
-                y_note = note_area_y0 + ((127 - n.pitch) * state.note_height)
-                y2     = y_note + state.note_height - 1
-                if y2 < clip_y0 or y_note > clip_y1:
-                    continue
-
-                y1c = max(clip_y0, y_note)
-                y2c = min(clip_y1, y2)
-                x1c = max(header_x1, x_start)
-                x2c = min(view_x1, x_end)
-
-                sel = (ti, ni) in state.selected_notes
-                fill_col = note_color if not sel else imgui.get_color_u32_rgba(0.98, 0.78, 0.28, 0.95)
-                edge_col = border_col if not sel else imgui.get_color_u32_rgba(0.95, 0.85, 0.45, 1.0)
-                draw_list.add_rect_filled(x1c, y1c, x2c, y2c, fill_col)
-                draw_list.add_rect(x1c, y1c, x2c, y2c, edge_col)
+            # Draw notes in visible time (a lazy track whose file was rewritten
+            # draws empty until the file watcher reloads it)
+            notes = state.midi.track_notes(ti)
+            if _use_density_lod(notes, tpq, state.px_per_beat, vis_start_tick, vis_end_tick, view_x1 - header_x1):
+                density_runs += _draw_density_runs(draw_list, state, ti, notes, tpq, header_x1, view_x1,
+                                                   note_area_y0, clip_y0, clip_y1, vis_start_tick, vis_end_tick)
+                draw_list.add_line(x0, row_bottom, view_x1, row_bottom, imgui.get_color_u32_rgba(1,1,1,0.08))
+                continue
+
+            row_notes += len(notes)
+            if gpu_layer is not None:
+                gpu_rows.append((ti, note_area_y0, clip_y0, clip_y1))
+            else:
+                notes_drawn += _draw_notes_imgui(draw_list, state, ti, notes, header_x1, view_x1,
+                                                 note_area_y0, clip_y0, clip_y1, vis_start_tick, vis_end_tick)
 
             # Row bottom line
             draw_list.add_line(x0, row_bottom, view_x1, row_bottom, imgui.get_color_u32_rgba(1,1,1,0.08))
 
+    if gpu_rows:
+        try:
+            oy = track_area_y0
+            tex = gpu_layer.render(
+                state.midi,
+                [(ti, ay - oy, c0 - oy, c1 - oy, vis_start_tick, vis_end_tick) for (ti, ay, c0, c1) in gpu_rows],
+                state.px_per_beat, state.scroll_x_px, state.note_height,
+                int(round(view_x1 - header_x1)), int(round(track_area_y1 - track_area_y0)),
+                state.selection)
+            draw_list.add_image(tex, (header_x1, track_area_y0), (view_x1, track_area_y1), (0, 1), (1, 0))
+            notes_drawn += gpu_layer.last_notes
+            gl_draw_calls += gpu_layer.last_draw_calls
+        except Exception as e:
+            disable_note_layer(e)
+            for (ti, ay, c0, c1) in gpu_rows:
+                notes_drawn += _draw_notes_imgui(draw_list, state, ti, state.midi.track_notes(ti), header_x1, view_x1,
+                                                 ay, c0, c1, vis_start_tick, vis_end_tick)
+
+    prof = state.profiler
+    if prof.enabled:
+        prof.count("notes drawn", notes_drawn)
+        prof.count("notes culled", row_notes - notes_drawn)   # on visible per-note rows
+        prof.count("density runs", density_runs)
+        prof.count("GL draw calls", gl_draw_calls)
+
     # === Vertical grid overlay and ruler ===
     header_x = header_x1
     col_bar_grid  = imgui.get_color_u32_rgba(1, 1, 1, 0.18)
@@ -258,86 +420,41 @@ def draw_timeline_canvas(state):
             _vline_grid(pos, col_8th)
             i += 1
 
-    for seg in state.midi.ts_segments:
-        seg_left = max(left_beat, seg['start_beats'])
-        seg_right = min(right_beat, seg['end_beats'])
-        if seg_left >= seg_right:
-            continue
-        bar_len = seg['bar_len']
-        beat_len = seg['beat_len']
-        num = seg['num']
-
-        k0 = max(0, int(math.floor((seg_left - seg['start_beats']) / max(1e-9, bar_len))))
-        k1 = int(math.floor((seg_right - seg['start_beats']) / max(1e-9, bar_len)))
-        for k in range(k0, k1 + 1):
-            mpos = seg['start_beats'] + k * bar_len
-            _vline_grid(mpos, col_bar_grid)
-            for j in range(1, num):
-                bpos = mpos + j * beat_len
-                if seg['start_beats'] <= bpos <= seg['end_beats'] and left_beat <= bpos <= right_beat:
-                    _vline_grid(bpos, col_beat_grid)
+    # Bar and beat lines from the document's precomputed grid
+    grid = state.midi.beat_grid
+    bar_lo, bar_hi = visible_span(grid.bars, left_beat, right_beat)
+    beat_lo, beat_hi = visible_span(grid.beats, left_beat, right_beat)
+    for pos in grid.bars[bar_lo:bar_hi]:
+        _vline_grid(pos, col_bar_grid)
+    for pos in grid.beats[beat_lo:beat_hi]:
+        _vline_grid(pos, col_beat_grid)
 
     # Ruler on top
     draw_list.add_rect_filled(x0, ruler_y0, x1, ruler_y1, imgui.get_color_u32_rgba(0.16, 0.16, 0.16, 1.0))
-    for seg in state.midi.ts_segments:
-        seg_left = max(left_beat, seg['start_beats'])
-        seg_right = min(right_beat, seg['end_beats'])
-        if seg_left >= seg_right:
-            continue
-        bar_len = seg['bar_len']
-        beat_len = seg['beat_len']
-        num = seg['num']
-        k0 = max(0, int(math.floor((seg_left - seg['start_beats']) / max(1e-9, bar_len))))
-        k1 = int(math.floor((seg_right - seg['start_beats']) / max(1e-9, bar_len)))
-        for k in range(k0, k1 + 1):
-            mpos = seg['start_beats'] + k * bar_len
-            _tick_on_ruler(mpos, 14, col_tick_ruler)
-            meas_num = seg['measure_start_index'] + k + 1
-            X = header_x + (mpos * state.px_per_beat) - state.scroll_x_px
-            if header_x <= X <= view_x1:
-                draw_list.add_text(X + 4, ruler_y0 + 4, imgui.get_color_u32_rgba(1, 1, 1, 0.95), str(meas_num))
-            for j in range(1, num):
-                bpos = mpos + j * beat_len
-                if seg['start_beats'] <= bpos <= seg['end_beats'] and left_beat <= bpos <= right_beat:
-                    _tick_on_ruler(bpos, 8, col_tick_ruler)
-
-    # Finalize marquee selection when mouse released
+    col_label = imgui.get_color_u32_rgba(1, 1, 1, 0.95)
+    for pos, label in zip(grid.bars[bar_lo:bar_hi], grid.bar_labels[bar_lo:bar_hi]):
+        _tick_on_ruler(pos, 14, col_tick_ruler)
+        X = header_x + (pos * state.px_per_beat) - state.scroll_x_px
+        if header_x <= X <= view_x1:
+            draw_list.add_text(X + 4, ruler_y0 + 4, col_label, label)
+    for pos in grid.beats[beat_lo:beat_hi]:
+        _tick_on_ruler(pos, 8, col_tick_ruler)
+
+    # Overview strip above the ruler
+    if minimap_y1 > minimap_y0:
+        draw_list.add_rect_filled(x0, minimap_y0, x1, minimap_y1, imgui.get_color_u32_rgba(0.14, 0.14, 0.14, 1.0))
+        draw_list.add_text(header_x0 + 8, minimap_y0 + 4, imgui.get_color_u32_rgba(1, 1, 1, 0.6), "Overview")
+        draw_minimap(draw_list, state, header_x1, minimap_y0, view_x1, minimap_y1 - 2,
+                     view_x1 - header_x1, track_area_y1 - track_area_y0)
+
+    # Finish the marquee when the mouse is released (the selection is already live)
     if state.marquee_active and not imgui.is_mouse_down(0):
-        sx0, sy0 = state.marquee_start
-        sx1_, sy1_ = state.marquee_end
-        if sx1_ < sx0: sx0, sx1_ = sx1_, sx0
-        if sy1_ < sy0: sy0, sy1_ = sy1_, sy0
-        sx0 = max(sx0, header_x1); sx1_ = min(sx1_, view_x1)
-        sy0 = max(sy0, track_area_y0); sy1_ = min(sy1_, track_area_y1)
-        if (sx1_ - sx0) > 2 and (sy1_ - sy0) > 2:
-            if last_visible_row >= first_visible_row:
-                for ti in range(first_visible_row, last_visible_row + 1):
-                    td = state.midi.tracks[ti]
-                    row_top = track_area_y0 + (ti * state.track_height) - state.scroll_y_px
-                    note_area_y0 = row_top + 4 + td.pitch_scroll_px
-                    for ni, n in enumerate(td.notes):
-                        if n.end_tick < vis_start_tick or n.start_tick > vis_end_tick:
-                            continue
-                        start_b = n.start_tick / float(tpq or 1)
-                        end_b   = n.end_tick   / float(tpq or 1)
-                        x_start = header_x1 + (start_b * state.px_per_beat) - state.scroll_x_px
-                        x_end   = header_x1 + (end_b   * state.px_per_beat) - state.scroll_x_px
-                        y_note  = note_area_y0 + ((127 - n.pitch) * state.note_height)
-                        y2      = y_note + state.note_height - 1
-                        if x_end < sx0 or x_start > sx1_:
-                            continue
-                        if y2 < sy0 or y_note > sy1_:
-                            continue
-                        state.selected_notes.add((ti, ni))
         state.marquee_active = False
+        state.marquee_hits = {}
 
         # >>> Snap playhead to selection start only when not playing <<<
-        if state.selected_notes and not getattr(state, "playing", False):
-            tpq = state.midi.ticks_per_beat or 480
-            min_b = min(
-                (state.midi.tracks[ti].notes[ni].start_tick / tpq)
-                for (ti, ni) in state.selected_notes
-            )
+        if state.selection and not getattr(state, "playing", False):
+            min_b = state.selection.bounds[0]
             state.playhead_beats = max(0.0, float(min_b))
 
 
@@ -2,6 +2,7 @@
 import imgui
 from tracker.types import FurnaceConfig
 from tracker.export import copy_selection_to_clipboard
+from tracker.voices import STEAL_POLICIES
 
 def draw_tracker_settings_window(state):
     if not getattr(state, "show_tracker_settings", False):
@@ -141,9 +142,21 @@ def draw_tracker_settings_window(state):
     if not disabled and changed:
         cfg.spillover_count = c
 
+    policies = list(STEAL_POLICIES)
+    labels = [p.replace("_", " ").capitalize() for p in policies]
+    cur = policies.index(cfg.spillover_steal) if cfg.spillover_steal in policies else 0
+    changed, idx = imgui.combo("Voice stealing", cur, labels)
+    if not disabled and changed:
+        cfg.spillover_steal = policies[idx]
+
     if _pushed:
         imgui.pop_style_var()
 
+    stats = state.midi.stats
+    if stats.has_notes and stats.complete:
+        need = stats.max_track_polyphony
+        imgui.text(f"Busiest track needs {need} channel{'s' if need != 1 else ''}")
+
     imgui.separator()
     # Copy + status (uses the new (ok, msg) return)
     if imgui.button("Copy selection to Furnace (Ctrl+C)"):
@@ -175,12 +188,22 @@ def draw_tracker_settings_window(state):
             state.pending_export_popup = None
         imgui.end_popup()
 
-    # --- Lightweight live preview ---
+    # --- Live preview (only the rows in view are laid out) ---
     imgui.separator()
     imgui.text("Preview")
-
-    from tracker.export import build_furnace_clipboard_text
-    ok, text_or_err = build_furnace_clipboard_text(state, cfg)
+    imgui.same_line()
+    imgui.push_item_width(160)
+    changed, prow = imgui.slider_int("Pattern rows", state.preview_pattern_rows, 16, 256)
+    if changed: state.preview_pattern_rows = prow
+    imgui.pop_item_width()
+
+    # Keep the last preview during a marquee drag; it is rebuilt once on release.
+    # Lazy tracks that are not decoded yet are left out rather than decoded here.
+    cache = state.export_cache
+    ok, text_or_err = cache.get(state, cfg, stale_ok=state.marquee_active, loaded_only=True)
+    pending = len(state.midi.tracks) - state.midi.loaded_track_count
+    if pending and not state.selection:
+        imgui.text_disabled(f"{pending} track{'s' if pending != 1 else ''} not decoded yet (Copy includes them)")
 
     # Fill to right + bottom; add horizontal scrollbar
     min_h = 240.0
@@ -193,13 +216,12 @@ def draw_tracker_settings_window(state):
 
     imgui.begin_child("##furnace_preview", child_w, child_h, True, HSCROLL)
 
-    # Important: use unwrapped text so long lines can scroll horizontally
     if ok:
-        try:
-            imgui.text_unformatted(text_or_err)
-        except Exception:
-            for line in text_or_err.splitlines():
-                imgui.text_unformatted(line)
+        rows = cache.rows()
+        if rows:
+            _draw_preview_rows(rows, max(1, state.preview_pattern_rows))
+        else:
+            imgui.text_disabled("Nothing to export.")
     else:
         imgui.text_colored("Cannot preview export:", 1.0, 0.5, 0.5, 1.0)
         imgui.separator()
@@ -208,3 +230,44 @@ def draw_tracker_settings_window(state):
     imgui.end_child()
 
     imgui.end()
+
+
+def _draw_preview_rows(rows, pattern_rows: int):
+    """Row-number gutter (pattern:row, hex as in Furnace) + row text, with a
+    line at each pattern boundary. Only the rows inside the child's scroll
+    window are submitted, so the cost does not grow with the export length."""
+    draw_list = imgui.get_window_draw_list()
+    col_boundary = imgui.get_color_u32_rgba(0.95, 0.75, 0.35, 0.5)
+    line_w = max(imgui.get_window_width(), imgui.calc_text_size(rows[0])[0] + 80.0)
+
+    def draw_row(i):
+        pat, row = divmod(i, pattern_rows)
+        if row == 0:
+            if i:
+                x, y = imgui.get_cursor_screen_pos()
+                draw_list.add_line(x, y - 1, x + line_w, y - 1, col_boundary)
+            imgui.text_colored(f"{pat:02X}:{row:02X}", 0.95, 0.75, 0.35, 1.0)
+        else:
+            imgui.text_colored(f"{pat:02X}:{row:02X}", 0.55, 0.55, 0.55, 1.0)
+        imgui.same_line()
+        imgui.text_unformatted(rows[i])
+
+    ListClipper = getattr(imgui, "ListClipper", None)
+    if ListClipper is not None:
+        clipper = ListClipper()
+        clipper.begin(len(rows))
+        while clipper.step():
+            for i in range(clipper.display_start, clipper.display_end):
+                draw_row(i)
+        return
+
+    # Older bindings: same clipping by hand (rows are one text line each)
+    line_h = imgui.get_text_line_height_with_spacing()
+    start_y = imgui.get_cursor_pos_y()
+    first = min(len(rows), int(max(0.0, imgui.get_scroll_y() - start_y) // line_h))
+    last = min(len(rows), first + int(imgui.get_window_height() // line_h) + 2)
+    imgui.set_cursor_pos_y(start_y + first * line_h)
+    for i in range(first, last):
+        draw_row(i)
+    imgui.set_cursor_pos_y(start_y + len(rows) * line_h)
+    imgui.dummy(0, 0)